@@ -38,6 +38,30 @@ FIT_UPPER_BOUND_AMPLITUDE = np.inf
 FIT_UPPER_BOUND_DRIFT = np.inf
 FIT_UPPER_BOUND_Y = np.inf
 FIT_UPPER_BOUND_X = 37.5
+# whether to fit the datapoints by the variable projection (only the peak 
+# centre is searched, the other parameters are solved linearly) or to fit all
+# parameters with the scipy.optimize.curve_fit(), the variable projection 
+# searches the minimum the curve_fit() reaches from the FIT_STARTING_X
+FIT_VARIABLE_PROJECTION = True
+# whether to pass the analytic jacobian of the dipolfunction to the 
+# scipy.optimize.curve_fit(), if False the jacobian is approximated by finite
+# differences
+FIT_ANALYTIC_JACOBIAN = True
+# whether to start the fit of each datapoint at the results of the previous 
+# datapoint with the same sweep direction (the default values are used if the
+# previous fit failed), this is used by the curve_fit() only
+FIT_WARM_START = True
+# the number of peak centres between the bounds to test before the exact peak
+# centre is searched in the variable projection
+FIT_VARIABLE_PROJECTION_GRID = 26
+# the minimum distance of the FIT_STARTING_X to the maximum between two minima
+# of the peak centre, if the start is closer the curve_fit() may go to both 
+# minima, it is done too in the variable projection then
+FIT_VARIABLE_PROJECTION_RIDGE_DISTANCE = 0.05
+# the maximum relative difference of the magnetization of the variable 
+# projection and the curve_fit() if the curve_fit() is done too, its result is
+# used if the difference is bigger
+FIT_VARIABLE_PROJECTION_TOLERANCE = 1e-6
 
 # the map for the raw data where each line is
 RAW_FILE_OFFSET_COMMENT = 0
@@ -48,6 +72,79 @@ RAW_FILE_OFFSET_PROCESSED_VOLTAGE = 4
 RAW_FILE_OFFSET_FIXED_C_FIT = 5
 RAW_FILE_OFFSET_FREE_C_FIT = 6
 
+# whether to parse the data rows of the raw files block wise for each datapoint
+# (True) or line by line (False), the results are the same but parsing the 
+# blocks is a lot faster for big files
+RAW_FILE_BULK_PARSING = True
+# the number of bytes to read at once when parsing block wise
+RAW_FILE_CHUNK_SIZE = 1024 * 1024
+# whether to load the data rows of the datapoints only when they are used, this
+# needs the RAW_FILE_BULK_PARSING, the raw file must not change while it is open
+RAW_FILE_LAZY_LOADING = False
+
+# whether to save the parsed raw files and the fit results in the parse cache,
+# files that have been opened before are loaded from the cache then
+PARSE_CACHE = True
+# the directory for the cache files, None for the users cache directory
+PARSE_CACHE_DIRECTORY = None
+# the maximum size of all cache files in bytes, the least recently used files
+# are removed if the cache is bigger
+PARSE_CACHE_MAX_SIZE = 1024 * 1024 * 1024
+
+# the number of processes to open multiple files in parallel, 1 opens the files
+# one after another in the worker thread, 0 or None uses one process per cpu
+FILE_OPENING_PROCESSES = 0
+
+# whether to fit the datapoints with the same number of values at once by the
+# Levenberg-Marquardt iterations on stacked arrays, they start at the 
+# FIT_STARTING_X like the curve_fit(), datapoints that do not converge are 
+# fitted one by one
+FIT_BATCHED = True
+# the maximum number of datapoints to stack, this limits the memory
+FIT_BATCHED_SIZE = 256
+# the maximum number of Levenberg-Marquardt iterations
+FIT_BATCHED_MAX_ITERATIONS = 50
+
+# the number of processes to fit the datapoints of a file in, 1 fits in the 
+# current process, 0 or None uses one process per cpu, this can be changed in 
+# the preferences
+FIT_PROCESSES = 0
+# the minimum number of datapoints to fit in parallel processes, starting the
+# processes takes longer than fitting small files
+FIT_PARALLEL_MINIMUM_DATAPOINTS = 500
+# the number of datapoints to send to a fitting process at once
+FIT_BATCH_SIZE = 50
+# the key of the fitting processes in the preferences
+FIT_PROCESSES_PREFERENCE = "fit processes"
+
+# whether to fit the datapoints only when the magnetization or the fit results
+# are requested (for plotting, exporting or in the DataPointViewer) instead of
+# fitting all datapoints when the file is opened, this can be changed in the
+# preferences
+FIT_LAZY = False
+# the key of the lazy fitting in the preferences
+FIT_LAZY_PREFERENCE = "lazy fitting"
+
+# whether to save the fit results of the datapoints in the fit cache, the 
+# datapoints with exactly the same data (and the same fit settings) are not 
+# fitted again then
+FIT_CACHE = True
+# the maximum number of fit results to keep in the memory, the least recently
+# used results are removed
+FIT_CACHE_SIZE = 20000
+# whether to save the fit results in a database file too, so they can be used
+# after restarting the program and in the fitting processes
+FIT_CACHE_DISK = False
+# the directory for the database file, None for the users cache directory
+FIT_CACHE_DIRECTORY = None
+# the maximum number of fit results in the database file, the least recently
+# used results are removed
+FIT_CACHE_DISK_SIZE = 1000000
+
+# the interval in ms to check the followed raw files for appended data, the
+# files that are still written by the MPMS can be followed
+RAW_FILE_FOLLOW_INTERVAL = 2000
+
 # the map for the environment variable names
 ENVIRONMENT_VARIABLE_NAMES =  {
         "low temp": "low temperature",
@@ -120,6 +217,11 @@ STATIC_VALUE_THRESHOLD = 1000
 # will create the interpolation for each temperature point in the background
 INTERPOLATE_STATIC_VARIABLE = True
 
+# the minimum number of datapoints of all the samples to subtract the background
+# of many samples in parallel processes, starting the processes takes longer 
+# than subtracting the background of small files
+BACKGROUND_BATCH_PARALLEL_MINIMUM_DATAPOINTS = 2000
+
 # The length of the header in lines for the csv export, the CSVExporter will
 # guarantee that the header will always have this length
 HEADER_LINE_NUMBER = 30
@@ -129,4 +231,19 @@ HEADER_LINE_NUMBER = 30
 BACKGROUND_INCREASE_MODES = (
     ("Repeat the (selected) background data to fill in the missing data", "repeat"),
     ("Mirror the (selected) background data and repeate it to in fill the missing data", "mirror"),
-)
\ No newline at end of file
+)
+
+# a list of modes how the background voltages are matched to the sample 
+# voltages, the index 1 will be passed to the calculation.subtractBackgroundData(),
+# the index 0 will be displayed to the user. The "index" mode subtracts the 
+# background voltage in the same row, the "linear" and the "cubic" mode 
+# interpolate the background voltages at the raw positions of the sample
+BACKGROUND_SUBTRACTION_MODES = (
+    ("Subtract the background value in the same row", "index"),
+    ("Interpolate the background linearly at the sample positions", "linear"),
+    ("Interpolate the background with a cubic spline at the sample positions", "cubic"),
+)
+# the mode to use, this can be changed in the preferences
+BACKGROUND_SUBTRACTION_MODE = "index"
+# the key of the background subtraction mode in the preferences
+BACKGROUND_SUBTRACTION_MODE_PREFERENCE = "background subtraction mode"
\ No newline at end of file
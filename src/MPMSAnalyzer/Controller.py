@@ -16,6 +16,8 @@ with warnings.catch_warnings():
     matplotlib.use("Qt5Agg")
 
 from PyQt5 import QtWidgets, QtCore, QtGui
+import concurrent.futures
+import multiprocessing
 import copy
 import time
 import sys
@@ -24,6 +26,7 @@ import os
 
 import View.MainWindow
 import DataHandling.FileOpeningWorker
+import DataHandling.FittingWorker
 import DataHandling.DataContainer
 import DataHandling.calculation
 import Constants
@@ -57,6 +60,14 @@ class Controller(QtCore.QObject):
         
         self._datacontainer = []
         
+        # the datacontainers whose raw files are followed, the timer reads the
+        # appended data
+        self._followed_datacontainers = []
+        self._follow_timer = QtCore.QTimer(self)
+        self._follow_timer.timeout.connect(self._readFollowedFiles)
+        self.follow_files = False
+        self.openedDataContainer.connect(self._followOpenedDataContainer)
+        
         self.show_window = show_window
         
         if show_window:
@@ -118,6 +129,115 @@ class Controller(QtCore.QObject):
         else:
             return False
     
+    def fitDataContainer(self, datacontainer, axes, callback, index_list = None, parent = None):
+        """Fit the datapoints of the datacontainer that are needed for the 
+        given axes and that are not fitted yet in an external thread. This is
+        used for the lazy fitting, the callback is executed when the 
+        datapoints are fitted. If there is nothing to fit the callback is 
+        executed immediately
+        
+        Parameters
+        ----------
+            datacontainer : DataContainer
+                The datacontainer whose datapoints to fit
+            axes : list or tuple of Strings
+                The names of the data that is requested
+            callback : function
+                The function to execute when the datapoints are fitted, this
+                is not executed if the fitting is aborted
+            index_list : list or tuple, optional
+                The indices of the datapoints that are requested, if None all
+                the datapoints are requested
+            parent : QWidget, optional
+                The parent of the progress dialog
+        """
+        
+        if (not datacontainer.lazy_fitting or 
+            len(datacontainer.getUnfittedIndices(axes, index_list)) == 0):
+            callback()
+            return
+        
+        # the worker and the thread have to be values of the controller, 
+        # otherwise the garbage collector removes them, see 
+        # Controller.openFiles()
+        self._fit_worker = DataHandling.FittingWorker.FittingWorker(
+                datacontainer, axes, self, index_list, self.getFitProcesses())
+        self._fit_thread = QtCore.QThread()
+        
+        self._fit_worker.moveToThread(self._fit_thread)
+        
+        self._fit_worker.finished.connect(self._fit_thread.quit)
+        self._fit_worker.finished.connect(self.view.updateProgressClose)
+        self._fit_worker.fitted.connect(callback)
+        
+        self._fit_thread.started.connect(self._fit_worker.run)
+        self._fit_thread.started.connect(lambda: self.pauseErrorDisplay(True))
+        self._fit_thread.finished.connect(self._fit_worker.deleteLater)
+        self._fit_thread.finished.connect(lambda: self.pauseErrorDisplay(False))
+        
+        # set the progress events
+        self.view.setProgressParent(parent)
+        self.view.showProgress('Fitting data points', self._fit_worker.stop)
+        self._fit_worker.loadingStart.connect(self.view.updateProgressStart)
+        self._fit_worker.loadingProgress.connect(self.view.updateProgress)
+        self._fit_worker.loadingEnd.connect(self.view.updateProgressEnd)
+        
+        # start fitting
+        self._fit_thread.start()
+    
+    def getFitProcesses(self):
+        """Get the number of processes to fit the datapoints of a file in, this
+        is set in the preferences
+        
+        Returns
+        -------
+            int
+                The number of processes, 0 for one process per cpu
+        """
+        
+        preferences = QtCore.QSettings(Constants.COMPANY, Constants.NAME)
+        
+        try:
+            return int(preferences.value(Constants.FIT_PROCESSES_PREFERENCE, 
+                                         Constants.FIT_PROCESSES))
+        except (TypeError, ValueError):
+            return Constants.FIT_PROCESSES
+    
+    def getBackgroundSubtractionMode(self):
+        """Get how the background voltages are matched to the sample voltages 
+        when the background is subtracted, this is set in the preferences
+        
+        Returns
+        -------
+            String
+                The index 1 of one of the Constants.BACKGROUND_SUBTRACTION_MODES
+        """
+        
+        preferences = QtCore.QSettings(Constants.COMPANY, Constants.NAME)
+        
+        mode = preferences.value(Constants.BACKGROUND_SUBTRACTION_MODE_PREFERENCE,
+                                 Constants.BACKGROUND_SUBTRACTION_MODE)
+        
+        if mode in [m[1] for m in Constants.BACKGROUND_SUBTRACTION_MODES]:
+            return mode
+        else:
+            return Constants.BACKGROUND_SUBTRACTION_MODE
+    
+    def isLazyFitting(self):
+        """Get whether the datapoints of the opened files are fitted when they
+        are requested only, this is set in the preferences
+        
+        Returns
+        -------
+            boolean
+                Whether to use the lazy fitting
+        """
+        
+        preferences = QtCore.QSettings(Constants.COMPANY, Constants.NAME)
+        
+        return preferences.value(Constants.FIT_LAZY_PREFERENCE, Constants.FIT_LAZY, 
+                                 type=bool)
+    
     def addDataContainer(self, datacontainer):
         """Add the given datacontainer to the view. This is used in the file
         open method 
@@ -179,7 +299,7 @@ class Controller(QtCore.QObject):
         else:
             return False
     
-    def subtractBackgroundData(self, datacontainer, background_datacontainer, extend_mode = None, indices_list = None):
+    def subtractBackgroundData(self, datacontainer, background_datacontainer, extend_mode = None, indices_list = None, subtraction_mode = None):
         """Subtract the backgrdound_datacontainer from the datacontainer. The actual
         subtracting will be done in the DataPoint
         
@@ -190,6 +310,10 @@ class Controller(QtCore.QObject):
                 background data should be subtracted from
             background_datacontainer: DataContainer
                 The datacontainer which holds the background data
+            subtraction_mode : String, optional
+                The index 1 of one of the Constants.BACKGROUND_SUBTRACTION_MODES,
+                if not given the Controller.getBackgroundSubtractionMode() is 
+                used
                 
         Returns
         -------
@@ -212,36 +336,14 @@ class Controller(QtCore.QObject):
                 errors = []
                 
                 if len(datacontainer.datapoints) != len(background_datacontainer.datapoints):
-                    # get the extend type
-                    extend_keys = [i[1] for i in Constants.BACKGROUND_INCREASE_MODES]
-                    
-                    if extend_mode == None or extend_mode not in extend_keys:
-                        extend_mode = extend_keys[0]
-                    
                     if not isinstance(indices_list, (list, tuple)):
                         indices_list = self.zipFullRange(background_datacontainer.datapoints)
                     
-                    # prepare the plain
-                    data = []
-                    for datapoint in datacontainer.datapoints:
-                        data.append(datapoint.getPlotData(
-                                DataHandling.DataPoint.DataPoint.RAW_POSITION,
-                                DataHandling.DataPoint.DataPoint.RAW_VOLTAGE,
-                                True))
-                    
-                    # prepare the background data
-                    background = []
-                    for datapoint in background_datacontainer.datapoints:
-                        background.append(datapoint.getPlotData(
-                                DataHandling.DataPoint.DataPoint.RAW_POSITION,
-                                DataHandling.DataPoint.DataPoint.RAW_VOLTAGE,
-                                True))
-                    
                     try:
                         # get the processed (extended) background data
-                        background_data = DataHandling.calculation.extendBackgroundData(
-                                data, background, extend_mode, indices_list, 
-                                datacontainer, background_datacontainer)
+                        background_data = DataHandling.calculation.extendBackgroundDataContainer(
+                                datacontainer, background_datacontainer, extend_mode, 
+                                indices_list)
                     except Exception as e:
                         error_loc = ""
                         
@@ -258,29 +360,18 @@ class Controller(QtCore.QObject):
                                          traceback.tb_lineno)
         
                         errors.append(type(e).__name__ + ": " + str(e) + error_loc)
+                        
+                        # there is no background for the datapoints
+                        background_data = []
                 else:
                     background_data = background_datacontainer
                 
-                with warnings.catch_warnings(record=True) as ws:
-                    # go through all the datapoints of the original data
-                    for index, datapoint in enumerate(new_datacontainer.datapoints):
-                        print("Controller.subtractBackgroundData(): index: ", index)
-                        # perform the background removing
-                        try:
-                            new_datacontainer.datapoints[index].index = index
-                            new_datacontainer.datapoints[index].removeBackgroundData(
-                                    self._getBackgroundDataPoint(background_data, index))
-                        except Exception as e:
-                            errors.append("Datapoint #{} raised Error: ".format(index) + str(e))
-                    
-                        # fit the datapoint again
-                        try:
-                            new_datacontainer.datapoints[index].execFit()
-                        except Exception as e:
-                            errors.append("Datapoint #{} raised Error: ".format(index) + str(e))
-                        
-                        for w in ws:
-                            w.index = index
+                # perform the background removing and fit the datapoints again
+                if subtraction_mode == None:
+                    subtraction_mode = self.getBackgroundSubtractionMode()
+                
+                errors += DataHandling.calculation.removeBackgroundDataPoints(
+                        new_datacontainer, background_data, subtraction_mode)
     
                 for error in errors:
                     if isinstance(error, warnings.WarningMessage):
@@ -300,6 +391,172 @@ class Controller(QtCore.QObject):
         
         return None
     
+    def subtractBackgroundDataBatch(self, datacontainers, background_datacontainers, measurement_type, callback = None, processes = None, subtraction_mode = None, interpolate = False):
+        """Subtract the background from each of the datacontainers like the 
+        Controller.subtractBackgroundData() does, if interpolate is True a new
+        background is created for each datacontainer by interpolating the 
+        background datacontainer before. Then the background is subtracted 
+        and the datapoints are fitted again. If the datacontainers have at 
+        least Constants.BACKGROUND_BATCH_PARALLEL_MINIMUM_DATAPOINTS datapoints
+        together they are processed in a pool of processes, the callback is 
+        executed in the calling thread each time a datacontainer is finished.
+        
+        Raises
+        ------
+            ValueError
+                If the number of background datacontainers is neither one nor
+                the number of datacontainers
+        
+        Parameters
+        ----------
+            datacontainers : list of DataContainer
+                The datacontainers which contain the original data where the
+                background data should be subtracted from
+            background_datacontainers : DataContainer or list of DataContainer
+                The background for all the datacontainers or one background 
+                for each datacontainer
+            measurement_type : String
+                The environment variable which tells which measurement type 
+                this is
+            callback : function, optional
+                The function to execute when a datacontainer is finished, it 
+                gets the index of the datacontainer and the new datacontainer
+                or None if the background could not be subtracted
+            processes : int, optional
+                The number of processes to use, 1 uses the current process, 0
+                uses one process per cpu, if None the Controller.getFitProcesses()
+                is used
+            subtraction_mode : String, optional
+                The index 1 of one of the Constants.BACKGROUND_SUBTRACTION_MODES,
+                if not given the Controller.getBackgroundSubtractionMode() is 
+                used
+            interpolate : boolean, optional
+                Whether to interpolate the background for each datacontainer
+        
+        Returns
+        -------
+            list of DataContainer
+                The new datacontainers with the subtracted background, None 
+                for each datacontainer where the background could not be 
+                subtracted
+        """
+        
+        datacontainers = list(datacontainers)
+        
+        if isinstance(background_datacontainers, DataHandling.DataContainer.DataContainer):
+            background_datacontainers = [background_datacontainers]
+        else:
+            background_datacontainers = list(background_datacontainers)
+        
+        if len(background_datacontainers) == 1:
+            background_indices = [0] * len(datacontainers)
+        elif len(background_datacontainers) == len(datacontainers):
+            background_indices = list(range(len(datacontainers)))
+        else:
+            raise ValueError(("There are {} backgrounds for {} measurements, use " + 
+                              "one background or one background for each " + 
+                              "measurement").format(len(background_datacontainers),
+                                                    len(datacontainers)))
+        
+        if processes == None:
+            processes = self.getFitProcesses()
+        if processes == None or processes <= 0:
+            processes = os.cpu_count()
+        
+        processes = min(processes, len(datacontainers))
+        
+        # the processes do not know the preferences
+        if subtraction_mode == None:
+            subtraction_mode = self.getBackgroundSubtractionMode()
+        
+        if (sum(len(datacontainer.datapoints) for datacontainer in datacontainers) < 
+            Constants.BACKGROUND_BATCH_PARALLEL_MINIMUM_DATAPOINTS):
+            processes = 1
+        
+        results = [None] * len(datacontainers)
+        
+        def finish(index, result):
+            """Set the original data and the background data to the result and
+            execute the callback"""
+            
+            datacontainer = datacontainers[index]
+            
+            if isinstance(result, Exception):
+                warnings.warn("The background of {} could not be subtracted: {}".format(
+                        os.path.basename(str(datacontainer.filepath)), result))
+            else:
+                new_datacontainer, background, errors = result
+                
+                # the background is not sent back if it is not interpolated
+                if background == None:
+                    background = background_datacontainers[background_indices[index]]
+                
+                new_datacontainer.setData(DataHandling.DataContainer.DataContainer.ORIGINAL_DATA, datacontainer)
+                new_datacontainer.setData(DataHandling.DataContainer.DataContainer.BACKGROUND_DATA, background)
+                
+                for error in errors:
+                    warnings.warn("{} in {}".format(error, os.path.basename(
+                            str(datacontainer.filepath))))
+                
+                results[index] = new_datacontainer
+            
+            if callable(callback):
+                callback(index, results[index])
+        
+        if processes <= 1:
+            DataHandling.calculation.initBackgroundSubtractionBatch(background_datacontainers)
+            
+            try:
+                for index, datacontainer in enumerate(datacontainers):
+                    try:
+                        result = DataHandling.calculation.subtractBackgroundBatchItem(
+                                datacontainer, background_indices[index], measurement_type,
+                                subtraction_mode, interpolate)
+                    except Exception as e:
+                        result = e
+                    
+                    finish(index, result)
+            finally:
+                # do not keep the backgrounds in this process
+                DataHandling.calculation.initBackgroundSubtractionBatch([])
+            
+            return results
+        
+        # spawn new processes, forking the process with the running Qt 
+        # application is not safe, the backgrounds are sent to each process
+        # once
+        context = multiprocessing.get_context("spawn")
+        executor = concurrent.futures.ProcessPoolExecutor(
+                processes, mp_context=context, 
+                initializer=DataHandling.calculation.initBackgroundSubtractionBatch,
+                initargs=(background_datacontainers, ))
+        
+        futures = {}
+        
+        try:
+            for index, datacontainer in enumerate(datacontainers):
+                future = executor.submit(DataHandling.calculation.subtractBackgroundBatchItem,
+                                         datacontainer, background_indices[index], 
+                                         measurement_type, subtraction_mode, interpolate)
+                futures[future] = index
+            
+            # the results are handled in the order they are finished
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = e
+                
+                finish(futures[future], result)
+        finally:
+            # the shutdown() supports the cancel_futures since python 3.9 only
+            for future in futures:
+                future.cancel()
+            
+            executor.shutdown()
+        
+        return results
+    
     def _getBackgroundDataPoint(self, background_datacontainer, index):
         """Get the datapoint of the background_datacontainer at the given 
         index
@@ -449,10 +706,11 @@ class Controller(QtCore.QObject):
     
     
     def uniqueListThreshold(self, list_data, threshold):
-        """Removes all the list elements in the list_data that are the same.
-        This supports only numeric lists. The threshold can be a numeric value
+        """Group the list elements in the list_data that are the same. This 
+        supports only numeric lists. The threshold can be a numeric value
         which defines how much the list_datas elements can differ form the others
-        and still count as the "same value"
+        and still count as the "same value", the groups are found by the
+        DataHandling.calculation.clusterThreshold()
         
         Parameters
         ----------
@@ -463,34 +721,13 @@ class Controller(QtCore.QObject):
                 
         Returns
         -------
-            list
-                A list with removed duplicates
+            array of int
+                The index of the group of each element in the list_data
+            array of float
+                The representative value of each group
         """
         
-        # prepare variables
-        uniques = []
-        full_list = {}
-        
-        # go through each list element
-        for x in list_data:
-            # tells whether the element has been found or not
-            found = False
-            
-            # go through the existing elements in the uniques list
-            for u in uniques:
-                # check if the current list_datas element is in the range
-                # of the current unique value
-                if u - threshold < x and u + threshold > x:
-                    found = True
-                    full_list[u].append(x)
-                    break;
-            
-            # if the element is not in the uniques add it as a new unique
-            if not found:
-                full_list[x] = [x]
-                uniques.append(x)
-        
-        return uniques, full_list
+        return DataHandling.calculation.clusterThreshold(list_data, threshold)
     
     def createNewBackground(self, datacontainer, background_datacontainer, measurement_type, filepath = None):
         """Create a new background for the given datacontainer file by intermpolating
@@ -557,6 +794,88 @@ class Controller(QtCore.QObject):
             return datacontainer
         else:
             return None
+    
+    def followDataContainer(self, datacontainer, follow = True):
+        """Follow the raw file of the given datacontainer. The followed files 
+        are checked every Constants.RAW_FILE_FOLLOW_INTERVAL ms, the lines that
+        have been appended (by the MPMS) are read and the new datapoints are 
+        fitted. The DataContainer.dataAppended signal is emitted then.
+        
+        Parameters
+        ----------
+            datacontainer : DataContainer
+                The datacontainer to follow
+            follow : boolean, optional
+                Whether to follow the file or to stop following it
+        
+        Returns
+        -------
+            boolean
+                success
+        """
+        
+        if not isinstance(datacontainer, DataHandling.DataContainer.DataContainer):
+            return False
+        
+        if follow and datacontainer not in self._followed_datacontainers:
+            self._followed_datacontainers.append(datacontainer)
+        elif not follow and datacontainer in self._followed_datacontainers:
+            self._followed_datacontainers.remove(datacontainer)
+        
+        if len(self._followed_datacontainers) > 0 and not self._follow_timer.isActive():
+            self._follow_timer.start(Constants.RAW_FILE_FOLLOW_INTERVAL)
+        elif len(self._followed_datacontainers) == 0:
+            self._follow_timer.stop()
+        
+        return True
+    
+    def setFollowFiles(self, follow):
+        """Set whether to follow the raw files of all the opened 
+        datacontainers and of the datacontainers that will be opened
+        
+        Parameters
+        ----------
+            follow : boolean
+                Whether to follow the files
+        """
+        
+        self.follow_files = (follow == True)
+        
+        if self.follow_files:
+            for datacontainer in self._datacontainer:
+                self.followDataContainer(datacontainer, True)
+        else:
+            for datacontainer in list(self._followed_datacontainers):
+                self.followDataContainer(datacontainer, False)
+    
+    def _followOpenedDataContainer(self, datacontainer):
+        """Follow the opened datacontainer if the files should be followed
+        
+        Parameters
+        ----------
+            datacontainer : DataContainer
+                The opened datacontainer
+        """
+        
+        if self.follow_files:
+            self.followDataContainer(datacontainer, True)
+    
+    def _readFollowedFiles(self):
+        """Read the appended data of all the followed files"""
+        
+        for datacontainer in list(self._followed_datacontainers):
+            try:
+                datacontainer.readAppendedData()
+            except (ValueError, IOError) as e:
+                # the file cannot be followed anymore
+                self.followDataContainer(datacontainer, False)
+                self.error("The file {} cannot be followed: {}".format(
+                        os.path.basename(datacontainer.filepath), str(e)), 
+                        Constants.NOTICE_ERROR)
+            except Exception as e:
+                self.error("Not all the appended datapoints of the file {} could be fitted".format(
+                        os.path.basename(datacontainer.filepath)), 
+                        Constants.NOTICE, str(e))
         
     def log(self, message, log_type = Constants.LOG_CONSOLE):
         """Log the given message. There are (currently) 3 different log_type, they are
@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 15:48:12 2026
+
+@author: miile7
+"""
+
+import numpy as np
+
+import DataHandling.parsing
+import my_utilities
+
+class DatFileTable:
+    def __init__(self, filepath):
+        """Read the *.dat file and save its contents column wise. The file is
+        read only once, all the values are taken from the table afterwards.
+        Compressed files (.gz, .xz or .bz2) are decompressed while reading.
+        
+        Raises
+        ------
+            IOError
+                If the file could not be read
+        
+        Parameters
+        ----------
+            filepath : String
+                The path of the *.dat file
+        """
+        
+        # the path of the file
+        self._filepath = filepath
+        # the (stripped) lines before the data rows, this is the header and
+        # the column names
+        self._header_lines = []
+        # the names of the columns, this is the line after the [Data] line
+        self._column_names = []
+        # the values of the data rows as strings, the index is the column, the
+        # rows that are too short for a column contain None
+        self._columns = []
+        # the number of values in each row, the rows may have different lengths
+        self._lengths = np.empty(0, dtype=int)
+        # the columns converted to floats, they are created when they are
+        # requested the first time
+        self._float_columns = {}
+        
+        self._read()
+    
+    @property
+    def filepath(self):
+        """Get the path of the *.dat file"""
+        return self._filepath
+    
+    @property
+    def header_lines(self):
+        """Get the stripped lines before the data rows"""
+        return self._header_lines
+    
+    @property
+    def column_names(self):
+        """Get the names of the columns as they are in the file"""
+        return self._column_names
+    
+    def _read(self):
+        """Read the file and fill the columns"""
+        
+        # compressed files are decompressed while reading
+        file = DataHandling.parsing.openFile(self._filepath, "r")
+        
+        try:
+            # the data line when to read data
+            read_data_line = -1
+            
+            rows = []
+            for linenumber, line in enumerate(file, 1):
+                # remove whitespace
+                line = line.strip()
+                
+                # wait until data is acutally there
+                if line.lower() == "[data]":
+                    # skip next line too, this holds the names of the data
+                    read_data_line = linenumber + 2
+                elif read_data_line >= 0 and linenumber >= read_data_line:
+                    rows.append(line.split(","))
+                    continue
+                elif read_data_line >= 0 and linenumber == read_data_line - 1:
+                    self._column_names = line.split(",")
+                
+                if len(rows) == 0:
+                    self._header_lines.append(line)
+        finally:
+            file.close()
+        
+        self._lengths = np.array([len(row) for row in rows], dtype=int)
+        
+        if len(rows) > 0:
+            column_count = int(np.max(self._lengths))
+        else:
+            column_count = 0
+        
+        self._columns = [[row[c] if c < len(row) else None for row in rows]
+                         for c in range(column_count)]
+    
+    def __len__(self):
+        """Get the number of data rows
+        
+        Returns
+        -------
+            int
+                The number of rows
+        """
+        
+        return len(self._lengths)
+    
+    def getColumnCount(self):
+        """Get the number of columns, this is the length of the longest row
+        
+        Returns
+        -------
+            int
+                The number of columns
+        """
+        
+        return len(self._columns)
+    
+    def getColumnIndex(self, name):
+        """Get the index of the column with the given name. The name can be
+        the complete name as it is in the file or the name without the unit
+        
+        Parameters
+        ----------
+            name : String
+                The name of the column
+        
+        Returns
+        -------
+            int or None
+                The index or None if there is no column with this name
+        """
+        
+        for index, column_name in enumerate(self._column_names):
+            if column_name == name or column_name.rsplit(" (", 1)[0] == name:
+                return index
+        
+        return None
+    
+    def getColumn(self, column):
+        """Get the values of the given column as floats. Empty values, values
+        that are not numeric and rows that are too short are NaN
+        
+        Parameters
+        ----------
+            column : int or String
+                The index or the name of the column
+        
+        Returns
+        -------
+            array of float
+                The values of the column for each row
+        """
+        
+        index = self._getIndex(column)
+        
+        if index == None or index >= len(self._columns):
+            return np.full(len(self), np.nan)
+        
+        if index not in self._float_columns:
+            values = np.full(len(self), np.nan)
+            
+            for i, value in enumerate(self._columns[index]):
+                if value != None and value != "":
+                    try:
+                        values[i] = float(value)
+                    except ValueError:
+                        pass
+            
+            self._float_columns[index] = values
+        
+        return self._float_columns[index]
+    
+    def getStringColumn(self, column):
+        """Get the values of the given column as they are in the file
+        
+        Parameters
+        ----------
+            column : int or String
+                The index or the name of the column
+        
+        Returns
+        -------
+            list of String
+                The values of the column, None if the row is too short
+        """
+        
+        index = self._getIndex(column)
+        
+        if index == None or index >= len(self._columns):
+            return [None] * len(self)
+        
+        return list(self._columns[index])
+    
+    def getRow(self, index):
+        """Get the values of the row with the given index as strings
+        
+        Parameters
+        ----------
+            index : int
+                The index of the row
+        
+        Returns
+        -------
+            list of String
+                All the values of the row
+        """
+        
+        return [self._columns[c][index] for c in range(self._lengths[index])]
+    
+    def getData(self, data_index = None):
+        """Get the values of the data rows, this returns the same as the
+        DataContainer.readDatFileData() did before the table was used.
+        
+        If the data_index is an int the value of this column is returned for
+        each row (if the row is too short the complete row is returned), if the
+        data_index is a list the values of each index are returned for each
+        row, otherwise the complete rows are returned
+        
+        Parameters
+        ----------
+            data_index : int or list of ints, optional
+                The index/indices of the data to return
+        
+        Returns
+        -------
+            list of String or list of lists of String
+                The values of the data rows
+        """
+        
+        if my_utilities.is_numeric(data_index) and data_index >= 0:
+            column = self.getStringColumn(data_index)
+            
+            return [value if value != None else self.getRow(i)
+                    for i, value in enumerate(column)]
+        elif data_index != None and isinstance(data_index, (tuple, list)):
+            return [[self._columns[c][i] for c in data_index
+                     if my_utilities.is_numeric(c) and c >= 0 and c < length]
+                    for i, length in enumerate(self._lengths)]
+        else:
+            return [self.getRow(i) for i in range(len(self))]
+    
+    def _getIndex(self, column):
+        """Get the index of the column
+        
+        Parameters
+        ----------
+            column : int or String
+                The index or the name of the column
+        
+        Returns
+        -------
+            int or None
+                The index
+        """
+        
+        if isinstance(column, str):
+            return self.getColumnIndex(column)
+        else:
+            return column
\ No newline at end of file
@@ -6,15 +6,25 @@ Created on Mon Oct 16 13:47:23 2017
 """
 
 from PyQt5 import QtCore
+import concurrent.futures
+import multiprocessing
 import datetime
 import warnings
 import time
+import locale
+import mmap
 import copy
 import os
 
+import numpy as np
+
 import Constants
 import DataHandling.DataPoint
 import DataHandling.PlotData
+import DataHandling.calculation
+import DataHandling.DatFileTable
+import DataHandling.ParseCache
+import DataHandling.parsing
 import my_utilities
 
 class DataContainer(QtCore.QObject):
@@ -34,12 +44,18 @@ class DataContainer(QtCore.QObject):
     FREE_FIT = "free fit"
     FREE_FIT_ERROR = "free fit error"
     
+    # the axes whose values are the fit results of the datapoints
+    FIT_AXES = (MAGNETIZATION, MAGNETIZATION_ERROR, FREE_FIT, FREE_FIT_ERROR)
+    
     ORIGINAL_DATA = "original data"
     BACKGROUND_DATA = "background data"
     
     loadingStart = QtCore.pyqtSignal(int, str, str)
     loadingProgress = QtCore.pyqtSignal(int, str, str)
     loadingEnd = QtCore.pyqtSignal(bool, str, str)
+    # the datacontainer and the indices of the datapoints that have been
+    # appended (or completed) by the DataContainer.readAppendedData()
+    dataAppended = QtCore.pyqtSignal(QtCore.QObject, list)
     
     def __init__(self, filepath, dat_filepath = None):
         """Initialize the DataReader.
@@ -69,6 +85,10 @@ class DataContainer(QtCore.QObject):
         # save filepath for *.dat file
         self._dat_filepath = dat_filepath
         
+        # the contents of the *.dat file, this is created when it is used the
+        # first time
+        self._dat_table = None
+        
         # save some custom data
         self._data = {}
         
@@ -80,6 +100,32 @@ class DataContainer(QtCore.QObject):
         
         self.removed_background = False
         self.fitting_not_possible = False
+        
+        # whether the datapoints are fitted only when their fit results are 
+        # requested, see DataContainer.fitDataPointsForAxes()
+        self.lazy_fitting = False
+        
+        # whether the data and the fit results are saved in the parse cache
+        # and whether the data has been loaded from the cache
+        self._use_cache = False
+        self._loaded_from_cache = False
+        
+        # the state of the parser after reading the file, this is used to
+        # parse the lines that are appended to the file later
+        self._tail_state = None
+        
+        # the values of all datapoints for each axis that has been used, see
+        # DataContainer._getSummary()
+        self._summary = {}
+        # the datapoints and their modification counts when the summary has
+        # been created, the summary is outdated if they have changed
+        self._summary_state = None
+        
+        # the interpolation ranges for each measurement type if this 
+        # datacontainer is used as the background and the datapoints and 
+        # their modification counts when they have been created, see 
+        # DataContainer.getInterpolationRanges()
+        self._interpolation_ranges = {}
     
     @property
     def filepath(self):
@@ -90,14 +136,46 @@ class DataContainer(QtCore.QObject):
     def filepath(self, filepath):
         """Prevent from chaning the filepath, this will do nothing"""
         self._filepath = filepath
+    
+    @property
+    def dat_filepath(self):
+        """Get the filepath of the *.dat file or None if there is no *.dat file"""
+        return self._dat_filepath
             
-    def readFileData(self, replace_values = None):
+    def readFileData(self, replace_values = None, bulk_parsing = None, lazy_loading = None, 
+                     use_cache = None):
         """Read the data of the file to the internal buffer. The replace_values
         can be a list with a dict in each index, this dict will replace the 
         environment variables.
         Note that the DataContainer contains 2 times the datapoints as the normal
         SQUID program, the up- and down-sweep are divided in two datapoints
         
+        If bulk_parsing is True the file is read in chunks and the data rows of
+        each datapoint are parsed at once by the 
+        DataHandling.parsing.parseDataBlock() function, otherwise each line is 
+        parsed on its own. The result is the same.
+        
+        If lazy_loading is True (this needs the bulk_parsing) only the byte 
+        offsets of the data rows are saved, the rows are loaded from the file 
+        when the datapoint uses them the first time. This makes opening big 
+        files a lot faster and uses less memory as long as the datapoints are 
+        not fitted. The file must not change while it is opened.
+        
+        If use_cache is True and there are no replace_values the data is 
+        loaded from the DataHandling.ParseCache if the file has been opened 
+        before. Then the file is not parsed and the fit results are loaded 
+        too, the DataContainer.fitDataPoints() will not fit again. The 
+        warnings of the parsing are not shown again if the data comes from the
+        cache.
+        
+        The state of the parser is saved after reading, the lines that are 
+        appended to the file later (while the MPMS is still measuring) can be
+        read with the DataContainer.readAppendedData().
+        
+        Files compressed with gzip, xz or bz2 (with the extension .gz, .xz or 
+        .bz2) are decompressed while reading. They cannot be loaded lazily and
+        they cannot be followed.
+        
         Raises
         ------
             IOError
@@ -110,6 +188,167 @@ class DataContainer(QtCore.QObject):
         ----------
             replace_values : list of dicts, optional
                 The environmnet variables for each datapoint index to replace
+            bulk_parsing : boolean, optional
+                Whether to parse the data rows block wise, if not given the
+                Constants.RAW_FILE_BULK_PARSING is used
+            lazy_loading : boolean, optional
+                Whether to load the data rows only when they are used, if not 
+                given the Constants.RAW_FILE_LAZY_LOADING is used
+            use_cache : boolean, optional
+                Whether to use the parse cache, if not given the
+                Constants.PARSE_CACHE is used
+        """
+        
+        if bulk_parsing == None:
+            bulk_parsing = Constants.RAW_FILE_BULK_PARSING
+        
+        if lazy_loading == None:
+            lazy_loading = Constants.RAW_FILE_LAZY_LOADING
+        
+        if use_cache == None:
+            use_cache = Constants.PARSE_CACHE
+        
+        # the cache does not know the replaced values
+        self._use_cache = use_cache and (replace_values == None or len(replace_values) == 0)
+        self._loaded_from_cache = False
+        self._tail_state = None
+        
+        if self._use_cache and DataHandling.ParseCache.getDefaultCache().load(self):
+            # the file has been opened before and it has not changed
+            self._loaded_from_cache = True
+            
+            self.loadingStart.emit(1, "loading", self._filepath)
+            self.loadingEnd.emit(True, "loading", self._filepath)
+            return
+        
+        replace_values, replace_squid_length = self._createReplaceValues(replace_values)
+        
+        try:
+            # open the file in binary mode, the lines are decoded one by one so
+            # the number of read bytes is known exactly, this is used for the
+            # progress
+            raw_file = open(self._filepath, "rb")
+            
+            # compressed files are decompressed while reading, the progress
+            # is measured in the bytes of the compressed file then
+            compressed = DataHandling.parsing.isCompressed(self._filepath)
+            file = DataHandling.parsing.openDecompressed(raw_file, self._filepath)
+            
+            # check if file could have been loaded
+            if file != None:
+                # set mode, 1 = header, 2 = data
+                mode = None
+                
+                # save linenumber for debuggin purposes
+                linenumber = 0
+                
+                # the number of bytes that have been read
+                position = 0
+                
+                # the encoding that open() would use in text mode
+                encoding = locale.getpreferredencoding(False)
+                
+                # emit signal for start, the file is streamed so the progress
+                # is measured in bytes
+                self.loadingStart.emit(self._progressBytes(os.path.getsize(self._filepath)), 
+                                       "loading", self._filepath)
+                
+                if compressed:
+                    progress_file = raw_file
+                else:
+                    progress_file = None
+                
+                if bulk_parsing:
+                    if lazy_loading and not compressed:
+                        # the datapoints load their rows from the file later
+                        lazy_source = (os.path.abspath(self._filepath), encoding, 
+                                       DataHandling.parsing.getFileState(self._filepath))
+                    else:
+                        lazy_source = None
+                    
+                    # read the file in chunks, the data rows are parsed block
+                    # wise
+                    mode, linenumber, position = self._readRawFileChunks(
+                            file, mode, linenumber, position, encoding, replace_values,
+                            lazy_source, False, progress_file)
+                else:
+                    # go through each line of the data, the file is iterated line 
+                    # by line so it is never completely in the memory
+                    for line in file:
+                        # refresh line number and position
+                        linenumber += 1
+                        position += len(line)
+                        
+                        # remove whitespace
+                        line = line.decode(encoding).strip()
+                        
+                        mode = self._parseRawFileLine(line, linenumber, mode, replace_values)
+                        
+                        # emit signal for progress, only emit every 5000 lines, otherwise
+                        # this is too fast
+                        if linenumber % 5000 == 0:
+                            self.loadingProgress.emit(
+                                    self._progressBytes(position if not compressed else raw_file.tell()), 
+                                    "loading", self._filepath)
+            else:
+                # file could not be opened, file == None
+                raise IOError("File {0} could not be opened".format(self._filepath))
+            
+            # check if the last line is complete, the file may be still 
+            # written by the MPMS
+            incomplete_line = False
+            if position > 0 and not compressed:
+                file.seek(position - 1)
+                incomplete_line = file.read(1) != b"\n"
+            
+            # close file connection
+            file.close()
+            raw_file.close()
+            
+            # save the state of the parser, this is used to read the lines 
+            # that are appended to the file later, the last datapoint may 
+            # still be incomplete, compressed files are archives that are not
+            # written by the MPMS anymore
+            if compressed:
+                self._tail_state = None
+            else:
+                self._tail_state = {
+                    "mode": mode,
+                    "linenumber": linenumber,
+                    "position": position,
+                    "encoding": encoding,
+                    "incomplete line": incomplete_line,
+                    "completed datapoints": max(len(self.datapoints) - 1, 0),
+                    "replace values": replace_values
+                }
+            
+            if replace_squid_length >= 0 and 2 * replace_squid_length < len(self.datapoints):
+                warnings.warn(("The *.dat file has been read successfully but the " + 
+                              "it contains {d} datapoints whilst the raw file (*.rw.dat) " + 
+                              "file holds {r} datapoints ({r} up and {r} down sweeps).").format(
+                                      d=replace_squid_length, r=len(self.datapoints) // 2))
+            
+            # emit signal for end of loading
+            self.loadingEnd.emit(True, "loading", self._filepath)
+        except IOError:
+            raise
+    
+    def _createReplaceValues(self, replace_values):
+        """Create the list of the environment variables to replace for each
+        datapoint index. If there is a *.dat file the squid ranges of the 
+        *.dat file are added to the given replace_values
+        
+        Parameters
+        ----------
+            replace_values : list of dicts or None
+                The environmnet variables for each datapoint index to replace
+        
+        Returns
+        -------
+            tuple
+                The list of dicts to replace at index 0, the number of 
+                datapoints in the *.dat file at index 1 (-1 if there is no 
+                *.dat file)
         """
         
         # check if there are custom values to replace
@@ -141,252 +380,520 @@ class DataContainer(QtCore.QObject):
             self.header["dat file"] =  self._dat_filepath
             self.header["dat file datapoints"] = "{0} points ({0} Up, {0} Down)".format(replace_squid_length)
         
+        return replace_values, replace_squid_length
+    
+    def readAppendedData(self, fit = True):
+        """Read the lines that have been appended to the raw file since it has
+        been read by the DataContainer.readFileData() (or since the last call
+        of this function). This is used to follow files that are still written
+        by the MPMS. The file is parsed from the last position with the saved
+        parser state, an incomplete last line is read the next time.
+        
+        The last datapoint may still get rows, so a datapoint is completed if
+        the environment variables of the next datapoint have been read. The
+        completed datapoints are fitted (if fit is True and the lazy fitting is
+        not used) and the DataContainer.dataAppended signal is emitted with 
+        their indices.
+        
+        Raises
+        ------
+            ValueError
+                If the file has not been read by this DataContainer or if it is
+                compressed
+            IOError
+                If the file cannot be read or if it has been truncated
+            Exception
+                If at least one datapoint could not be fitted
+        
+        Warnings
+        --------
+            UserWarning
+        
+        Parameters
+        ----------
+            fit : boolean, optional
+                Whether to fit the completed datapoints
+        
+        Returns
+        -------
+            list of int
+                The indices of the completed datapoints
+        """
+        
+        if self._tail_state == None:
+            raise ValueError(("The file {} has not been read by this " +
+                              "DataContainer or it is compressed, the appended " +
+                              "data cannot be read").format(self._filepath))
+        
+        state = self._tail_state
+        file_state = DataHandling.parsing.getFileState(self._filepath)
+        
+        if file_state[0] < state["position"]:
+            raise IOError(("The file {} has been truncated since it has been " +
+                           "read").format(self._filepath))
+        elif file_state[0] == state["position"]:
+            return []
+        
+        if "replace values" not in state:
+            # the data has been loaded from the cache
+            state["replace values"] = self._createReplaceValues(None)[0]
+        
+        # the file is only appended so the offsets of the lazy blocks are
+        # still valid
+        for datapoint in self.datapoints:
+            datapoint.updateLazyFileState(file_state)
+        
+        file = open(self._filepath, "rb")
+        
         try:
-            # open files
-            file = open(self._filepath, "r")
+            if state["incomplete line"]:
+                # the last line was not complete when the file was read, it has
+                # been parsed already so the last datapoint is parsed again
+                self._rewindTailState(file)
             
-            # check if file could have been loaded
-            if file != None:
-                # set mode, 1 = header, 2 = data
-                mode = None
-                
-                # save linenumber for debuggin purposes
-                linenumber = 0
+            file.seek(state["position"])
+            
+            mode, linenumber, position = self._readRawFileChunks(
+                    file, state["mode"], state["linenumber"], state["position"], 
+                    state["encoding"], state["replace values"], None, True)
+        finally:
+            file.close()
+        
+        state["mode"] = mode
+        state["linenumber"] = linenumber
+        state["position"] = position
+        
+        # all datapoints except the last one are complete
+        completed = max(len(self.datapoints) - 1, state["completed datapoints"])
+        indices = list(range(state["completed datapoints"], completed))
+        state["completed datapoints"] = completed
+        
+        if len(indices) == 0:
+            return indices
+        
+        exceptions = []
+        
+        if fit and not self.lazy_fitting:
+            for index in indices:
+                try:
+                    self.datapoints[index].execFit()
+                except RuntimeError as e:
+                    exceptions.append((index, e))
+                    self.fitting_not_possible = True
+        
+        self.dataAppended.emit(self, indices)
+        
+        if len(exceptions) > 0:
+            exception_string = ""
+            for index, exception in exceptions:
+                exception_string += str(exception) + " (in datapoint #{})\n".format(index)
+            
+            raise Exception(exception_string)
+        
+        return indices
+    
+    def _rewindTailState(self, file):
+        """Remove the last datapoint and set the saved parser state to the 
+        beginning of its environment variables line. If there is no datapoint
+        all the data is removed and the parser state is set to the beginning
+        of the file. This is used if the last line of the file was incomplete
+        when it has been parsed, the lines after the new parser state are 
+        parsed again then.
+        
+        Parameters
+        ----------
+            file : file
+                The raw file opened in binary mode
+        """
+        
+        state = self._tail_state
+        state["incomplete line"] = False
+        
+        if len(self.datapoints) > 0 and len(self.datapoints[-1]._environment_variables) > 0:
+            linenumber = self.datapoints[-1]._environment_variables[0][1]
+            
+            # the environment variables line is the last line starting with
+            # ";" because the data rows start with ","
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            
+            try:
+                start = data.rfind(b"\n;", 0, state["position"]) + 1
+            finally:
+                data.close()
+            
+            if start > 0 and my_utilities.is_numeric(linenumber):
+                self.datapoints.pop()
                 
-                lines = file.readlines()
+                state["mode"] = 2
+                state["linenumber"] = linenumber - 1
+                state["position"] = start
+                state["completed datapoints"] = min(state["completed datapoints"], 
+                                                    len(self.datapoints))
+                return
+        
+        # the header is incomplete, parse the complete file again
+        self.header = {}
+        self.datapoints = []
+        self.datanames = []
+        self.dataunits = []
+        
+        state["replace values"] = self._createReplaceValues(state["replace values"])[0]
+        state["mode"] = None
+        state["linenumber"] = 0
+        state["position"] = 0
+        state["completed datapoints"] = 0
+    
+    def _progressBytes(self, byte_count):
+        """Convert the given number of bytes to the value that is emitted in the
+        loading signals. The signals only transport (32 bit) ints so the bytes
+        are emitted in kilobytes, otherwise files bigger than 2 GB would overflow
+        
+        Parameters
+        ----------
+            byte_count : int
+                The number of bytes
                 
-                # emit signal for start
-                self.loadingStart.emit(len(lines), "loading", self._filepath)
+        Returns
+        -------
+            int
+                The value to emit
+        """
+        
+        return int(byte_count // 1024)
+    
+    def _readRawFileChunks(self, file, mode, linenumber, position, encoding, replace_values, 
+                           lazy_source = None, complete_lines_only = False, 
+                           progress_file = None):
+        """Read the (rest of the) raw file in chunks of 
+        Constants.RAW_FILE_CHUNK_SIZE bytes. The header lines and the 
+        environment variable lines are parsed line by line, all the data rows
+        between two environment variable lines are parsed as one block by the
+        DataContainer._parseRawDataBlock()
+        
+        Parameters
+        ----------
+            file : file
+                The file opened in binary mode
+            mode : int or None
+                The current mode, None before the header, 1 = header, 2 = data,
+                3 = fit data
+            linenumber : int
+                The number of the last line that has been read
+            position : int
+                The number of bytes that have been read
+            encoding : String
+                The encoding of the file
+            replace_values : list of dicts
+                The environmnet variables for each datapoint index to replace
+            lazy_source : tuple, optional
+                The filepath, the encoding and the file state if the data rows
+                should be loaded lazily, for more details have a look at the
+                DataContainer._parseRawDataBlock()
+            complete_lines_only : boolean, optional
+                Whether to stop before the last line if it does not end with a
+                newline, this line may be incomplete if the file is still 
+                written
+            progress_file : file, optional
+                The file to measure the progress with, this is the compressed 
+                file if the file is decompressed while reading, if not given 
+                the position is used
+        
+        Returns
+        -------
+            tuple of int
+                The mode, the linenumber and the position after reading the file
+        """
+        
+        buffer = b""
+        end_of_file = False
+        
+        while not end_of_file:
+            chunk = file.read(Constants.RAW_FILE_CHUNK_SIZE)
+            end_of_file = len(chunk) == 0
+            buffer += chunk
+            
+            # only parse complete lines, the last line of the file may have 
+            # no newline
+            if end_of_file and not complete_lines_only:
+                end = len(buffer)
+            else:
+                end = buffer.rfind(b"\n") + 1
+            
+            # the start of the next line beginning with one of the 
+            # separators, this is cached because the sections are very rare
+            separators = {b"\n;": -1, b"\n[": -1}
+            
+            start = 0
+            while start < end:
+                if ((mode == 2 or mode == 3) and len(self.datapoints) > 0 and 
+                    buffer[start:start + 1] != b";" and buffer[start:start + 1] != b"["):
+                    # the data rows go until the next environment variable
+                    # line or the next section
+                    stop = end
+                    for separator in separators:
+                        if separators[separator] < start:
+                            index = buffer.find(separator, start, end)
+                            if index >= 0:
+                                separators[separator] = index + 1
+                            else:
+                                separators[separator] = end
+                        
+                        if separators[separator] >= start:
+                            stop = min(stop, separators[separator])
+                    
+                    block = buffer[start:stop]
+                    mode = self._parseRawDataBlock(block, linenumber + 1, mode, encoding, 
+                                                   replace_values, position, lazy_source)
+                else:
+                    # parse a single line
+                    stop = buffer.find(b"\n", start, end) + 1
+                    if stop <= 0:
+                        stop = end
+                    
+                    block = buffer[start:stop]
+                    mode = self._parseRawFileLine(block.decode(encoding).strip(), 
+                                                  linenumber + 1, mode, replace_values)
                 
-                # go through each line of the data
-                for line in lines:
-                    # refresh line number
+                linenumber += block.count(b"\n")
+                if not block.endswith(b"\n"):
+                    # the last line of the file
                     linenumber += 1
+                
+                position += len(block)
+                start = stop
+            
+            buffer = buffer[end:]
+            
+            # emit signal for progress after each chunk
+            if progress_file != None:
+                self.loadingProgress.emit(self._progressBytes(progress_file.tell()), 
+                                          "loading", self._filepath)
+            else:
+                self.loadingProgress.emit(self._progressBytes(position), "loading", 
+                                          self._filepath)
+        
+        return mode, linenumber, position
+    
+    def _parseRawDataBlock(self, block, first_linenumber, mode, encoding, replace_values, 
+                           offset = None, lazy_source = None):
+        """Parse the data rows of the current datapoint at once. If the lines
+        cannot be parsed at once (because they contain invalid lines) they 
+        will be parsed line by line.
+        
+        If the lazy_source is given and the block contains data rows and fit 
+        rows only the block is not parsed, its offset is saved in the datapoint
+        and the rows are loaded when they are used the first time
+        
+        Parameters
+        ----------
+            block : bytes
+                The data rows and fit rows of the current datapoint as they
+                are in the file
+            first_linenumber : int
+                The number of the first line in the file
+            mode : int
+                The current mode
+            encoding : String
+                The encoding of the file
+            replace_values : list of dicts
+                The environmnet variables for each datapoint index to replace,
+                this is only used if the block is parsed line by line
+            offset : int, optional
+                The byte offset of the block in the file
+            lazy_source : tuple, optional
+                The filepath, the encoding and the file state (the 
+                DataHandling.parsing.getFileState() return value) of the file
+                to load the rows from later
+        
+        Returns
+        -------
+            int
+                The mode for the next line
+        """
+        
+        if not DataHandling.parsing.isDataBlock(block):
+            # the block contains other lines, parse the lines one by one
+            lines = block.split(b"\n")
+            if block.endswith(b"\n"):
+                lines.pop()
+            
+            for i, line in enumerate(lines):
+                mode = self._parseRawFileLine(line.decode(encoding).strip(), 
+                                              first_linenumber + i, mode, replace_values)
+            
+            return mode
+        
+        dp = self._getCurrentDataPoint(False)
+        
+        if lazy_source != None and offset != None:
+            # only save where the rows are, the mode does not change because
+            # mode 2 and 3 are treated the same
+            dp.addLazyBlock(offset, len(block), first_linenumber, *lazy_source)
+            return mode
+        else:
+            return DataHandling.parsing.loadDataBlock(dp, block, first_linenumber, 
+                                                      mode, encoding)
+    
+    def _parseRawFileLine(self, line, linenumber, mode, replace_values):
+        """Parse one (stripped) line of the raw file and add its contents to the
+        header or to the datapoints. The mode is the current section of the
+        file, the new mode is returned and has to be passed to the next call
+        
+        Parameters
+        ----------
+            line : String
+                The line without leading and trailing whitespace
+            linenumber : int
+                The number of the line in the file
+            mode : int or None
+                The current mode, None before the header, 1 = header, 2 = data,
+                3 = fit data
+            replace_values : list of dicts
+                The environmnet variables for each datapoint index to replace
+                
+        Returns
+        -------
+            int or None
+                The mode for the next line
+        """
+        
+        # wait for header/data
+        if line.lower() == "[header]":
+            # set mode to header, data will now be applied to header,
+            # jump to next line
+            return 1
+        elif line.lower() == "[data]":
+            # set mode to data
+            return 2
+        
+        # analyzing header
+        if mode == 1:
+            # line starts with ; => comment
+            if line[0] == ";":
+                # create "comment" section or add a new line
+                if "comment" not in self.header:
+                    self.header["comment"] = ""
+                else:
+                    self.header["comment"] += "\n"
+                
+                if line[:2] == "; ":
+                    # remove the first two characters (which are ";" and space)
+                    self.header["comment"] += line[2::]
+                else:
+                    # remove only the first character
+                    self.header["comment"] += line[1::]
+            else:
+                # split the data by ","
+                line = line.split(",")
+                
+                # detect the key of the information
+                key = line[0].lower()
+                
+                # save the length
+                length = len(line)
+                
+                if key == "info" and length > 1:
+                    # header line contains some general information
+                    if "info" not in self.header:
+                        self.header["info"] = {}
                     
-                    # remove whitespace
-                    line = line.strip()
+                    # find name of info, info name is last element in line (always)
+                    # remaining line will be treated as value of the info
+                    self.header["info"][line[-1]] = ", ".join(line[1:-1])
+                elif key == "title" and length > 1:
+                    # header line contains the title
+                    self.header["title"] = ", ".join(line[1:])
+                elif key == "fileopentime" and length > 1:
+                    # the time when the file was opened
+                    self.header["fileopentime"] = ", ".join(line[1:])
+                elif key == "byapp" and length > 1:
+                    # the software that was used to create the file
+                    self.header["analyzingsoftware"] = ", ".join(line[1:])
+                elif key == "startupaxis" and length >= 3:
+                    # the startup of (all) the axis
+                    if "startupaxis" not in self.header:
+                        self.header["startupaxis"] = {}
                     
-                    # wait for header/data
-                    if line.lower() == "[header]":
-                        # set mode to header, data will now be applied to header,
-                        # jump to next run
-                        mode = 1
-                        continue
-                    elif line.lower() == "[data]":
-                        # set mode to data
-                        mode = 2
-                        continue
+                    if line[1] not in self.header["startupaxis"]:
+                        self.header["startupaxis"][line[1]] = []
+                        
+                    self.header["startupaxis"][line[1]].append(",".join(line[2:]))
+                elif key == "records" and length >= 4:
+                    # the software that was used to create the file
+                    if "records" not in self.header:
+                        self.header["records"] = {}
                     
-                    # analyzing header
-                    if mode == 1:
-                        # line starts with ; => comment
-                        if line[0] == ";":
-                            # create "comment" section or add a new line
-                            if "comment" not in self.header:
-                                self.header["comment"] = ""
-                            else:
-                                self.header["comment"] += "\n"
-                            
-                            if line[:2] == "; ":
-                                # remove the first two characters (which are ";" and space)
-                                self.header["comment"] += line[2::]
-                            else:
-                                # remove only the first character
-                                self.header["comment"] += line[1::]
-                        else:
-                            # split the data by ","
-                            line = line.split(",")
-                            
-                            # detect the key of the information
-                            key = line[0].lower()
-                            
-                            # save the length
-                            length = len(line)
-                            
-                            if key == "info" and length > 1:
-                                # header line contains some general information
-                                if "info" not in self.header:
-                                    self.header["info"] = {}
-                                
-                                # find name of info, info name is last element in line (always)
-                                # remaining line will be treated as value of the info
-                                self.header["info"][line[-1]] = ", ".join(line[1:-1])
-                            elif key == "title" and length > 1:
-                                # header line contains the title
-                                self.header["title"] = ", ".join(line[1:])
-                            elif key == "fileopentime" and length > 1:
-                                # the time when the file was opened
-                                self.header["fileopentime"] = ", ".join(line[1:])
-                            elif key == "byapp" and length > 1:
-                                # the software that was used to create the file
-                                self.header["analyzingsoftware"] = ", ".join(line[1:])
-                            elif key == "startupaxis" and length >= 3:
-                                # the startup of (all) the axis
-                                if "startupaxis" not in self.header:
-                                    self.header["startupaxis"] = {}
-                                
-                                if line[1] not in self.header["startupaxis"]:
-                                    self.header["startupaxis"][line[1]] = []
-                                    
-                                self.header["startupaxis"][line[1]].append(",".join(line[2:]))
-                            elif key == "records" and length >= 4:
-                                # the software that was used to create the file
-                                if "records" not in self.header:
-                                    self.header["records"] = {}
-                                
-                                self.header["records"]["from"] = line[2]
-                                self.header["records"]["to"] = line[3]
-                            else:
-                                key = line[0].lower()
-                                
-                                # unknown data, just save it
-                                if key in self.header:
-                                    if not isinstance(self.header[key], list):
-                                        self.header[key] = [self.header[key]]
-                                    
-                                    self.header[key].append(", ".join(line[1:]))
-                                else:
-                                    self.header[key] = ", ".join(line[1:])
-                                
-                    # analyzing data
-                    elif mode == 2 or mode == 3:
-                        # a comment with the environement variables, save them to the datapoint
-                        if line[0] == ";":
-                            # squid changes direction (up/down), create new datapoint
-                            dp = self._getCurrentDataPoint(True)
-                            
-                            # check out the environement variables (like temperature...)
-                            variables = line[1:].split(";")
-                            variables_dict = {}
-                            
-                            # go through each variable, split them by =, the first
-                            # param is the name, the second is the value
-                            for var in variables:
-                                elements = var.split("=")
-                                
-                                # check if splitting was successfully, save them in
-                                # the datapoint
-                                if len(elements) >= 2:
-                                    variables_dict[str(elements[0]).strip()] = str(elements[1]).strip()
-                            
-                            # the current datapoint index
-                            dp_index = len(self.datapoints) - 1
-                            
-                            if isinstance(replace_values, dict):
-                                variables_dict.update(replace_values)
-                            elif (isinstance(replace_values, list) and dp_index < len(replace_values) and 
-                                  isinstance(replace_values[dp_index], dict)):
-                                variables_dict.update(replace_values[dp_index])
-                            
-                            # append the new datapoint
-                            dp.addEnvironmentVariables(variables_dict, linenumber)
-                        elif self._getCurrentDataPoint(False) != None:
-                            # get the current data point
-                            dp = self._getCurrentDataPoint(False)
-                            
-                            # reached some actual data, the format is:
-                            # data[0]: comment
-                            # data[1]: timestamp
-                            # data[2]: raw position in [mm]
-                            # data[3]: raw voltage in [V]
-                            # data[4]: processed voltage in [V]
-                            # data[5]: fixed c fit in [V]
-                            # data[6]: free c fit in [v]
-                            data = line.split(",")
+                    self.header["records"]["from"] = line[2]
+                    self.header["records"]["to"] = line[3]
+                else:
+                    key = line[0].lower()
+                    
+                    # unknown data, just save it
+                    if key in self.header:
+                        if not isinstance(self.header[key], list):
+                            self.header[key] = [self.header[key]]
+                        
+                        self.header[key].append(", ".join(line[1:]))
+                    else:
+                        self.header[key] = ", ".join(line[1:])
+                    
+        # analyzing data
+        elif mode == 2 or mode == 3:
+            # a comment with the environement variables, save them to the datapoint
+            if line[0] == ";":
+                # squid changes direction (up/down), create new datapoint
+                dp = self._getCurrentDataPoint(True)
+                
+                # check out the environement variables (like temperature...)
+                variables = line[1:].split(";")
+                variables_dict = {}
+                
+                # go through each variable, split them by =, the first
+                # param is the name, the second is the value
+                for var in variables:
+                    elements = var.split("=")
+                    
+                    # check if splitting was successfully, save them in
+                    # the datapoint
+                    if len(elements) >= 2:
+                        variables_dict[str(elements[0]).strip()] = str(elements[1]).strip()
+                
+                # the current datapoint index
+                dp_index = len(self.datapoints) - 1
+                
+                if isinstance(replace_values, dict):
+                    variables_dict.update(replace_values)
+                elif (isinstance(replace_values, list) and dp_index < len(replace_values) and 
+                      isinstance(replace_values[dp_index], dict)):
+                    variables_dict.update(replace_values[dp_index])
+                
+                # append the new datapoint
+                dp.addEnvironmentVariables(variables_dict, linenumber)
+            elif self._getCurrentDataPoint(False) != None:
+                # reached some actual data
+                mode = DataHandling.parsing.parseDataRow(self._getCurrentDataPoint(False), 
+                                                         line, linenumber, mode)
+            else:
+                data = line.split(",")
+                
+                if len(line) > 0:
+                    # save the first line as the names
+                    self.datanames = []
+                    self.dataunits = []
+                    
+                    if len(self.datanames) <= 0 and len(self.dataunits) <= 0:
+                        for name in data:
+                            name = name.rsplit(" ", 1)
+                            self.datanames.append(name[0])
                             
-                            if len(data) > 0:
-                                # reached some data
-                                if len(data) >= 7 and data[5] != "" and data[6] != "":
-                                    # the current line is a fit line (last
-                                    # two rows are defined)
-                                    dp.addFixedFit(data[Constants.RAW_FILE_OFFSET_RAW_POSITION], 
-                                                   data[Constants.RAW_FILE_OFFSET_FIXED_C_FIT], 
-                                                   linenumber, 
-                                                   data[Constants.RAW_FILE_OFFSET_TIMESTAMP], 
-                                                   data[Constants.RAW_FILE_OFFSET_COMMENT])
-                                    dp.addFreeFit(data[Constants.RAW_FILE_OFFSET_RAW_POSITION], 
-                                                  data[Constants.RAW_FILE_OFFSET_FREE_C_FIT], 
-                                                  linenumber, 
-                                                  data[Constants.RAW_FILE_OFFSET_TIMESTAMP], 
-                                                  data[Constants.RAW_FILE_OFFSET_COMMENT])
-                                    
-                                    # save current mode, currently reading
-                                    # the fit, after the fit the next data
-                                    # point is starting
-                                    mode = 3
-                                elif (len(data) >= Constants.RAW_FILE_OFFSET_RAW_VOLTAGE + 1 and 
-                                      data[Constants.RAW_FILE_OFFSET_RAW_VOLTAGE] != ""):
-                                    # the current line contains at least the
-                                    # raw voltage
-                                    processed_voltage = None
-                                    
-                                    if len(data) >= Constants.RAW_FILE_OFFSET_PROCESSED_VOLTAGE + 1:
-                                        processed_voltage = data[Constants.RAW_FILE_OFFSET_PROCESSED_VOLTAGE]
-                                    
-                                    dp.addDataRow(data[Constants.RAW_FILE_OFFSET_RAW_POSITION], 
-                                                  data[Constants.RAW_FILE_OFFSET_RAW_VOLTAGE], 
-                                                  processed_voltage,
-                                                  linenumber,
-                                                  data[Constants.RAW_FILE_OFFSET_TIMESTAMP], 
-                                                  data[Constants.RAW_FILE_OFFSET_COMMENT])
-                                
-                                    mode = 2
-                                else:
-                                    # data objects length is too short
-                                    warnings.warn(("Data of line {} has length of {} " + 
-                                                "chunks which could not be " + 
-                                                "interpreted, this dataset will be " + 
-                                                "skipped").format(linenumber, 
-                                                                     str(len(data))))
-                                    dp.addEmptyDataRow()
-                                    
+                            if len(name) > 1:
+                                self.dataunits.append(
+                                        name[1].replace("(", "").replace(")", "").
+                                        replace("[", "").replace("]", ""))
                             else:
-                                # data object is empty
-                                warnings.warn("Data could not be parsed (is empty)" + 
-                                              " in line {}, this dataset will be " + 
-                                              "ignored".format(linenumber))
-                                dp.addEmptyDataRow()
-                        else:
-                            data = line.split(",")
-                            
-                            if len(line) > 0:
-                                # save the first line as the names
-                                self.datanames = []
-                                self.dataunits = []
-                                
-                                if len(self.datanames) <= 0 and len(self.dataunits) <= 0:
-                                    for name in data:
-                                        name = name.rsplit(" ", 1)
-                                        self.datanames.append(name[0])
-                                        
-                                        if len(name) > 1:
-                                            self.dataunits.append(
-                                                    name[1].replace("(", "").replace(")", "").
-                                                    replace("[", "").replace("]", ""))
-                                        else:
-                                            self.dataunits.append("")
-                                
-                    # emit signal for progress, only emit every 5000 lines, otherwise
-                    # this is too fast
-                    if linenumber % 5000 == 0:
-                        self.loadingProgress.emit(linenumber, "loading", self._filepath)
-            else:
-                # file could not be opened, file == None
-                raise IOError("File {0} could not be opened".format(self._filepath))
-                                
-            # close file connection
-            file.close()
-            
-            if replace_squid_length >= 0 and 2 * replace_squid_length < len(self.datapoints):
-                warnings.warn(("The *.dat file has been read successfully but the " + 
-                              "it contains {d} datapoints whilst the raw file (*.rw.dat) " + 
-                              "file holds {r} datapoints ({r} up and {r} down sweeps).").format(
-                                      d=replace_squid_length, r=len(self.datapoints) // 2))
-            
-            # emit signal for end of loading
-            self.loadingEnd.emit(True, "loading", self._filepath)
-        except IOError:
-            raise
+                                self.dataunits.append("")
+        
+        return mode
     
     def _getCurrentDataPoint(self, force_new = None):
         """Return the currently active (or a new) data point. If there is no
@@ -431,6 +938,9 @@ class DataContainer(QtCore.QObject):
             This returns the half number of datapoints, this returns one datapoint
             value for an up and down sweep whilst the DataContainer contains
             one datapoint for an up and one datapoint for a down sweep
+        
+        The file is only read once, the values are taken from the 
+        DataContainer.getDatFileTable()
             
         Raises
         ------
@@ -448,88 +958,122 @@ class DataContainer(QtCore.QObject):
                 The values of the *.dat file specified by the data_index
         """
         
-        # prepare the data to return
-        return_data = []
+        return self.getDatFileTable().getData(data_index)
+    
+    def getDatFileTable(self):
+        """Get the contents of the *.dat file as a table. The file is read the
+        first time this is called, after that the table is kept in the 
+        DataContainer so the file is never read again
+        
+        Raises
+        ------
+            ValueError, if the dat file is not defined
+            IOError, if the file could not be read
+        
+        Returns
+        -------
+            DatFileTable
+                The table with the columns of the *.dat file
+        """
         
         if self._dat_filepath == None or not isinstance(self._dat_filepath, str):
             raise ValueError("The *.dat filepath is not specified")
         
-        try:
-            # open files
-            file = open(self._dat_filepath, "r")
-            
-            # check if file could have been loaded
-            if file != None:
-                # the data line when to read data
-                read_data_line = -1
-                
-                # save linenumber for debuggin purposes
-                linenumber = 0
-                
-                # read the lines
-                lines = file.readlines()
-                
-                # go through each line of the data
-                for line in lines:
-                    # refresh line number
-                    linenumber += 1
-                    
-                    # remove whitespace
-                    line = line.strip()
-                    
-                    # wait until data is acutally there
-                    if line.lower() == "[data]":
-                        # skip next line too, this holds the names of the data
-                        read_data_line = linenumber + 2
-                        continue
-                    
-                    # read the data
-                    if read_data_line >= 0 and linenumber >= read_data_line:
-                        # split the line in a list which contains the values
-                        data = line.split(",")
-                        
-                        if (data_index != None and my_utilities.is_numeric(data_index) and 
-                            data_index >= 0 and data_index < len(data)):
-                            # data_index is numeric, only add the one index value to
-                            # the return list
-                            return_data.append(data[data_index])
-                        elif data_index != None and isinstance(data_index, (tuple, list)):
-                            # data_index is a tuple/list, add all the indices in the
-                            # tuple to the list
-                            rd = []
-                            for i in data_index:
-                                if (my_utilities.is_numeric(i) and i >= 0 and i < len(data)):
-                                    rd.append(data[i])
-                            
-                            return_data.append(rd)
-                        else:
-                            # data_index is anything, just add the complete line
-                            return_data.append(data)
-            
-            # close the file again
-            file.close()
-        except IOError:
-            raise
-            
-        # return the data
-        return return_data
+        if self._dat_table == None or self._dat_table.filepath != self._dat_filepath:
+            self._dat_table = DataHandling.DatFileTable.DatFileTable(self._dat_filepath)
+        
+        return self._dat_table
     
-    def fitDataPoints(self):
-        """Fit the datapoints"""
+    def fitDataPoints(self, processes = None, indices = None):
+        """Fit the datapoints. If the data has been loaded from the parse cache
+        including the fit results the datapoints are not fitted again. After
+        fitting all datapoints successfully (or if the given indices were the 
+        last datapoints that were not fitted) the data and the fit results 
+        are saved to the cache if the cache is used. 
         
-        self.loadingStart.emit(len(self.datapoints), "fitting", self._filepath)
+        If there are at least Constants.FIT_PARALLEL_MINIMUM_DATAPOINTS 
+        datapoints and more than one process is allowed the datapoints are 
+        fitted in a pool of processes
         
-        exceptions = []
+        Parameters
+        ----------
+            processes : int, optional
+                The number of processes to fit in, 1 fits in the current 
+                process, 0 uses one process per cpu, if None the 
+                Constants.FIT_PROCESSES is used
+            indices : list of ints, optional
+                The indices of the datapoints to fit, if None all the 
+                datapoints are fitted
+        """
         
-        for i in range(0, len(self.datapoints)):
-            datapoint = self.datapoints[i]
-            try:
-                datapoint.execFit()
-            except RuntimeError as e:
-                exceptions.append((i, e))
-                self.fitting_not_possible = True
+        if indices == None:
+            if self._loaded_from_cache and all(datapoint.isFitted() for datapoint in self.datapoints):
+                self.loadingStart.emit(len(self.datapoints), "fitting", self._filepath)
+                self.loadingEnd.emit(True, "fitting", self._filepath)
+                return
+            
+            indices = range(len(self.datapoints))
+            was_fitted = False
+        else:
+            # saving the cache takes longer than fitting a few datapoints, 
+            # save only when all datapoints are fitted for the first time
+            was_fitted = all(datapoint.isFitted() for datapoint in self.datapoints)
+        
+        indices = list(indices)
+        datapoints = [self.datapoints[i] for i in indices]
+        
+        self.loadingStart.emit(len(datapoints), "fitting", self._filepath)
+        
+        if processes == None:
+            processes = Constants.FIT_PROCESSES
+        if processes == None or processes <= 0:
+            processes = os.cpu_count()
+        
+        # start each fit at the results of the previous datapoint with the same
+        # sweep direction, the variable projection does not need starting 
+        # values
+        warm_start = (Constants.FIT_WARM_START and 
+                      not DataHandling.calculation.isVariableProjectionUsed())
+        
+        if processes > 1 and len(datapoints) >= Constants.FIT_PARALLEL_MINIMUM_DATAPOINTS:
+            exceptions = self._fitDataPointsParallel(processes, warm_start, indices)
+        else:
+            exceptions = []
+            # the last fit results of the up sweeps (True) and the down sweeps
+            # (False)
+            starting_values = {True: None, False: None}
+            
+            # fit the datapoints with the same number of values at once, the 
+            # results of the datapoints that could not be fitted this way are
+            # None, they are fitted one by one
+            if Constants.FIT_BATCHED:
+                results = DataHandling.calculation.datapointFitBatched(
+                        [datapoint.getFitData() for datapoint in datapoints])
+            else:
+                results = [None] * len(datapoints)
+            
+            for i in range(0, len(datapoints)):
+                datapoint = datapoints[i]
+                up_sweep = warm_start and datapoint.isUpSweep()
+                
+                if results[i] != None:
+                    datapoint.setFitResults(results[i])
+                    
+                    if warm_start:
+                        starting_values[up_sweep] = results[i][2]
+                else:
+                    try:
+                        datapoint.execFit(starting_values[up_sweep])
+                        
+                        if warm_start:
+                            starting_values[up_sweep] = datapoint.getRawFitResults()[0]
+                    except RuntimeError as e:
+                        exceptions.append((indices[i], e))
+                        self.fitting_not_possible = True
+                        # start the next fit at the default values
+                        starting_values[up_sweep] = None
                 
-            self.loadingProgress.emit(i, "fitting", self._filepath)
+                self.loadingProgress.emit(i, "fitting", self._filepath)
             
         self.loadingEnd.emit(len(exceptions) == 0, "fitting", self._filepath)
         
@@ -539,6 +1083,197 @@ class DataContainer(QtCore.QObject):
                 exception_string += str(exception) + " (in datapoint #{})\n".format(index)
                 
             raise Exception(exception_string)
+        elif (self._use_cache and not was_fitted and 
+              all(datapoint.isFitted() for datapoint in self.datapoints)):
+            DataHandling.ParseCache.getDefaultCache().save(self)
+    
+    def _fitDataPointsParallel(self, processes, warm_start = False, indices = None):
+        """Fit the datapoints in a pool of processes. The data of the 
+        datapoints is sent in batches of Constants.FIT_BATCH_SIZE datapoints, 
+        the results are set to the datapoints when all batches are finished.
+        The exceptions are handled the same way as when fitting in the current
+        process. If warm_start is True the fits in each batch start at the 
+        results of the previous datapoint with the same sweep direction
+        
+        Raises
+        ------
+            Exception
+                The first exception that is not a RuntimeError
+        
+        Parameters
+        ----------
+            processes : int
+                The number of processes to use
+            warm_start : boolean, optional
+                Whether to start the fits at the previous results
+            indices : list of ints, optional
+                The indices of the datapoints to fit, if None all the 
+                datapoints are fitted
+        
+        Returns
+        -------
+            list of tuples
+                The index of the datapoint and the RuntimeError for each 
+                datapoint that could not be fitted
+        """
+        
+        if indices == None:
+            indices = range(len(self.datapoints))
+        
+        datapoints = [self.datapoints[i] for i in indices]
+        data = [datapoint.getFitData() + (warm_start and datapoint.isUpSweep(), )
+                for datapoint in datapoints]
+        size = max(int(Constants.FIT_BATCH_SIZE), 1)
+        
+        # spawn new processes, forking the process with the running Qt 
+        # application is not safe
+        context = multiprocessing.get_context("spawn")
+        executor = concurrent.futures.ProcessPoolExecutor(
+                min(processes, (len(data) + size - 1) // size), mp_context=context)
+        
+        results = [None] * len(data)
+        finished = 0
+        futures = {}
+        
+        try:
+            for start in range(0, len(data), size):
+                future = executor.submit(DataHandling.calculation.datapointFitBatch,
+                                         data[start:start + size], warm_start)
+                futures[future] = start
+            
+            for future in concurrent.futures.as_completed(futures):
+                start = futures[future]
+                batch_results = future.result()
+                results[start:start + len(batch_results)] = batch_results
+                
+                # the progress is the number of finished datapoints because 
+                # the batches finish in any order
+                for i in range(len(batch_results)):
+                    self.loadingProgress.emit(finished, "fitting", self._filepath)
+                    finished += 1
+        finally:
+            # the shutdown() supports the cancel_futures since python 3.9 only
+            for future in futures:
+                future.cancel()
+            
+            executor.shutdown()
+        
+        exceptions = []
+        for i, datapoint, result in zip(indices, datapoints, results):
+            if isinstance(result, Exception):
+                datapoint.fitting_not_possible = True
+                
+                if isinstance(result, RuntimeError):
+                    exceptions.append((i, result))
+                    self.fitting_not_possible = True
+                else:
+                    raise result
+            else:
+                datapoint.setFitResults(result)
+        
+        return exceptions
+    
+    def getUnfittedIndices(self, axes, index_list = None):
+        """Get the indices of the datapoints that have to be fitted to get the
+        values of the given axes. These are the datapoints in the index_list
+        that are not disabled and that have not been fitted yet. If none of 
+        the axes is one of the DataContainer.FIT_AXES no datapoint has to be
+        fitted
+        
+        Parameters
+        ----------
+            axes : list or tuple of Strings
+                The names of the data that is requested
+            index_list : list or tuple, optional
+                The indices of the datapoints that are requested, if None all
+                the datapoints are requested
+        
+        Returns
+        -------
+            list of ints
+                The indices of the datapoints to fit
+        """
+        
+        if not any(axis in DataContainer.FIT_AXES for axis in axes):
+            return []
+        
+        if index_list == None:
+            index_list = range(len(self.datapoints))
+        
+        indices = []
+        for index in sorted(set(index_list)):
+            if index < 0 or index >= len(self.datapoints):
+                continue
+            
+            datapoint = self.datapoints[index]
+            
+            if (not datapoint.disabled and not datapoint.isFitted() and 
+                not datapoint.fitting_not_possible):
+                indices.append(index)
+        
+        return indices
+    
+    def fitDataPointsForAxes(self, axes, index_list = None, processes = None):
+        """Fit the datapoints that have to be fitted to get the values of the
+        given axes, see DataContainer.getUnfittedIndices(). The datapoints are
+        fitted at once by the DataContainer.fitDataPoints().
+        
+        This is used for the lazy fitting where the datapoints are not fitted
+        when the file is opened but when the magnetization or the fit results
+        are requested for plotting or exporting
+        
+        Raises
+        ------
+            Exception
+                If some of the datapoints could not be fitted
+        
+        Parameters
+        ----------
+            axes : list or tuple of Strings
+                The names of the data that is requested
+            index_list : list or tuple, optional
+                The indices of the datapoints that are requested, if None all
+                the datapoints are requested
+            processes : int, optional
+                The number of processes to fit in, if None the 
+                Constants.FIT_PROCESSES is used
+        
+        Returns
+        -------
+            boolean
+                Whether some datapoints have been fitted
+        """
+        
+        indices = self.getUnfittedIndices(axes, index_list)
+        
+        if len(indices) == 0:
+            return False
+        
+        self.fitDataPoints(processes, indices)
+        
+        return True
+    
+    def _fitDataPointsLazily(self, axes, index_list = None):
+        """Fit the datapoints that are requested for the given axes if the 
+        datacontainer uses the lazy fitting. The datapoints that could not be
+        fitted are skipped, the errors are shown as a warning
+        
+        Parameters
+        ----------
+            axes : list or tuple of Strings
+                The names of the data that is requested
+            index_list : list or tuple, optional
+                The indices of the datapoints that are requested, if None all
+                the datapoints are requested
+        """
+        
+        if not self.lazy_fitting:
+            return
+        
+        try:
+            self.fitDataPointsForAxes(axes, index_list)
+        except Exception as e:
+            warnings.warn("Fitting data caused an error: " + str(e))
             
     def getPlotData(self, x_axis = TEMPERATURE, y_axis = MAGNETIZATION, index_list = None, apply_formats = True):
         """Get the data for plotting the y_axis data over the x_axis data. This
@@ -590,48 +1325,61 @@ class DataContainer(QtCore.QObject):
             
             return r
         
-        xdata = []
-        ydata = []
-        xerrors = []
-        yerrors = []
-        sorting = []
+        # fit the requested datapoints if they are not fitted yet
+        self._fitDataPointsLazily((x_axis, y_axis), index_list)
+        
         x_unit = ""
         y_unit = ""
-        indices = []
         
         try:
-            for index, datapoint in enumerate(self.datapoints):
-                if datapoint.disabled:
-                    continue
+            x_summary = self._getSummary(x_axis)
+            y_summary = self._getSummary(y_axis)
+            
+            # the datapoints to use
+            if index_list == None:
+                selected = np.ones(len(self.datapoints), dtype=bool)
+            else:
+                index_set = set(index_list)
+                selected = np.array([index in index_set for index 
+                                     in range(len(self.datapoints))], dtype=bool)
+            
+            selected &= np.array([not datapoint.disabled for datapoint 
+                                  in self.datapoints], dtype=bool)
+            
+            if len(x_summary["exceptions"]) > 0 or len(y_summary["exceptions"]) > 0:
+                # raise the exception of the first used datapoint
+                for index in np.flatnonzero(selected):
+                    self._getSummaryResult(x_summary, index)
+                    self._getSummaryResult(y_summary, index)
+            
+            used = selected & x_summary["valid"] & y_summary["valid"]
+            indices = np.flatnonzero(used).tolist()
+            
+            for index in indices:
+                x_unit_temp = x_summary["units"][index]
+                y_unit_temp = y_summary["units"][index]
                 
-                if index_list == None or index in index_list:
-                    x_point = self._getPlotDataFromDataPoint(datapoint, x_axis)
-                    y_point = self._getPlotDataFromDataPoint(datapoint, y_axis)
-                    
-                    if isinstance(x_point, (list, tuple)) and isinstance(y_point, (list, tuple)):
-                        x, x_error, x_unit_temp = x_point
-                        y, y_error, y_unit_temp = y_point
-                    
-                        if x_unit != "" and x_unit != x_unit_temp:
-                            warnings.warn(("The changed from {} to {} in datacontainer {} " + 
-                                  "in datapoint #{}").format(x_unit, x_unit_temp, os.path.basename(self.filepath), index))
-                        
-                        if y_unit != "" and y_unit != y_unit_temp:
-                            warnings.warn(("The changed from {} to {} in datacontainer {} " + 
-                                  "in datapoint #{}").format(y_unit, y_unit_temp, os.path.basename(self.filepath), index))
-                        
-                        if x_unit == "":
-                            x_unit = x_unit_temp
-                        if y_unit == "":
-                            y_unit = y_unit_temp
-                        
-                        if x != None and y != None:
-                            xdata.append(float(x))
-                            ydata.append(float(y))
-                            xerrors.append(float(x_error))
-                            yerrors.append(float(y_error))
-                            indices.append(index)
-                            sorting.append(self._getPlotDataFromDataPoint(datapoint, DataHandling.DataPoint.DataPoint.TIMESTAMP))
+                if x_unit != "" and x_unit != x_unit_temp:
+                    warnings.warn(("The changed from {} to {} in datacontainer {} " + 
+                          "in datapoint #{}").format(x_unit, x_unit_temp, os.path.basename(self.filepath), index))
+                
+                if y_unit != "" and y_unit != y_unit_temp:
+                    warnings.warn(("The changed from {} to {} in datacontainer {} " + 
+                          "in datapoint #{}").format(y_unit, y_unit_temp, os.path.basename(self.filepath), index))
+                
+                if x_unit == "":
+                    x_unit = x_unit_temp
+                if y_unit == "":
+                    y_unit = y_unit_temp
+            
+            xdata = x_summary["values"][used].tolist()
+            ydata = y_summary["values"][used].tolist()
+            xerrors = x_summary["errors"][used].tolist()
+            yerrors = y_summary["errors"][used].tolist()
+            
+            # the timestamps are used to sort the data
+            timestamp_summary = self._getSummary(DataHandling.DataPoint.DataPoint.TIMESTAMP)
+            sorting = [self._getSummaryResult(timestamp_summary, index) for index in indices]
             
             title = self.createName(True)
             
@@ -654,6 +1402,155 @@ class DataContainer(QtCore.QObject):
         except TypeError:
             raise
     
+    def _getSummaryState(self):
+        """Get the datapoints, their modification counts and whether they are
+        fitted
+        
+        Returns
+        -------
+            list of tuples
+                The datapoint, the DataPoint.getModificationCount() and the 
+                DataPoint.isFitted()
+        """
+        
+        return [(datapoint, datapoint.getModificationCount(), datapoint.isFitted()) 
+                for datapoint in self.datapoints]
+    
+    def _getSummary(self, axis):
+        """Get the values of all the datapoints for the given axis. The values
+        are calculated by the DataContainer._getPlotDataFromDataPoint() once for
+        each axis and saved as columns. They are calculated again if the 
+        datapoints have been changed or if one of the datapoints has been 
+        modified.
+        
+        Parameters
+        ----------
+            axis : String
+                The name of the data to get
+        
+        Returns
+        -------
+            dict
+                The "results" of the DataContainer._getPlotDataFromDataPoint()
+                (or the exception it raised) for each datapoint, the indices
+                of the datapoints that raised "exceptions", the "values", the
+                "errors" and the "units" of the results and whether the result
+                of the datapoint is "valid"
+        """
+        
+        state = self._getSummaryState()
+        
+        if state != self._summary_state:
+            self._summary = {}
+        
+        if axis not in self._summary:
+            results = []
+            exceptions = []
+            
+            for index, datapoint in enumerate(self.datapoints):
+                try:
+                    results.append(self._getPlotDataFromDataPoint(datapoint, axis))
+                except Exception as e:
+                    # the exception is raised when the value is used
+                    results.append(e)
+                    exceptions.append(index)
+            
+            valid = np.array([isinstance(result, (list, tuple)) for result in results], 
+                             dtype=bool)
+            
+            summary = {
+                "results": results,
+                "exceptions": exceptions,
+                "valid": valid,
+                "values": np.array([result[0] if v else np.nan for result, v 
+                                    in zip(results, valid)], dtype=float),
+                "errors": np.array([result[1] if v else np.nan for result, v 
+                                    in zip(results, valid)], dtype=float),
+                "units": [result[2] if v else None for result, v 
+                          in zip(results, valid)]
+            }
+            
+            # getting the values may fit the datapoints, the other axis may be
+            # outdated then
+            new_state = self._getSummaryState()
+            
+            if new_state != state:
+                self._summary = {}
+            
+            self._summary_state = new_state
+            self._summary[axis] = summary
+        
+        return self._summary[axis]
+    
+    def getInterpolationRanges(self, measurement_type, controller):
+        """Get the interpolation ranges of the datapoints for the given 
+        measurement_type when this datacontainer is used as the background. 
+        The ranges are created by the calculation.createInterpolationRanges()
+        once for each measurement type and saved, they are created again if 
+        the datapoints have been changed or if one of the datapoints has been
+        modified. This way one background can be interpolated for many 
+        samples.
+        
+        Parameters
+        ----------
+            measurement_type : String
+                The type of the measurement, use DataContainer.TEMPERATURE for
+                a M(T) measurement, use DataContainer.FIELD for a M(H) 
+                measurement
+            controller : Controller
+                The controller
+        
+        Returns
+        -------
+            dict
+                A copy of the dict of the calculation.createInterpolationRanges(),
+                new static ranges can be added to the copy
+        """
+        
+        state = [(datapoint, datapoint.getModificationCount()) 
+                 for datapoint in self.datapoints]
+        
+        if (measurement_type not in self._interpolation_ranges or 
+            self._interpolation_ranges[measurement_type][0] != state):
+            interpolation_ranges = DataHandling.calculation.createInterpolationRanges(
+                    self, measurement_type, controller)
+            
+            self._interpolation_ranges[measurement_type] = (state, interpolation_ranges)
+        
+        # the calculation.getInterpolationValues() adds the interpolated static
+        # ranges to the dict, they must not be used for other datacontainers
+        return dict(self._interpolation_ranges[measurement_type][1])
+    
+    def _getSummaryResult(self, summary, index):
+        """Get the result of the DataContainer._getPlotDataFromDataPoint() 
+        of the datapoint with the given index from the summary
+        
+        Raises
+        ------
+            Exception
+                The exception the DataContainer._getPlotDataFromDataPoint() 
+                raised for this datapoint
+        
+        Parameters
+        ----------
+            summary : dict
+                The summary of the DataContainer._getSummary()
+            index : int
+                The index of the datapoint
+        
+        Returns
+        -------
+            tuple or None
+                The result
+        """
+        
+        result = summary["results"][index]
+        
+        if isinstance(result, Exception):
+            raise result
+        
+        return result
+    
     def _getPlotDataFromDataPoint(self, datapoint, axis):
         """Get the data for the given for the given axis form the given datapoint
         
@@ -683,7 +1580,12 @@ class DataContainer(QtCore.QObject):
         
         unit = ""
         
-        if axis == DataContainer.MAGNETIZATION:
+        if (axis in DataContainer.FIT_AXES and self.lazy_fitting and 
+            not datapoint.isFitted()):
+            # the datapoint has not been requested, it is not fitted when the
+            # values of all datapoints are collected
+            return None
+        elif axis == DataContainer.MAGNETIZATION:
             # get the magnetization fit results
             fit = datapoint.getFitResults()
             if isinstance(fit, (list, tuple)) and len(fit) >= 2:
@@ -798,26 +1700,21 @@ class DataContainer(QtCore.QObject):
         except ValueError:
             raise
         
-        index = -1
-        for datapoint in self.datapoints:
-            index += 1
-            value = self._getPlotDataFromDataPoint(datapoint, axis)
-            
-            if value == None:
-                continue
-            
-            if isinstance(value, tuple) or isinstance(value, list):
-                value = value[0]
-            
-            try:
-                value = my_utilities.force_float(value)
-            except ValueError:
-                continue
+        self._fitDataPointsLazily((axis, ))
+        summary = self._getSummary(axis)
+        
+        if len(summary["exceptions"]) > 0:
+            self._getSummaryResult(summary, summary["exceptions"][0])
+        
+        values = summary["values"]
+        in_range = summary["valid"] & (values >= low) & (values <= high)
+        
+        for index in np.flatnonzero(in_range).tolist():
+            datapoint = self.datapoints[index]
             
-            if value >= low and value <= high:
-                if include_index:
-                    datapoint = (datapoint, index)
-                datapoints.append(datapoint)
+            if include_index:
+                datapoint = (datapoint, index)
+            datapoints.append(datapoint)
                 
         return datapoints
     
@@ -842,9 +1739,12 @@ class DataContainer(QtCore.QObject):
         data = []
         unit = None
         
+        self._fitDataPointsLazily((axis, ))
+        summary = self._getSummary(axis)
+        
         for i, datapoint in enumerate(self.datapoints):
             try:
-                d = self._getPlotDataFromDataPoint(datapoint, axis)
+                d = self._getSummaryResult(summary, i)
             except RuntimeError as e:
                 print("DataContainer.getDataForExport(): An Exception ocurred " + 
                       "when trying to get the export data for dataponit #{}: ".format(i) + 
@@ -911,7 +1811,8 @@ class DataContainer(QtCore.QObject):
         return data, unit
     
     def exportCSV(self, csv_filename, column_axis, mode):
-        """Save the csv file defined by the user to the csv_filename
+        """Save the csv file defined by the user to the csv_filename. If the 
+        csv_filename ends with .gz, .xz or .bz2 the file is compressed.
         
         Parameters
         ----------
@@ -957,7 +1858,7 @@ class DataContainer(QtCore.QObject):
             rows = max(rows, len(column))
         
         # open the file
-        csv_file = open(csv_filename, "w")
+        csv_file = DataHandling.parsing.openFile(csv_filename, "w")
         
         # the lenght of the header in lines, this will always have this length!
         l = Constants.HEADER_LINE_NUMBER
@@ -1120,7 +2021,8 @@ class DataContainer(QtCore.QObject):
         return header
     
     def exportMPMSRaw(self, raw_filename):
-        """Exports the datacontainer to a MPMS raw file.
+        """Exports the datacontainer to a MPMS raw file. If the raw_filename
+        ends with .gz, .xz or .bz2 the file is compressed.
         
         Paramters
         ---------
@@ -1132,7 +2034,7 @@ class DataContainer(QtCore.QObject):
         header = self.exportCreateMPMSHeader()
         
         # the file
-        file = open(raw_filename, "w")
+        file = DataHandling.parsing.openFile(raw_filename, "w")
         
         file.write(header)
         file.write("[Data]\n")
@@ -1174,12 +2076,10 @@ class DataContainer(QtCore.QObject):
         header_dict = {}
         col_names = []
         
-        file = open(self._dat_filepath)
         m = 0
         
-        for line in file:
-            line = line.strip()
-            
+        # the header lines are saved in the table, the file is not read again
+        for line in self.getDatFileTable().header_lines:
             if line == "[Header]":
                 m = 1
             elif line == "[Data]":
@@ -1203,8 +2103,6 @@ class DataContainer(QtCore.QObject):
                 col_names = line.split(",")
                 m = 3
                 break
-            
-        file.close()
         
         if "info" not in header_dict:
             header_dict["info"] = ""
@@ -1222,7 +2120,8 @@ class DataContainer(QtCore.QObject):
         return header, col_names
     
     def exportMPMSDat(self, dat_filename):
-        """Exports the datacontainer to a MPMS dat file
+        """Exports the datacontainer to a MPMS dat file. If the dat_filename
+        ends with .gz, .xz or .bz2 the file is compressed.
         
         Paramters
         ---------
@@ -1234,8 +2133,11 @@ class DataContainer(QtCore.QObject):
         original_data = self.readDatFileData()
         header, column_names = self.exportCreateMPMSDatHeader()
         
+        # the fit results of all datapoints are exported
+        self._fitDataPointsLazily(DataContainer.FIT_AXES)
+        
         # the file
-        file = open(dat_filename, "w")
+        file = DataHandling.parsing.openFile(dat_filename, "w")
         
         file.write(header)
         file.write("[Data]\n")
@@ -1478,6 +2380,7 @@ class DataContainer(QtCore.QObject):
                 text += " ["
             
             filepath = str(os.path.basename(self.filepath))
+            filepath = DataHandling.parsing.removeCompressionExtension(filepath)
             if filepath.count(".rw.dat") > 0:
                 filepath = my_utilities.rreplace(filepath, ".rw.dat", "", 1)
             elif filepath.count(".dat") > 0:
@@ -1525,6 +2428,56 @@ class DataContainer(QtCore.QObject):
             if k == "_data":
                 c = copy.copy(v)
                 setattr(result, k, c)
+            elif k == "_dat_table":
+                # the table is never changed so it can be shared
+                setattr(result, k, v)
+            elif k == "_use_cache":
+                # the copy is modified, it must not be saved as the cache of
+                # the file
+                setattr(result, k, False)
+            elif k == "_tail_state":
+                # the copy is modified, it does not follow the file
+                setattr(result, k, None)
+            elif k in ("_summary", "_summary_state"):
+                # the summary is created again for the copied datapoints
+                setattr(result, k, {} if k == "_summary" else None)
+            elif k == "_interpolation_ranges":
+                # the interpolation ranges are created again for the copied
+                # datapoints
+                setattr(result, k, {})
             else:
                 setattr(result, k, copy.deepcopy(v, memo))
-        return result
\ No newline at end of file
+        return result
+    
+    def __reduce__(self):
+        """Implements the pickle interface. The QObject cannot be pickled, so
+        the DataContainer is created again with its filepaths and all the 
+        attributes are restored with the DataContainer.__setstate__(). This
+        is used to send the DataContainers between processes
+        
+        Returns
+        -------
+            tuple
+                The class, the arguments for the constructor and the state
+        """
+        
+        state = dict(self.__dict__)
+        
+        # the summary and the interpolation ranges are created again when 
+        # they are used
+        state["_summary"] = {}
+        state["_summary_state"] = None
+        state["_interpolation_ranges"] = {}
+        
+        return (self.__class__, (self._filepath, self._dat_filepath), state)
+    
+    def __setstate__(self, state):
+        """Restore the attributes of the unpickled DataContainer
+        
+        Parameters
+        ----------
+            state : dict
+                The attributes of the pickled DataContainer
+        """
+        
+        self.__dict__.update(state)
\ No newline at end of file
@@ -9,11 +9,15 @@ import warnings
 import copy
 import re
 
+import numpy as np
+
 import Constants
 import my_utilities
 import DataHandling.calculation
 import DataHandling.PlotData
 import DataHandling.DataContainer
+import DataHandling.parsing
+import DataHandling.RowTable
 
 class DataPoint:
     LINENUMBER = "linenumber"
@@ -27,7 +31,27 @@ class DataPoint:
     INDEX = "index"
     FIT = "fit"
     
-    EMPTY_ROW = "empty"
+    EMPTY_ROW = DataHandling.RowTable.RowTable.EMPTY_ROW
+    
+    # the types of the columns of the data rows (linenumber, comment, 
+    # timestamp, raw position, raw voltage, processed voltage) and of the fit
+    # rows (linenumber, comment, timestamp, raw position, fit voltage)
+    DATA_ROW_TYPES = (int, str, float, float, float, float)
+    FIT_ROW_TYPES = (int, str, float, float, float)
+    
+    # the index of the column in the rows for the axis
+    COLUMN_INDICES = {
+        LINENUMBER: 0,
+        COMMENT: 1,
+        TIMESTAMP: 2,
+        RAW_POSITION: 3,
+        RAW_VOLTAGE: 4,
+        PROCESSED_VOLTAGE: 5,
+        FIXED_FIT_VOLTAGE: 4,
+        "fixed_fit": 4,
+        FREE_FIT_VOLTAGE: 4,
+        "free_fit": 4
+    }
     
     def __init__(self, parent_datacontainer = None, index = None):
         """Initialize the Datapoint with empty data.
@@ -38,28 +62,48 @@ class DataPoint:
                 The datacontainer which created this DataPoint
         """
         
+        # the number of modifications of the rows, the fit and the environment
+        # variables, this is used to detect if values that have been 
+        # calculated from this datapoint are outdated
+        self._modification_count = 0
         # the names of the lines found in the file
         self._column_names = []
         # the units of the lines found in the file
         self._column_units = []
-        # the rows for this data point
-        self._data_rows = []
+        # the byte offset, the length and the first linenumber of the blocks 
+        # in the raw file that contain the rows of this datapoint but that are
+        # not loaded yet, the rows are loaded when they are used the first time
+        self._lazy_blocks = []
+        # the filepath, the encoding and the file state of the file to load 
+        # the lazy blocks from
+        self._lazy_source = None
+        # the rows for this data point, the rows are saved column wise in a
+        # DataHandling.RowTable.RowTable
+        self._data_rows = DataHandling.RowTable.RowTable(DataPoint.DATA_ROW_TYPES)
         # the fixed fit done by the manufacturers software in [V]
-        self._fixed_c_fit = []
+        self._fixed_c_fit = DataHandling.RowTable.RowTable(DataPoint.FIT_ROW_TYPES)
         # the free fit done by the manufacturers software in [V]
-        self._free_c_fit = []
+        self._free_c_fit = DataHandling.RowTable.RowTable(DataPoint.FIT_ROW_TYPES)
         # the environment variables when the measurement has been done (e.g. temperature)
         self._environment_variables = []
         # the environment variables units 
         self._environment_variables_units = []
+        # the parsed values of the environment variables, one dict for each
+        # environment variables dict, the keys are the variable key and the 
+        # kind of the value ("number", "float" or "unit"), the values are 
+        # parsed the first time they are used
+        self._parsed_environment_variables = []
+        # the averages of the environment variables, the keys are the variable
+        # key and the force_number parameter
+        self._environment_variables_avg = {}
         # the absolute path of the file (at the moment when it was opened) where
         # the data comes from
         self._raw_file = None
         # the fit variables over the raw position
         self._raw_pos_fit = []
-        # this is a list which olds how the background has been subtracted for 
-        # manual inspection. For further information visit the DataHandling.fit.subtractBackgroundData
-        # function. The format is:
+        # this is a structured array which olds how the background has been 
+        # subtracted for manual inspection. For further information visit the 
+        # DataHandling.calculation.subtractBackgroundData function. The format is:
         #   self._background_remove_data[i][0] : x value
         #   self._background_remove_data[i][1] : y value including the background (the original data)
         #   self._background_remove_data[i][2] : y value of the background
@@ -160,8 +204,141 @@ class DataPoint:
     def index(self, index):
         self._index = index
     
+    @property
+    def _data_rows(self):
+        self._loadLazyBlocks()
+        return self._loaded_data_rows
+    
+    @_data_rows.setter
+    def _data_rows(self, data_rows):
+        self._loadLazyBlocks()
+        self._loaded_data_rows = data_rows
+        self._modification_count += 1
+    
+    @property
+    def _fixed_c_fit(self):
+        self._loadLazyBlocks()
+        return self._loaded_fixed_c_fit
+    
+    @_fixed_c_fit.setter
+    def _fixed_c_fit(self, fixed_c_fit):
+        self._loadLazyBlocks()
+        self._loaded_fixed_c_fit = fixed_c_fit
+        self._modification_count += 1
+    
+    @property
+    def _free_c_fit(self):
+        self._loadLazyBlocks()
+        return self._loaded_free_c_fit
+    
+    @_free_c_fit.setter
+    def _free_c_fit(self, free_c_fit):
+        self._loadLazyBlocks()
+        self._loaded_free_c_fit = free_c_fit
+        self._modification_count += 1
+    
+    @property
+    def _raw_pos_fit(self):
+        return self._raw_pos_fit_results
+    
+    @_raw_pos_fit.setter
+    def _raw_pos_fit(self, raw_pos_fit):
+        self._raw_pos_fit_results = raw_pos_fit
+        self._modification_count += 1
+    
+    def getModificationCount(self):
+        """Get the number of modifications of the rows, the fit and the 
+        environment variables. If the count has changed the values that have
+        been calculated from this datapoint are outdated
+        
+        Returns
+        -------
+        int
+            The modification count
+        """
+        
+        return self._modification_count
+    
+    def addLazyBlock(self, offset, length, first_linenumber, filepath, encoding, file_state = None):
+        """Add a block of data rows and fit rows which is not loaded yet. The
+        rows are loaded from the file when the rows of this datapoint are used
+        the first time
+        
+        Parameters
+        ----------
+        offset : int
+            The byte offset of the block in the file
+        length : int
+            The length of the block in bytes
+        first_linenumber : int
+            The linenumber of the first line of the block
+        filepath : String
+            The path of the raw file
+        encoding : String
+            The encoding of the raw file
+        file_state : tuple, optional
+            The DataHandling.parsing.getFileState() of the file when the 
+            offsets have been created
+        """
+        
+        self._lazy_source = (filepath, encoding, file_state)
+        self._lazy_blocks.append((offset, length, first_linenumber))
+    
+    def isLoaded(self):
+        """Get whether all the rows of this datapoint are loaded
+        
+        Returns
+        -------
+        boolean
+            Whether there are no lazy blocks left
+        """
+        
+        return len(self._lazy_blocks) == 0
+    
+    def updateLazyFileState(self, file_state):
+        """Set the file state of the raw file the lazy blocks are loaded from.
+        This is used if the raw file has been appended only, the offsets of
+        the blocks are still valid then
+        
+        Parameters
+        ----------
+        file_state : tuple
+            The current DataHandling.parsing.getFileState() of the file
+        """
+        
+        if self._lazy_source != None:
+            filepath, encoding, old_file_state = self._lazy_source
+            self._lazy_source = (filepath, encoding, file_state)
+    
+    def _loadLazyBlocks(self):
+        """Load the rows of the lazy blocks from the raw file, the raw file is
+        mapped to the memory so only the blocks are read
+        
+        Raises
+        ------
+        IOError
+            If the raw file has changed or if it cannot be read
+        """
+        
+        if len(self._lazy_blocks) == 0:
+            return
+        
+        blocks = self._lazy_blocks
+        filepath, encoding, file_state = self._lazy_source
+        
+        contents = DataHandling.parsing.readBlocks(filepath, blocks, file_state)
+        
+        # remove the blocks before adding the rows, adding the rows uses the
+        # _data_rows, _fixed_c_fit and _free_c_fit properties again
+        self._lazy_blocks = []
+        
+        for (offset, length, first_linenumber), block in zip(blocks, contents):
+            DataHandling.parsing.loadDataBlock(self, block, first_linenumber, 
+                                               2, encoding)
+    
     def addEmptyDataRow(self):
         self._data_rows.append(DataPoint.EMPTY_ROW)
+        self._modification_count += 1
     
     def addDataRow(self, raw_position, raw_voltage, processed_voltage = None, linenumber = None, timestamp = None, comment = None):
         """Add a row of data (of the raw file) to the current data point. This
@@ -198,14 +375,51 @@ class DataPoint:
                 my_utilities.force_float(raw_voltage, True), 
                 my_utilities.force_float(processed_voltage, True))
         )
+        self._modification_count += 1
     
         return True
     
+    def addDataRows(self, raw_positions, raw_voltages, processed_voltages, linenumbers, timestamps, comments):
+        """Add multiple rows of data at once. This does the same as calling
+        DataPoint.addDataRow() for each index of the given columns but the
+        columns have to be parsed already, this is used by the bulk parsing
+        of the raw file
+        
+        Parameters
+        ----------
+        raw_positions : array_like of float
+            The positions of the probe in [mm]
+        raw_voltages : array_like of float
+            The measured raw voltages in [V]
+        processed_voltages : array_like of float
+            The voltages processed by the manufacturers software in [V]
+        linenumbers : array_like of int
+            The linenumbers in the internal file
+        timestamps : array_like of float
+            The timestamps when the data rows have been created
+        comments : list of String
+            The comments for the data rows
+        
+        Returns
+        -------
+        boolean:
+            Whether the data has been added successfully
+        """
+        
+        # the columns are copied into the columns of the row table directly
+        self._data_rows.appendColumns((linenumbers, comments, timestamps, 
+                                       raw_positions, raw_voltages, 
+                                       processed_voltages))
+        self._modification_count += 1
+        
+        return True
+    
     def clearDataRows(self):
-        self._data_rows = []
+        self._data_rows = DataHandling.RowTable.RowTable(DataPoint.DATA_ROW_TYPES)
     
     def addEmptyFixedFit(self):
         self._fixed_c_fit.append(DataPoint.EMPTY_ROW)
+        self._modification_count += 1
     
     def addFixedFit(self, raw_position, fixed_fit_voltage, linenumber = None, timestamp = None, comment = None):
         """Add a Row for the fixed fit (done by the manufacturers software).
@@ -232,6 +446,7 @@ class DataPoint:
         # to the order in the raw files for better readibility
         self._fixed_c_fit.append((int(linenumber), str(comment), float(timestamp), 
                                   float(raw_position), float(fixed_fit_voltage)))
+        self._modification_count += 1
         return True
     
     def addFreeFit(self, raw_position, free_fit_voltage, linenumber = None, timestamp = None, comment = None):
@@ -260,10 +475,45 @@ class DataPoint:
         # to the order in the raw files for better readibility
         self._free_c_fit.append((int(linenumber), str(comment), float(timestamp), 
                                  float(raw_position), float(free_fit_voltage)))
+        self._modification_count += 1
         return True
     
     def addEmptyFreeFit(self):
         self._free_c_fit.append(DataPoint.EMPTY_ROW)
+        self._modification_count += 1
+    
+    def addFitRows(self, raw_positions, fixed_fit_voltages, free_fit_voltages, linenumbers, timestamps, comments):
+        """Add multiple fixed and free fit rows (done by the manufacturers
+        software) at once. This does the same as calling DataPoint.addFixedFit()
+        and DataPoint.addFreeFit() for each index of the given columns
+        
+        Parameters
+        ----------
+        raw_positions : array_like of float
+            The positions of the probe in [mm]
+        fixed_fit_voltages : array_like of float
+            The voltages of the fixed c fit in [V]
+        free_fit_voltages : array_like of float
+            The voltages of the free c fit in [V]
+        linenumbers : array_like of int
+            The linenumbers in the internal file
+        timestamps : array_like of float
+            The timestamps when the data rows have been created
+        comments : list of String
+            The comments for the data rows
+        
+        Returns
+        -------
+        boolean:
+            Whether the data has been added successfully
+        """
+        
+        self._fixed_c_fit.appendColumns((linenumbers, comments, timestamps, 
+                                         raw_positions, fixed_fit_voltages))
+        self._free_c_fit.appendColumns((linenumbers, comments, timestamps, 
+                                        raw_positions, free_fit_voltages))
+        self._modification_count += 1
+        return True
         
     def addEnvironmentVariables(self, variables, linenumber = None):
         """Add a set of environmnent variables for the data point. Try to set the linenumber,
@@ -285,10 +535,76 @@ class DataPoint:
         
         try:
             self._environment_variables.append((dict(variables), linenumber))
+            self._parsed_environment_variables.append({})
+            self._environment_variables_avg = {}
+            self._modification_count += 1
             return True
         except ValueError:
             return False
     
+    def _resetParsedEnvironmentVariables(self):
+        """Remove the parsed values and the averages of the environment 
+        variables, this has to be called when the environment variables are
+        modified"""
+        
+        self._parsed_environment_variables = [{} for i in self._environment_variables]
+        self._environment_variables_avg = {}
+        self._modification_count += 1
+    
+    def _getParsedEnvironmentVariable(self, key, index, kind):
+        """Get the parsed value of the environment variable with the given key.
+        The value is parsed only once, the result is saved for the next calls.
+        
+        Parameters
+        ----------
+            key : String
+                The key to get the value of
+            index : int
+                The index of the environment variable
+            kind : String
+                Use "number" to get the value converted by the 
+                my_utilities.force_float(), "float" to get the value converted
+                by float() (the value is returned as it is if this fails) or 
+                "unit" to get the unit
+        
+        Returns
+        -------
+            anything
+                The parsed value
+        """
+        
+        if index < 0 or index >= len(self._parsed_environment_variables):
+            parsed = {}
+        else:
+            parsed = self._parsed_environment_variables[index]
+        
+        if (key, kind) not in parsed:
+            value = self.getEnvironmentVariable(key, index)
+            
+            if kind == "number":
+                try:
+                    value = my_utilities.force_float(value)
+                except:
+                    print(self._environment_variables)
+                    raise
+            elif kind == "float":
+                try:
+                    value = float(value)
+                except ValueError:
+                    # do nothing
+                    pass
+            else:
+                result = self._environment_variables_unit_regexp.search(str(value))
+                
+                if result == None:
+                    value = ""
+                else:
+                    value = str(result.group(0)).strip()
+            
+            parsed[(key, kind)] = value
+        
+        return parsed[(key, kind)]
+    
     def getEnvironmentVariable(self, key, index):
         """Get the environmnetn variable with the given key, if it does not exist
         false will be returned
@@ -357,31 +673,31 @@ class DataPoint:
                 returned
         """
         
+        if (key, force_number) in self._environment_variables_avg:
+            return self._environment_variables_avg[(key, force_number)]
+        
         count = self.getEnvironmentVariablesCount()
         values = []
         
+        if force_number:
+            kind = "number"
+        else:
+            kind = "float"
+        
         for i in range(0, count):
-            value = self.getEnvironmentVariable(key, i)
-            if force_number:
-                try:
-                    value = my_utilities.force_float(value)
-                except:
-                    print(self._environment_variables)
-                    raise
-            else:
-                try:
-                    value = float(value)
-                except ValueError:
-                    # do nothing
-                    pass
+            value = self._getParsedEnvironmentVariable(key, i, kind)
             
             if my_utilities.is_numeric(value):
                 values.append(value)
         
         if len(values) > 0:
-            return my_utilities.mean_std(values)
+            avg = my_utilities.mean_std(values)
         else:
-            return False
+            avg = False
+        
+        self._environment_variables_avg[(key, force_number)] = avg
+        
+        return avg
     
     def getEnvironmentVariableIndexByLinenumber(self, linenumber):
         """Get the index by passing the line number
@@ -429,14 +745,7 @@ class DataPoint:
             String, the unit
         """
         
-        value = self.getEnvironmentVariable(key, index)
-        
-        result = self._environment_variables_unit_regexp.search(str(value))
-        
-        if result == None:
-            return ""
-        else:
-            return str(result.group(0)).strip()
+        return self._getParsedEnvironmentVariable(key, index, "unit")
     
     def getEnvironmnetVariableKeys(self):
         """Get the keys that the environment variables support in the current
@@ -457,7 +766,9 @@ class DataPoint:
         return list(keys)
     
     def getEnvironmentVariables(self):
-        """Get the environment variables, this will return a list of dicts
+        """Get the environment variables, this will return a list of dicts. The
+        dicts must not be modified, the parsed values and the averages are 
+        saved
         
         Returns
         -------
@@ -514,15 +825,27 @@ class DataPoint:
         # detect the length of a valid row to immitate this length
         row_length = None
         plot_data_mode = None
+        # the x and y columns if they can be taken from the row table directly
+        column_data = None
         if include_empty_rows:
             plot_data_mode = 1
             
             for row in self._data_rows:
-                if isinstance(self._data_rows, (list, tuple)):
+                if isinstance(row, (list, tuple)):
                     row_length = len(row)
                     break
+        else:
+            column_data = self.getColumnData(x_axis, y_axis)
         
-        if ((x_axis == DataPoint.RAW_POSITION and y_axis == DataPoint.FIT) or
+        if column_data != None:
+            # both axis are numeric columns of the same row table, the columns 
+            # can be used directly
+            x_data = column_data[0].tolist()
+            y_data = column_data[1].tolist()
+            
+            redo_x = False
+            redo_y = False
+        elif ((x_axis == DataPoint.RAW_POSITION and y_axis == DataPoint.FIT) or
             (y_axis == DataPoint.RAW_POSITION and x_axis == DataPoint.FIT)):
             # fit is only allowed by position
             
@@ -543,10 +866,9 @@ class DataPoint:
                 if isinstance(fit, (list, tuple)) and len(fit) >= 2:
                     fit_results = fit[0]
                     
-                    fit_results = tuple(fit_results)
-                    for x in x_data:
-                        parameters = (x,) + fit_results
-                        y_data.append(DataHandling.calculation.dipolfunction(*parameters))
+                    # the dipolfunction is evaluated for all x values at once
+                    y_data = DataHandling.calculation.dipolfunction(
+                            np.array(x_data, dtype=float), *fit_results).tolist()
                 else:
                     x_data = []
             
@@ -736,6 +1058,56 @@ class DataPoint:
         else:
             return None
     
+    def getColumnData(self, x_axis, y_axis):
+        """Get the values of the valid rows for the x_axis and the y_axis as
+        numpy arrays. This works only for axis which are numeric columns of 
+        the same rows (e.g. the raw position and the raw voltage or the raw 
+        position and the fixed fit voltage). If there are no empty rows the 
+        arrays are views of the columns, they must not be modified then.
+        
+        Parameters
+        ---------
+            x_axis : string
+                The name of the data which should be used for the x axis
+            y_axis : string
+                The name of the data which should be used for the y axis
+        
+        Returns
+        -------
+            array, array
+                The x and y values or None if the axis are not numeric columns
+                of the same rows
+        """
+        
+        general_indices = (DataPoint.TIMESTAMP, DataPoint.RAW_POSITION, 
+                           DataPoint.LINENUMBER)
+        
+        for axis in (x_axis, y_axis):
+            if axis == DataPoint.COMMENT or axis not in DataPoint.COLUMN_INDICES:
+                return None
+        
+        # the axis which is not a general index defines the rows to use
+        if x_axis not in general_indices and y_axis in general_indices:
+            rows_axis = x_axis
+        elif x_axis in general_indices and y_axis not in general_indices:
+            rows_axis = y_axis
+        elif x_axis in general_indices and y_axis in general_indices:
+            rows_axis = None
+        else:
+            return None
+        
+        if rows_axis in (DataPoint.FIXED_FIT_VOLTAGE, "fixed_fit"):
+            rows = self._fixed_c_fit
+        elif rows_axis in (DataPoint.FREE_FIT_VOLTAGE, "free_fit"):
+            rows = self._free_c_fit
+        else:
+            rows = self._data_rows
+        
+        x_data = rows.getValidColumn(DataPoint.COLUMN_INDICES[x_axis])
+        y_data = rows.getValidColumn(DataPoint.COLUMN_INDICES[y_axis])
+        
+        return np.asarray(x_data, dtype=float), np.asarray(y_data, dtype=float)
+    
     def getUnitForAxis(self, axis):
         """Get the unit for the given axis
         
@@ -816,9 +1188,36 @@ class DataPoint:
         else:
             return (axis, "")
     
-    def execFit(self):
+    def execFit(self, starting_values = None):
         """Fit the initialized DataPoint to a dipol function (by using the 
         DataHandling.calculation.datapointFit() function)
+        
+        Parameters
+        ----------
+            starting_values : list of float, optional
+                The fit parameters to start the fit at (for example the results
+                of the previous DataPoint), if None the Constants.FIT_STARTING_*
+                values are used
+        """
+        
+        xdata, ydata, squid_range = self.getFitData()
+        
+        # fit the data using DataHandling.calculation.py
+        try:
+            self._raw_pos_fit = DataHandling.calculation.datapointFit(
+                    xdata, ydata, squid_range, starting_values)
+        except Exception as e:
+            self.fitting_not_possible = True
+            raise e
+    
+    def getFitData(self):
+        """Get the data that is passed to the 
+        DataHandling.calculation.datapointFit() when fitting this DataPoint
+        
+        Returns
+        -------
+            array of floats, array of floats, float
+                The raw positions, the raw voltages and the squid range
         """
         
         # squid range fallback and initialization
@@ -830,15 +1229,36 @@ class DataPoint:
         if not my_utilities.is_numeric(squid_range) or squid_range == 0:
             squid_range = 1
         
-        # receive data to fit
-        xdata, ydata = self.getPlotData(DataPoint.RAW_POSITION, DataPoint.RAW_VOLTAGE)
+        # receive data to fit, the columns are used directly, the data is sorted
+        # by the raw position (and the voltage) like the PlotData sorts it
+        xdata, ydata = self.getColumnData(DataPoint.RAW_POSITION, DataPoint.RAW_VOLTAGE)
+        order = np.lexsort((ydata, xdata))
         
-        # fit the data using DataHandling.calculation.py
-        try:
-            self._raw_pos_fit = DataHandling.calculation.datapointFit(xdata, ydata, squid_range)
-        except Exception as e:
-            self.fitting_not_possible = True
-            raise e
+        return xdata[order], ydata[order], squid_range
+    
+    def setFitResults(self, raw_pos_fit):
+        """Set the result of the DataHandling.calculation.datapointFit() for 
+        the data of the DataPoint.getFitData() that has been fitted somewhere 
+        else (for example in another process)
+        
+        Parameters
+        ----------
+            raw_pos_fit : tuple
+                The return value of the datapointFit()
+        """
+        
+        self._raw_pos_fit = raw_pos_fit
+    
+    def isFitted(self):
+        """Get whether the fit has been executed successfully
+        
+        Returns
+        -------
+            boolean
+                Whether there are fit results
+        """
+        
+        return my_utilities.is_iterable(self._raw_pos_fit) and len(self._raw_pos_fit) > 0
     
     def getFitResults(self):
         """Get the result of the fit. If the fit is not executed before this 
@@ -955,7 +1375,7 @@ class DataPoint:
             
     
     def removeBackgroundData(self, background_datapoint, x_axis = RAW_POSITION, 
-                             y_axis = RAW_VOLTAGE):
+                             y_axis = RAW_VOLTAGE, mode = None):
         """Remove the given background_datapoint from this datapoint. This will
         (by default) subtract the raw position from the raw voltage. The actual
         subtracting will be done in the DataHandling.fit file. You can specify
@@ -970,6 +1390,9 @@ class DataPoint:
             x_axis, y_axis : String, optional
                 The x and y axis where to subtract the y axis of the background
                 data from the current datapoint
+            mode : String, optional
+                The background subtraction mode, see the 
+                DataHandling.calculation.subtractBackgroundData()
         """
         
         # Can't use self.getPlotData(...) right here because otherwise the list
@@ -995,17 +1418,10 @@ class DataPoint:
         else:
             data = xdata
         
-        xdata = []
-        ydata = []
-        indices_map = {}
-        
-        # get the x and y data of the sample with background, save the indices
-        # in the indices_map to skip empty rows
-        for i, row in enumerate(data):
-            if row != DataPoint.EMPTY_ROW:
-                xdata.append(data[i][x_index])
-                ydata.append(data[i][y_index])
-                indices_map[i] = len(xdata) - 1
+        # get the x and y data of the sample with background, empty rows are
+        # skipped
+        xdata = data.getValidColumn(x_index)
+        ydata = data.getValidColumn(y_index)
         
         if isinstance(background_datapoint, DataHandling.DataPoint.DataPoint):
             # get the x-y-data of the background
@@ -1078,6 +1494,8 @@ class DataPoint:
                 
             self._environment_variables[i] = (environment_vars, environment_vars_collection[1])
         
+        self._resetParsedEnvironmentVariables()
+        
         # make sure that the squid ranges exist
         if not my_utilities.is_numeric(squid_range):
             squid_range = 1
@@ -1087,7 +1505,7 @@ class DataPoint:
         # let the DataHandling.calculation.py perform the subtraction of the data
         result = DataHandling.calculation.subtractBackgroundData(
                 xdata, ydata, squid_range,xbackground_data, ybackground_data,
-                background_squid_range)
+                background_squid_range, mode=mode)
         
         if not isinstance(result, (list, tuple)) or len(result) < 2:
             raise ValueError("The result of the background subtraction is incorrect, " + 
@@ -1104,17 +1522,12 @@ class DataPoint:
         # save the axis that have been used for removing
         self._background_remove_axis = (x_axis, y_axis)
         
-        # save the data to the internal list again, data is a reference to the 
-        # correct internal list
-        for index, _ in enumerate(data):
-            row = data[index]
-            
-            if row != DataPoint.EMPTY_ROW:
-                row = list(row)
-                row[x_index] = xdata[indices_map[index]]
-                row[y_index] = ydata[indices_map[index]]
-            
-                data[index] = tuple(row)
+        # save the data to the internal table again, data is a reference to the 
+        # correct internal table
+        data.setValidColumn(x_index, xdata)
+        data.setValidColumn(y_index, ydata)
+        
+        self._modification_count += 1
     
     def getExportRawData(self):
         """Get the 2d list of the data to export. This is the data to create a
@@ -1126,25 +1539,6 @@ class DataPoint:
                 The data rows as a list
         """
         
-        data = []
-                
-        # the order_list defines the conversion from the internal list to the 
-        # export list. The target indices are the indices of the order_list,
-        # the indices of the source (= the internal list) are the values
-        # 
-        # the order of the internal list is:
-        #   linenumber
-        #   comment
-        #   timestamp
-        #   raw position
-        #   raw voltage
-        #   processed voltage
-        order_list = {}
-        order_list[Constants.RAW_FILE_OFFSET_COMMENT] = 1
-        order_list[Constants.RAW_FILE_OFFSET_TIMESTAMP] = 2
-        order_list[Constants.RAW_FILE_OFFSET_RAW_POSITION] = 3
-        order_list[Constants.RAW_FILE_OFFSET_RAW_VOLTAGE] = 4
-        
         # get the raw fit results
         try:
             res = self.getRawFitResults()
@@ -1157,18 +1551,28 @@ class DataPoint:
             drift = None
             y_offset = None
         
-        for row in self._data_rows:
-            data_row = [row[order_list[i]] for i in order_list]
-            
-            # create processed voltage
-            if drift != None and y_offset != None:
-                processed_voltage = row[Constants.RAW_FILE_OFFSET_RAW_VOLTAGE] - row[Constants.RAW_FILE_OFFSET_RAW_VOLTAGE] * drift - y_offset
-            else:
-                processed_voltage = ""
-            
-            data_row.append(processed_voltage)
-            
-            data.append(data_row)
+        # the columns of the valid data rows in the order of the export, the
+        # order of the internal rows is:
+        #   linenumber
+        #   comment
+        #   timestamp
+        #   raw position
+        #   raw voltage
+        #   processed voltage
+        comments = self._data_rows.getValidColumn(1).tolist()
+        timestamps = self._data_rows.getValidColumn(2).tolist()
+        raw_positions = self._data_rows.getValidColumn(3).tolist()
+        raw_voltages = self._data_rows.getValidColumn(4).tolist()
+        
+        # create processed voltage
+        if drift != None and y_offset != None:
+            voltages = self._data_rows.getValidColumn(Constants.RAW_FILE_OFFSET_RAW_VOLTAGE)
+            processed_voltages = (voltages - voltages * drift - y_offset).tolist()
+        else:
+            processed_voltages = [""] * len(comments)
+        
+        data = [list(row) for row in zip(comments, timestamps, raw_positions, 
+                                         raw_voltages, processed_voltages)]
         
         if len(self._fixed_c_fit) > 0 or len(self._free_c_fit) > 0:
             # order of the _free_c_fit/_fixed_c_fit:
@@ -1194,17 +1598,24 @@ class DataPoint:
                 fit_results = res[0]
                 fit_results = tuple(fit_results)
             
-            for i in range(0, max(len(self._free_c_fit), len(self._fixed_c_fit))):
+            # convert the rows at once
+            free_c_fit = list(self._free_c_fit)
+            fixed_c_fit = list(self._fixed_c_fit)
+            
+            for i in range(0, max(len(free_c_fit), len(fixed_c_fit))):
                 fixed_fit = ""
                 free_fit = ""
-                if i < len(self._free_c_fit):
-                    row = self._free_c_fit[i]
+                if i < len(free_c_fit):
+                    row = free_c_fit[i]
 #                    free_fit = row[4]
                     
-                if i < len(self._fixed_c_fit):
-                    row = self._fixed_c_fit[i]
+                if i < len(fixed_c_fit):
+                    row = fixed_c_fit[i]
 #                    fixed_fit = row[4]
                 
+                if row == DataPoint.EMPTY_ROW:
+                    continue
+                
                 row = [row[order_list[i]] for i in order_list]
                     
                 # add processed voltage
@@ -1315,16 +1726,11 @@ class DataPoint:
         drift = res[0][1]
         y_offset = res[0][2]
         
-        # subtract the drift and the y offset
-        for i, row in enumerate(self._data_rows):
-            if isinstance(row, (list, tuple)):
-                self._data_rows[i] = tuple(
-                             list(row[0:Constants.RAW_FILE_OFFSET_RAW_VOLTAGE]) + 
-                             [row[Constants.RAW_FILE_OFFSET_RAW_VOLTAGE] - row[Constants.RAW_FILE_OFFSET_RAW_VOLTAGE] * drift - y_offset] + 
-                             list(row[Constants.RAW_FILE_OFFSET_RAW_VOLTAGE + 1:-1]))
-            else:
-                # row is empty
-                self._data_rows[i] = row
+        # subtract the drift and the y offset, empty rows are not changed
+        voltages = self._data_rows.getValidColumn(Constants.RAW_FILE_OFFSET_RAW_VOLTAGE)
+        self._data_rows.setValidColumn(Constants.RAW_FILE_OFFSET_RAW_VOLTAGE,
+                                       voltages - voltages * drift - y_offset)
+        self._modification_count += 1
         
         # fit again so the fit is correct
         self.execFit()
@@ -1376,28 +1782,22 @@ class DataPoint:
                 
                 conditions.append(cond)
         
-        rows = []
+        # empty rows are removed too
+        matches = self._data_rows.getValidMask().copy()
         
-        for i, row in enumerate(self._data_rows):
-            if row == DataHandling.DataPoint.DataPoint.EMPTY_ROW or not isinstance(row, (list, tuple)):
-                continue
-            
-            matches = True
-            for cond in conditions:
-                if cond["key"] == -1:
-                    check_value = i
-                else:
-                    check_value = row[cond["key"]]
-                
-                if (("min" in cond and check_value < cond["min"]) or 
-                    ("max" in cond and check_value > cond["max"])):
-                    matches = False
-                    break
+        for cond in conditions:
+            if cond["key"] == -1:
+                check_values = np.arange(len(self._data_rows))
+            else:
+                check_values = self._data_rows.getColumn(cond["key"])
             
-            if matches:
-                rows.append(row)
+            # rows with NaN values match the condition
+            if "min" in cond:
+                matches &= ~(check_values < cond["min"])
+            if "max" in cond:
+                matches &= ~(check_values > cond["max"])
         
-        self._data_rows = rows
+        self._data_rows = self._data_rows.select(matches)
     
     def __deepcopy__(self, memo):
         """Implements the deepcopy interface, this prevents recursive infinite
@@ -1422,6 +1822,21 @@ class DataPoint:
         for k, v in self.__dict__.items():
             if k in ("_parent", "_environment_variables_unit_regexp"):
                 setattr(result, k, v)
+            elif k in ("_loaded_data_rows", "_loaded_fixed_c_fit", "_loaded_free_c_fit"):
+                # the rows are shared until one of the datapoints modifies
+                # them (copy on write)
+                setattr(result, k, v.copy())
+            elif k == "_lazy_blocks":
+                # the blocks only contain ints
+                setattr(result, k, list(v))
+            elif k == "_environment_variables":
+                # the values are strings, copying the dicts is enough
+                setattr(result, k, [(dict(variables), linenumber) for 
+                                    variables, linenumber in v])
+            elif k == "_parsed_environment_variables":
+                setattr(result, k, [dict(parsed) for parsed in v])
+            elif k == "_environment_variables_avg":
+                setattr(result, k, dict(v))
             else:
                 setattr(result, k, copy.deepcopy(v, memo))
                 
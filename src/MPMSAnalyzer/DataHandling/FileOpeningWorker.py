@@ -7,7 +7,11 @@ Created on Wed Nov  8 11:27:46 2017
 
 from PyQt5 import QtCore
 from os import path
+import concurrent.futures
+import multiprocessing
 import warnings
+import queue
+import os
 
 import DataHandling.DataContainer
 import Constants
@@ -46,18 +50,29 @@ class FileOpeningWorker(QtCore.QObject):
 
     def run(self):
         """Run the thread. This will create the DataContainers by parsing the 
-        files
+        files. If there are multiple files and more than one process is 
+        allowed the files are opened in parallel processes
         """
         
         self._stop = False
         
+        processes = self.getData("processes", Constants.FILE_OPENING_PROCESSES)
+        if processes == None or processes <= 0:
+            processes = os.cpu_count()
+        
+        if processes > 1 and len(self._files) > 1:
+            self._runParallel(min(processes, len(self._files)))
+        elif self._runSequential() == False:
+            # opening a file failed
+            return False
+        
+        self.finished.emit()
+    
+    def _runSequential(self):
+        """Open the files one after another in the current thread"""
+        
         for fs in self._files:
-            if isinstance(fs, list) or isinstance(fs, tuple):
-                filename = fs[0]
-                dat_filename = fs[1]
-            else:
-                filename = fs
-                dat_filename = None
+            filename, dat_filename = self._getFilenames(fs)
                 
             data = DataHandling.DataContainer.DataContainer(filename, dat_filename)
             
@@ -88,34 +103,19 @@ class FileOpeningWorker(QtCore.QObject):
                     self._controller.error(str(e), Constants.FATAL)
                     return False
                 
-                # check if some warnings occurred
-                if len(warns) > 1:
-                    warn_str = ""
-                    
-                    # get the count of digits to format all the same
-                    p = len(str(len(warns)))
-                    
-                    # go through warning, add leading 0 to the warning number
-                    i = 0
-                    for w in warns:
-                        warn_str += str(i).zfill(p) + ": " + str(w.message) + "<br />"
-                        i += 1
-                    
-                    # show an error message
-                    self._controller.error("{0} errors occurred when trying to open the file '{1}': <br />".format(
-                            len(warns), filename), Constants.NOTICE, warn_str)
-                elif len(warns) > 0:
-                    # only one warning occurred, show an error message immediately
-                    self._controller.error("An error occurred when trying to open the file '{0}': ".format(
-                            filename), Constants.NOTICE, str(warns[0].message))
+                self._showWarnings([str(w.message) for w in warns], filename)
             
             if my_utilities.is_iterable(data.datapoints):
-                if self.getData('exec_fit', True):
+                # the datapoints are fitted when they are requested if the
+                # lazy fitting is used
+                data.lazy_fitting = self._controller.isLazyFitting()
+                
+                if self.getData('exec_fit', True) and not data.lazy_fitting:
                     self._controller.log("Fitting data points")
                     
                     # fit the datapoints
                     try:
-                        data.fitDataPoints()
+                        data.fitDataPoints(self._controller.getFitProcesses())
                     except Exception as e:
                         self._controller.error("Fitting data caused an error: " + str(e))
                     
@@ -132,8 +132,164 @@ class FileOpeningWorker(QtCore.QObject):
                 
             if self._stop:
                 break
+    
+    def _runParallel(self, processes):
+        """Open the files in a pool of processes. Each process parses and fits
+        one file, the finished DataContainers are pickled and sent back. The
+        finishedDataPoint signal is emitted as soon as a file is finished. The
+        progress signals of the processes are sent with a queue.
+        
+        Parameters
+        ----------
+            processes : int
+                The number of processes to use
+        """
+        
+        # spawn new processes, forking the process with the running Qt 
+        # application is not safe
+        context = multiprocessing.get_context("spawn")
+        progress_queue = context.Queue()
+        
+        executor = concurrent.futures.ProcessPoolExecutor(
+                processes, mp_context=context, initializer=_initializeProcess,
+                initargs=(progress_queue,))
+        
+        lazy_fitting = self._controller.isLazyFitting()
+        
+        futures = {}
+        for fs in self._files:
+            filename, dat_filename = self._getFilenames(fs)
+            future = executor.submit(openFile, filename, dat_filename, 
+                                     self.getData('exec_fit', True), lazy_fitting)
+            futures[future] = filename
+        
+        pending = set(futures)
+        
+        try:
+            while len(pending) > 0 and not self._stop:
+                done, pending = concurrent.futures.wait(
+                        pending, timeout=0.1, 
+                        return_when=concurrent.futures.FIRST_COMPLETED)
+                
+                self._emitProgress(progress_queue)
+                
+                for future in done:
+                    if self._stop:
+                        break
+                    
+                    self._processResult(future, path.basename(futures[future]))
+        finally:
+            # the shutdown() supports the cancel_futures since python 3.9 only
+            for future in pending:
+                future.cancel()
+            
+            executor.shutdown(wait=not self._stop)
+            self._emitProgress(progress_queue)
+    
+    def _emitProgress(self, progress_queue):
+        """Emit all the progress signals the processes have put in the queue
+        
+        Parameters
+        ----------
+            progress_queue : multiprocessing.Queue
+                The queue with the signal name and the signal arguments
+        """
+        
+        signals = {"start": self.loadingStart, "progress": self.loadingProgress,
+                   "end": self.loadingEnd}
+        
+        while True:
+            try:
+                name, args = progress_queue.get_nowait()
+            except queue.Empty:
+                break
             
-        self.finished.emit()
+            signals[name].emit(*args)
+    
+    def _processResult(self, future, filename):
+        """Show the errors of the opened file and emit the finishedDataPoint
+        signal
+        
+        Parameters
+        ----------
+            future : concurrent.futures.Future
+                The finished future of the openFile() call
+            filename : String
+                The name of the file
+        """
+        
+        try:
+            data, warning_messages, error, fit_error = future.result()
+        except Exception as e:
+            self._controller.error("Opening the file '{0}' caused an error: {1}".format(
+                    filename, e), Constants.FATAL)
+            return
+        
+        if error != None:
+            self._controller.error(error, Constants.FATAL)
+            return
+        
+        self._showWarnings(warning_messages, filename)
+        
+        if fit_error != None:
+            self._controller.error("Fitting data caused an error: " + fit_error)
+        
+        if my_utilities.is_iterable(data.datapoints):
+            self.finishedDataPoint.emit(data)
+        else:
+            self._controller.error(("Completed opening and reading file {0} " + 
+                                   "sucessfully but file is empty").format(filename))
+    
+    def _showWarnings(self, warning_messages, filename):
+        """Show the warnings that occurred when reading the file
+        
+        Parameters
+        ----------
+            warning_messages : list of String
+                The messages of the warnings
+            filename : String
+                The name of the file
+        """
+        
+        # check if some warnings occurred
+        if len(warning_messages) > 1:
+            warn_str = ""
+            
+            # get the count of digits to format all the same
+            p = len(str(len(warning_messages)))
+            
+            # go through warning, add leading 0 to the warning number
+            i = 0
+            for message in warning_messages:
+                warn_str += str(i).zfill(p) + ": " + message + "<br />"
+                i += 1
+            
+            # show an error message
+            self._controller.error("{0} errors occurred when trying to open the file '{1}': <br />".format(
+                    len(warning_messages), filename), Constants.NOTICE, warn_str)
+        elif len(warning_messages) > 0:
+            # only one warning occurred, show an error message immediately
+            self._controller.error("An error occurred when trying to open the file '{0}': ".format(
+                    filename), Constants.NOTICE, warning_messages[0])
+    
+    def _getFilenames(self, fs):
+        """Get the filename and the *.dat filename of one entry of the files
+        
+        Parameters
+        ----------
+            fs : String, list or tuple
+                The filename or the filename and the *.dat filename
+        
+        Returns
+        -------
+            String, String or None
+                The filename and the *.dat filename
+        """
+        
+        if isinstance(fs, list) or isinstance(fs, tuple):
+            return fs[0], fs[1]
+        else:
+            return fs, None
         
     def stop(self):
         """Stop the worker"""
@@ -155,4 +311,80 @@ class FileOpeningWorker(QtCore.QObject):
         if isinstance(self._data, dict) and key in self._data:
             return self._data[key]
         else:
-            return default_value
\ No newline at end of file
+            return default_value
+
+# the queue to send the progress signals to the FileOpeningWorker, this is set
+# in each process of the pool
+_progress_queue = None
+
+def _initializeProcess(progress_queue):
+    """Initialize a process of the pool of the FileOpeningWorker
+    
+    Parameters
+    ----------
+        progress_queue : multiprocessing.Queue
+            The queue for the progress signals
+    """
+    
+    global _progress_queue
+    _progress_queue = progress_queue
+
+def openFile(filename, dat_filename = None, exec_fit = True, lazy_fitting = False):
+    """Open, parse and fit the file. This is executed in the processes of the
+    FileOpeningWorker, if the _progress_queue is set the loading signals of the
+    DataContainer are sent to this queue. If lazy_fitting is True the 
+    datapoints are not fitted, they are fitted when they are requested.
+    
+    Parameters
+    ----------
+        filename : String
+            The path of the raw file
+        dat_filename : String, optional
+            The path of the *.dat file
+        exec_fit : boolean, optional
+            Whether to fit the datapoints
+        lazy_fitting : boolean, optional
+            Whether the datapoints are fitted when they are requested only
+    
+    Returns
+    -------
+        DataContainer
+            The opened DataContainer
+        list of String
+            The messages of the warnings that occurred when reading the file
+        String or None
+            The error message if the file could not be read
+        String or None
+            The error message if the fit failed
+    """
+    
+    data = DataHandling.DataContainer.DataContainer(filename, dat_filename)
+    
+    if _progress_queue != None:
+        data.loadingStart.connect(lambda *args: _progress_queue.put(("start", args)))
+        data.loadingProgress.connect(lambda *args: _progress_queue.put(("progress", args)))
+        data.loadingEnd.connect(lambda *args: _progress_queue.put(("end", args)))
+    
+    # save all the eventually thrown warnings too
+    with warnings.catch_warnings(record=True) as warns:
+        # Cause all warnings to always be triggered.
+        warnings.simplefilter("always")
+        
+        try:
+            data.readFileData()
+        except IOError as e:
+            return None, [], str(e), None
+    
+    warning_messages = [str(w.message) for w in warns]
+    fit_error = None
+    
+    data.lazy_fitting = lazy_fitting
+    
+    if my_utilities.is_iterable(data.datapoints) and exec_fit and not lazy_fitting:
+        # the files are opened in parallel already, fit in this process only
+        try:
+            data.fitDataPoints(1)
+        except Exception as e:
+            fit_error = str(e)
+    
+    return data, warning_messages, None, fit_error
\ No newline at end of file
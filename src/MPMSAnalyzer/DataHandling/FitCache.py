@@ -0,0 +1,406 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 22:14:09 2026
+
+@author: miile7
+"""
+
+from PyQt5 import QtCore
+import numpy as np
+import collections
+import threading
+import warnings
+import hashlib
+import sqlite3
+import time
+import os
+
+import Constants
+
+# the cache instance used by the DataHandling.calculation.datapointFit()
+_default_cache = None
+
+def getDefaultCache():
+    """Get the FitCache that is used for fitting the datapoints, this is
+    created with the Constants.FIT_CACHE_* values when it is used the first
+    time
+    
+    Returns
+    -------
+        FitCache
+            The cache
+    """
+    
+    global _default_cache
+    
+    if _default_cache == None:
+        _default_cache = FitCache(Constants.FIT_CACHE_SIZE, Constants.FIT_CACHE_DISK,
+                                  Constants.FIT_CACHE_DIRECTORY,
+                                  Constants.FIT_CACHE_DISK_SIZE)
+    
+    return _default_cache
+
+class FitCache:
+    # the name of the database file
+    FILENAME = "fits.sqlite"
+    
+    # the length of the fit result, the magnetization, the magnetization error,
+    # the four fit parameters and the four errors of the fit parameters
+    FIT_RESULT_LENGTH = 10
+    
+    # the number of results to save in the database file before the least
+    # recently used results are removed
+    EVICT_INTERVAL = 1000
+    
+    def __init__(self, size = None, use_disk = False, directory = None, disk_size = None):
+        """Initialize the cache. The fit results are saved with the hash of
+        the fitted data, the squid range, the starting values and the fit
+        settings as the key. The results are kept in the memory, the least
+        recently used results are removed if there are more than size results.
+        If use_disk is True the results are saved in a database file too.
+        
+        Parameters
+        ----------
+            size : int, optional
+                The maximum number of results in the memory, if not given the
+                number is not limited
+            use_disk : boolean, optional
+                Whether to save the results in the database file
+            directory : String, optional
+                The directory of the database file, if not given the users
+                cache directory is used
+            disk_size : int, optional
+                The maximum number of results in the database file, if not
+                given the number is not limited
+        """
+        
+        if directory == None:
+            directory = os.path.join(QtCore.QStandardPaths.writableLocation(
+                    QtCore.QStandardPaths.GenericCacheLocation), Constants.NAME)
+        
+        self._size = size
+        self._use_disk = use_disk
+        self._directory = directory
+        self._disk_size = disk_size
+        
+        # the results in the memory, the least recently used result first
+        self._results = collections.OrderedDict()
+        # the cache is used by the fitting worker thread too
+        self._lock = threading.Lock()
+        
+        # the connection to the database file, this is created when it is
+        # used the first time
+        self._connection = None
+        # the number of results saved in the database file since the last
+        # eviction
+        self._disk_puts = 0
+    
+    @property
+    def directory(self):
+        """Get the directory of the database file"""
+        return self._directory
+    
+    def getKey(self, xdata, ydata, squid_range):
+        """Get the key of the fit of the given data, this is the hash of the
+        data, the squid range and the fit settings. The starting values are 
+        not part of the key, the fits with different starting values go to 
+        the same minimum
+        
+        Parameters
+        ----------
+            xdata, ydata : array_like of floats
+                The data to fit
+            squid_range : float
+                The squid range
+        
+        Returns
+        -------
+            String or None
+                The key or None if the data is not numeric
+        """
+        
+        try:
+            xdata = np.ascontiguousarray(xdata, dtype=float)
+            ydata = np.ascontiguousarray(ydata, dtype=float)
+            squid_range = float(squid_range)
+        except (ValueError, TypeError):
+            return None
+        
+        content_hash = hashlib.sha1()
+        content_hash.update(repr((len(xdata), len(ydata), squid_range,
+                                  self._getFitSettings())).encode("utf-8"))
+        content_hash.update(xdata.tobytes())
+        content_hash.update(ydata.tobytes())
+        
+        return content_hash.hexdigest()
+    
+    def get(self, key):
+        """Get the fit result that has been saved with the given key
+        
+        Parameters
+        ----------
+            key : String
+                The key of the FitCache.getKey()
+        
+        Returns
+        -------
+            tuple or None
+                The fit result like the datapointFit() returns it or None if
+                there is no result for this key
+        """
+        
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                return self._toResult(self._results[key])
+            
+            values = self._getFromDisk(key)
+            
+            if values is None:
+                return None
+            
+            self._putToMemory(key, values)
+        
+        return self._toResult(values)
+    
+    def put(self, key, result):
+        """Save the fit result with the given key
+        
+        Parameters
+        ----------
+            key : String
+                The key of the FitCache.getKey()
+            result : tuple
+                The fit result like the datapointFit() returns it
+        """
+        
+        values = self._toValues(result)
+        
+        with self._lock:
+            self._putToMemory(key, values)
+            self._putToDisk(key, values)
+    
+    def clear(self):
+        """Remove all the results from the memory and from the database file"""
+        
+        with self._lock:
+            self._results.clear()
+            
+            connection = self._getConnection()
+            if connection != None:
+                try:
+                    connection.execute("DELETE FROM fits")
+                    connection.commit()
+                except sqlite3.Error:
+                    pass
+    
+    def __len__(self):
+        """Get the number of results in the memory"""
+        return len(self._results)
+    
+    def _putToMemory(self, key, values):
+        """Save the values in the memory and remove the least recently used
+        values if there are too many
+        
+        Parameters
+        ----------
+            key : String
+                The key
+            values : array of floats
+                The fit result as a flat array
+        """
+        
+        self._results[key] = values
+        self._results.move_to_end(key)
+        
+        if self._size != None:
+            while len(self._results) > max(int(self._size), 0):
+                self._results.popitem(last=False)
+    
+    def _getFromDisk(self, key):
+        """Get the values of the given key from the database file
+        
+        Parameters
+        ----------
+            key : String
+                The key
+        
+        Returns
+        -------
+            array of floats or None
+                The fit result as a flat array or None if it is not saved
+        """
+        
+        connection = self._getConnection()
+        
+        if connection == None:
+            return None
+        
+        try:
+            row = connection.execute("SELECT result FROM fits WHERE key = ?",
+                                     (key, )).fetchone()
+            
+            if row == None:
+                return None
+            
+            # mark the result as used for the least recently used eviction
+            connection.execute("UPDATE fits SET used = ? WHERE key = ?",
+                               (time.time(), key))
+            connection.commit()
+        except sqlite3.Error as e:
+            self._closeConnection(e)
+            return None
+        
+        values = np.frombuffer(row[0], dtype=float)
+        
+        if len(values) != FitCache.FIT_RESULT_LENGTH:
+            return None
+        
+        return values
+    
+    def _putToDisk(self, key, values):
+        """Save the values in the database file and remove the least recently
+        used results if there are too many
+        
+        Parameters
+        ----------
+            key : String
+                The key
+            values : array of floats
+                The fit result as a flat array
+        """
+        
+        connection = self._getConnection()
+        
+        if connection == None:
+            return
+        
+        try:
+            connection.execute("INSERT OR REPLACE INTO fits (key, result, used) " +
+                               "VALUES (?, ?, ?)", (key, values.tobytes(), time.time()))
+            
+            self._disk_puts += 1
+            if self._disk_size != None and self._disk_puts >= FitCache.EVICT_INTERVAL:
+                self._disk_puts = 0
+                connection.execute("DELETE FROM fits WHERE key IN (SELECT key " +
+                                   "FROM fits ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                                   (max(int(self._disk_size), 0), ))
+            
+            connection.commit()
+        except sqlite3.Error as e:
+            self._closeConnection(e)
+    
+    def _getConnection(self):
+        """Get the connection to the database file, the database is created
+        if it does not exist
+        
+        Returns
+        -------
+            sqlite3.Connection or None
+                The connection or None if the database file is not used
+        """
+        
+        if not self._use_disk:
+            return None
+        
+        if self._connection == None:
+            filepath = os.path.join(self._directory, FitCache.FILENAME)
+            
+            try:
+                os.makedirs(self._directory, exist_ok=True)
+                
+                # the fitting processes use the same file, the results are
+                # not important enough to wait for the disk
+                self._connection = sqlite3.connect(filepath, timeout=10,
+                                                   check_same_thread=False)
+                self._connection.execute("PRAGMA journal_mode=WAL")
+                self._connection.execute("PRAGMA synchronous=OFF")
+                self._connection.execute("CREATE TABLE IF NOT EXISTS fits (key TEXT " +
+                                         "PRIMARY KEY, result BLOB, used REAL)")
+                self._connection.commit()
+            except (OSError, sqlite3.Error) as e:
+                self._closeConnection(e)
+        
+        return self._connection
+    
+    def _closeConnection(self, error):
+        """Close the connection to the database file after an error, the
+        database file is not used anymore
+        
+        Parameters
+        ----------
+            error : Exception
+                The error
+        """
+        
+        warnings.warn("The fit cache file in {} could not be used: {}".format(
+                self._directory, error))
+        
+        if self._connection != None:
+            try:
+                self._connection.close()
+            except sqlite3.Error:
+                pass
+        
+        self._connection = None
+        self._use_disk = False
+    
+    def _toValues(self, result):
+        """Convert the fit result to a flat array
+        
+        Parameters
+        ----------
+            result : tuple
+                The fit result like the datapointFit() returns it
+        
+        Returns
+        -------
+            array of floats
+                The magnetization, the magnetization error, the fit parameters
+                and the errors of the fit parameters
+        """
+        
+        values = np.array([result[0], result[1]] + list(result[2]) + list(result[3]),
+                          dtype=float)
+        values.flags.writeable = False
+        
+        return values
+    
+    def _toResult(self, values):
+        """Convert the flat array to the fit result
+        
+        Parameters
+        ----------
+            values : array of floats
+                The array of the FitCache._toValues()
+        
+        Returns
+        -------
+            tuple
+                The fit result like the datapointFit() returns it
+        """
+        
+        return (values[0], values[1], values[2:6].copy(), values[6:10].copy())
+    
+    def _getFitSettings(self):
+        """Get the fit settings, the fit results are only the same if the fit
+        settings are the same
+        
+        Returns
+        -------
+            tuple
+                The starting values and the bounds of the fit and the fit
+                method, the results of the batched fit and of the single fit
+                differ slightly so the FIT_BATCHED is a setting too
+        """
+        
+        return (Constants.FIT_STARTING_AMPLITUDE, Constants.FIT_STARTING_DRIFT,
+                Constants.FIT_STARTING_Y, Constants.FIT_STARTING_X,
+                Constants.FIT_LOWER_BOUND_AMPLITUDE, Constants.FIT_LOWER_BOUND_DRIFT,
+                Constants.FIT_LOWER_BOUND_Y, Constants.FIT_LOWER_BOUND_X,
+                Constants.FIT_UPPER_BOUND_AMPLITUDE, Constants.FIT_UPPER_BOUND_DRIFT,
+                Constants.FIT_UPPER_BOUND_Y, Constants.FIT_UPPER_BOUND_X,
+                Constants.FIT_VARIABLE_PROJECTION, Constants.FIT_VARIABLE_PROJECTION_GRID,
+                Constants.FIT_VARIABLE_PROJECTION_TOLERANCE, 
+                Constants.FIT_VARIABLE_PROJECTION_RIDGE_DISTANCE, Constants.FIT_ANALYTIC_JACOBIAN,
+                Constants.FIT_BATCHED)
\ No newline at end of file
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 21:05:43 2026
+
+@author: miile7
+"""
+
+from PyQt5 import QtCore
+
+class FittingWorker(QtCore.QObject):
+    loadingStart = QtCore.pyqtSignal(int, str, str)
+    loadingProgress = QtCore.pyqtSignal(int, str, str)
+    loadingEnd = QtCore.pyqtSignal(bool, str, str)
+    # emitted when the datapoints have been fitted and the worker has not been
+    # stopped
+    fitted = QtCore.pyqtSignal()
+    
+    finished = QtCore.pyqtSignal()
+    
+    def __init__(self, datacontainer, axes, controller, index_list = None, processes = None):
+        """Initialize the worker. The worker fits the datapoints of the
+        datacontainer that are needed for the given axes and that are not
+        fitted yet, this is used for the lazy fitting.
+        
+        Parameters
+        ----------
+            datacontainer : DataContainer
+                The datacontainer whose datapoints to fit
+            axes : list or tuple of Strings
+                The names of the data that is requested
+            controller : Controller
+                The controller
+            index_list : list or tuple, optional
+                The indices of the datapoints that are requested, if None all
+                the datapoints are requested
+            processes : int, optional
+                The number of processes to fit in, if None the
+                Constants.FIT_PROCESSES is used
+        """
+        
+        super().__init__()
+        
+        self._datacontainer = datacontainer
+        self._axes = axes
+        self._controller = controller
+        self._index_list = index_list
+        self._processes = processes
+        
+        self._stop = False
+    
+    def run(self):
+        """Run the thread. This will fit the requested datapoints of the
+        datacontainer
+        """
+        
+        self._stop = False
+        
+        # initialize the signals
+        self._datacontainer.loadingStart.connect(self.loadingStart)
+        self._datacontainer.loadingProgress.connect(self.loadingProgress)
+        self._datacontainer.loadingEnd.connect(self.loadingEnd)
+        
+        try:
+            self._datacontainer.fitDataPointsForAxes(self._axes, self._index_list,
+                                                     self._processes)
+        except Exception as e:
+            self._controller.error("Fitting data caused an error: " + str(e))
+        finally:
+            self._datacontainer.loadingStart.disconnect(self.loadingStart)
+            self._datacontainer.loadingProgress.disconnect(self.loadingProgress)
+            self._datacontainer.loadingEnd.disconnect(self.loadingEnd)
+        
+        if not self._stop:
+            self.fitted.emit()
+        
+        self.finished.emit()
+    
+    def stop(self):
+        """Stop the worker, the datapoints that are fitted at the moment are
+        fitted completely but the fitted signal is not emitted"""
+        self._stop = True
\ No newline at end of file
@@ -0,0 +1,561 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 14:05:27 2026
+
+@author: miile7
+"""
+
+from PyQt5 import QtCore
+import numpy as np
+import warnings
+import hashlib
+import json
+import os
+
+import Constants
+
+# the cache instance used by the DataContainers
+_default_cache = None
+
+def getDefaultCache():
+    """Get the ParseCache that is used by the DataContainers, this is created
+    with the Constants.PARSE_CACHE_DIRECTORY and the
+    Constants.PARSE_CACHE_MAX_SIZE when it is used the first time
+    
+    Returns
+    -------
+        ParseCache
+            The cache
+    """
+    
+    global _default_cache
+    
+    if _default_cache == None:
+        _default_cache = ParseCache(Constants.PARSE_CACHE_DIRECTORY,
+                                    Constants.PARSE_CACHE_MAX_SIZE)
+    
+    return _default_cache
+
+class ParseCache:
+    # the version of the cache files, change this if the format of the cache
+    # files or the parsing or fitting changes, older cache files are ignored
+    VERSION = 5
+    
+    # the extension of the cache files
+    EXTENSION = ".npz"
+    
+    # the columns of the data rows and of the fit rows in the cache arrays
+    DATA_ROW_COLUMNS = 5
+    FIT_ROW_COLUMNS = 4
+    
+    # the length of the fit result, the magnetization, the magnetization error,
+    # the four fit parameters and the four errors of the fit parameters
+    FIT_RESULT_LENGTH = 10
+    
+    def __init__(self, directory = None, max_size = None):
+        """Initialize the cache.
+        
+        Parameters
+        ----------
+            directory : String, optional
+                The directory to save the cache files in, if not given the
+                users cache directory is used
+            max_size : int, optional
+                The maximum size of all cache files in bytes, if the cache is
+                bigger the least recently used files are removed, if not given
+                the size is not limited
+        """
+        
+        if directory == None:
+            directory = os.path.join(QtCore.QStandardPaths.writableLocation(
+                    QtCore.QStandardPaths.GenericCacheLocation), Constants.NAME)
+        
+        self._directory = directory
+        self._max_size = max_size
+    
+    @property
+    def directory(self):
+        """Get the directory of the cache files"""
+        return self._directory
+    
+    def getCacheFilepath(self, filepath, dat_filepath = None):
+        """Get the path of the cache file for the given raw file and the
+        *.dat file
+        
+        Parameters
+        ----------
+            filepath : String
+                The path of the raw file
+            dat_filepath : String, optional
+                The path of the *.dat file
+        
+        Returns
+        -------
+            String
+                The path of the cache file
+        """
+        
+        key = os.path.abspath(filepath)
+        if isinstance(dat_filepath, str):
+            key += "\n" + os.path.abspath(dat_filepath)
+        
+        name = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        
+        return os.path.join(self._directory, name + ParseCache.EXTENSION)
+    
+    def load(self, datacontainer):
+        """Load the cached data of the file of the datacontainer to the
+        datacontainer. This fills the header, the datanames, the dataunits and
+        the datapoints with all their rows, environment variables and the fit
+        results (if they have been cached).
+        
+        Nothing is loaded if there is no cache file for the file or if the
+        cache file is outdated.
+        
+        Parameters
+        ----------
+            datacontainer : DataContainer
+                The empty datacontainer to load the data to
+        
+        Returns
+        -------
+            boolean
+                Whether the data has been loaded from the cache
+        """
+        
+        cache_filepath = self.getCacheFilepath(datacontainer.filepath,
+                                               datacontainer.dat_filepath)
+        
+        if not os.path.isfile(cache_filepath):
+            return False
+        
+        try:
+            cache = np.load(cache_filepath, allow_pickle=False)
+            
+            try:
+                meta = json.loads(str(cache["meta"]))
+                
+                if (meta["version"] != ParseCache.VERSION or
+                    meta["fit settings"] != self._getFitSettings() or
+                    not self._isValid(meta["sources"], datacontainer)):
+                    return False
+                
+                self._restore(datacontainer, meta, cache)
+            finally:
+                cache.close()
+        except (IOError, OSError, ValueError, KeyError, TypeError) as e:
+            warnings.warn("The cache file {} could not be read: {}".format(
+                    cache_filepath, e))
+            return False
+        
+        # mark the file as used for the least recently used eviction
+        try:
+            os.utime(cache_filepath)
+        except OSError:
+            pass
+        
+        return True
+    
+    def save(self, datacontainer):
+        """Save the data of the datacontainer to the cache. After saving the
+        least recently used cache files are removed if the cache is too big
+        
+        Parameters
+        ----------
+            datacontainer : DataContainer
+                The datacontainer that has been read from its file
+        
+        Returns
+        -------
+            boolean
+                Whether the cache file has been written
+        """
+        
+        cache_filepath = self.getCacheFilepath(datacontainer.filepath,
+                                               datacontainer.dat_filepath)
+        
+        try:
+            sources = [self._getSource(datacontainer.filepath)]
+            if isinstance(datacontainer.dat_filepath, str):
+                sources.append(self._getSource(datacontainer.dat_filepath))
+            
+            meta, arrays = self._serialize(datacontainer)
+            meta["version"] = ParseCache.VERSION
+            meta["fit settings"] = self._getFitSettings()
+            meta["sources"] = sources
+            
+            os.makedirs(self._directory, exist_ok=True)
+            
+            # write to a temporary file first so there are never incomplete
+            # cache files
+            temp_filepath = cache_filepath + ".tmp"
+            file = open(temp_filepath, "wb")
+            try:
+                np.savez(file, meta=np.array(json.dumps(meta)), **arrays)
+            finally:
+                file.close()
+            
+            os.replace(temp_filepath, cache_filepath)
+        except (IOError, OSError, ValueError, TypeError) as e:
+            warnings.warn("The cache file {} could not be written: {}".format(
+                    cache_filepath, e))
+            return False
+        
+        self.evict()
+        
+        return True
+    
+    def invalidate(self, filepath, dat_filepath = None):
+        """Remove the cache file of the given raw file and the *.dat file, the
+        file will be parsed again the next time it is opened
+        
+        Parameters
+        ----------
+            filepath : String
+                The path of the raw file
+            dat_filepath : String, optional
+                The path of the *.dat file
+        
+        Returns
+        -------
+            boolean
+                Whether a cache file has been removed
+        """
+        
+        cache_filepath = self.getCacheFilepath(filepath, dat_filepath)
+        
+        try:
+            os.remove(cache_filepath)
+            return True
+        except OSError:
+            return False
+    
+    def clear(self):
+        """Remove all cache files"""
+        
+        for cache_filepath, size, time in self._getCacheFiles():
+            try:
+                os.remove(cache_filepath)
+            except OSError:
+                pass
+    
+    def getSize(self):
+        """Get the size of all the cache files
+        
+        Returns
+        -------
+            int
+                The size in bytes
+        """
+        
+        return sum(size for cache_filepath, size, time in self._getCacheFiles())
+    
+    def evict(self):
+        """Remove the least recently used cache files until the size of the
+        cache is smaller than the maximum size"""
+        
+        if self._max_size == None:
+            return
+        
+        # sort by the last usage, the oldest first
+        cache_files = sorted(self._getCacheFiles(), key=lambda f: f[2])
+        total_size = sum(size for cache_filepath, size, time in cache_files)
+        
+        for cache_filepath, size, time in cache_files:
+            if total_size <= self._max_size:
+                break
+            
+            try:
+                os.remove(cache_filepath)
+                total_size -= size
+            except OSError:
+                pass
+    
+    def _getCacheFiles(self):
+        """Get all the cache files
+        
+        Returns
+        -------
+            list of tuples
+                The path, the size in bytes and the modification time of each
+                cache file
+        """
+        
+        if not os.path.isdir(self._directory):
+            return []
+        
+        cache_files = []
+        for name in os.listdir(self._directory):
+            if name.endswith(ParseCache.EXTENSION):
+                cache_filepath = os.path.join(self._directory, name)
+                
+                try:
+                    stat = os.stat(cache_filepath)
+                    cache_files.append((cache_filepath, stat.st_size, stat.st_mtime_ns))
+                except OSError:
+                    pass
+        
+        return cache_files
+    
+    def _getFitSettings(self):
+        """Get the fit settings, the cached fit results are only valid if the
+        fit settings are the same
+        
+        Returns
+        -------
+            String
+                The starting values and the bounds of the fit and the fit
+                method
+        """
+        
+        return repr((Constants.FIT_STARTING_AMPLITUDE, Constants.FIT_STARTING_DRIFT,
+                     Constants.FIT_STARTING_Y, Constants.FIT_STARTING_X,
+                     Constants.FIT_LOWER_BOUND_AMPLITUDE, Constants.FIT_LOWER_BOUND_DRIFT,
+                     Constants.FIT_LOWER_BOUND_Y, Constants.FIT_LOWER_BOUND_X,
+                     Constants.FIT_UPPER_BOUND_AMPLITUDE, Constants.FIT_UPPER_BOUND_DRIFT,
+                     Constants.FIT_UPPER_BOUND_Y, Constants.FIT_UPPER_BOUND_X,
+                     Constants.FIT_VARIABLE_PROJECTION, Constants.FIT_VARIABLE_PROJECTION_GRID,
+                     Constants.FIT_VARIABLE_PROJECTION_TOLERANCE, 
+                     Constants.FIT_VARIABLE_PROJECTION_RIDGE_DISTANCE, Constants.FIT_BATCHED,
+                     Constants.FIT_ANALYTIC_JACOBIAN, Constants.FIT_WARM_START))
+    
+    def _getSource(self, filepath):
+        """Get the key of the given file, this is the path, the size, the
+        modification time and the hash of the content
+        
+        Parameters
+        ----------
+            filepath : String
+                The path of the file
+        
+        Returns
+        -------
+            list
+                The absolute path, the size in bytes, the modification time in
+                ns and the sha1 hash of the content
+        """
+        
+        stat = os.stat(filepath)
+        
+        return [os.path.abspath(filepath), stat.st_size, stat.st_mtime_ns,
+                self._getHash(filepath)]
+    
+    def _getHash(self, filepath):
+        """Get the sha1 hash of the content of the given file
+        
+        Parameters
+        ----------
+            filepath : String
+                The path of the file
+        
+        Returns
+        -------
+            String
+                The hash as a hex string
+        """
+        
+        content_hash = hashlib.sha1()
+        
+        file = open(filepath, "rb")
+        try:
+            for chunk in iter(lambda: file.read(Constants.RAW_FILE_CHUNK_SIZE), b""):
+                content_hash.update(chunk)
+        finally:
+            file.close()
+        
+        return content_hash.hexdigest()
+    
+    def _isValid(self, sources, datacontainer):
+        """Check if the cached sources are the files of the datacontainer and
+        if the files have not changed. The content hash is only calculated if
+        the size is equal but the modification time is different.
+        
+        Parameters
+        ----------
+            sources : list
+                The cached sources, for the format check
+                ParseCache._getSource()
+            datacontainer : DataContainer
+                The datacontainer
+        
+        Returns
+        -------
+            boolean
+                Whether the cache is valid
+        """
+        
+        filepaths = [datacontainer.filepath]
+        if isinstance(datacontainer.dat_filepath, str):
+            filepaths.append(datacontainer.dat_filepath)
+        
+        if len(filepaths) != len(sources):
+            return False
+        
+        for filepath, (cached_path, size, mtime, content_hash) in zip(filepaths, sources):
+            if not os.path.isfile(filepath) or os.path.abspath(filepath) != cached_path:
+                return False
+            
+            stat = os.stat(filepath)
+            
+            if stat.st_size != size:
+                return False
+            elif stat.st_mtime_ns != mtime and self._getHash(filepath) != content_hash:
+                return False
+        
+        return True
+    
+    def _serialize(self, datacontainer):
+        """Convert the datacontainer to the json compatible meta data and the
+        arrays to save
+        
+        Parameters
+        ----------
+            datacontainer : DataContainer
+                The datacontainer
+        
+        Returns
+        -------
+            dict
+                The meta data
+            dict
+                The arrays with their names as the keys
+        """
+        
+        meta = {
+            "header": datacontainer.header,
+            "datanames": list(datacontainer.datanames),
+            "dataunits": list(datacontainer.dataunits),
+            "fitting not possible": bool(datacontainer.fitting_not_possible),
+            "tail state": None,
+            "datapoints": []
+        }
+        
+        if datacontainer._tail_state != None:
+            # the replace values are created again when they are needed
+            meta["tail state"] = {key: value for key, value 
+                                  in datacontainer._tail_state.items()
+                                  if key != "replace values"}
+        
+        arrays = {}
+        rows = {"data": [], "fixed": [], "free": []}
+        empty = {"data": [], "fixed": [], "free": []}
+        offsets = {"data": [0], "fixed": [0], "free": [0]}
+        fits = []
+        fitted = []
+        
+        for datapoint in datacontainer.datapoints:
+            datapoint_meta = {
+                "environment variables": [[variables, linenumber] for variables, linenumber
+                                          in datapoint._environment_variables],
+                "fitting not possible": bool(datapoint.fitting_not_possible),
+                "disabled": bool(datapoint.disabled),
+                "comments": {}
+            }
+            
+            for name, datapoint_rows in (("data", datapoint._data_rows),
+                                         ("fixed", datapoint._fixed_c_fit),
+                                         ("free", datapoint._free_c_fit)):
+                valid = datapoint_rows.getValidMask()
+                
+                # the values of the empty rows are zero, the comments are 
+                # saved in the meta data
+                values = np.column_stack([datapoint_rows.getColumn(i) for i 
+                                          in range(len(datapoint_rows.column_types))
+                                          if i != 1]).astype(float)
+                values[~valid] = 0
+                
+                comments = {}
+                for i, comment in enumerate(datapoint_rows.getColumn(1)):
+                    if valid[i] and comment != "":
+                        comments[i] = comment
+                
+                rows[name].append(values)
+                empty[name].append(~valid)
+                offsets[name].append(offsets[name][-1] + len(datapoint_rows))
+                datapoint_meta["comments"][name] = comments
+            
+            fit = datapoint._raw_pos_fit
+            if isinstance(fit, (list, tuple)) and len(fit) == 4:
+                fits.append([fit[0], fit[1]] + list(fit[2]) + list(fit[3]))
+                fitted.append(True)
+            else:
+                fits.append([np.nan] * ParseCache.FIT_RESULT_LENGTH)
+                fitted.append(False)
+            
+            meta["datapoints"].append(datapoint_meta)
+        
+        for name in rows:
+            if name == "data":
+                columns = ParseCache.DATA_ROW_COLUMNS
+            else:
+                columns = ParseCache.FIT_ROW_COLUMNS
+            
+            arrays[name + "_rows"] = np.concatenate(
+                    [np.empty((0, columns))] + rows[name]).reshape(-1, columns)
+            arrays[name + "_empty"] = np.concatenate(
+                    [np.empty(0, dtype=bool)] + empty[name])
+            arrays[name + "_offsets"] = np.array(offsets[name], dtype=np.int64)
+        
+        arrays["fits"] = np.array(fits, dtype=float).reshape(-1, ParseCache.FIT_RESULT_LENGTH)
+        arrays["fitted"] = np.array(fitted, dtype=bool)
+        
+        return meta, arrays
+    
+    def _restore(self, datacontainer, meta, cache):
+        """Fill the datacontainer with the cached data
+        
+        Parameters
+        ----------
+            datacontainer : DataContainer
+                The datacontainer to fill
+            meta : dict
+                The meta data
+            cache : NpzFile
+                The cached arrays
+        """
+        
+        datacontainer.header = meta["header"]
+        datacontainer.datanames = meta["datanames"]
+        datacontainer.dataunits = meta["dataunits"]
+        datacontainer.fitting_not_possible = meta["fitting not possible"]
+        datacontainer._tail_state = meta["tail state"]
+        
+        arrays = {}
+        for name in ("data", "fixed", "free"):
+            arrays[name] = (cache[name + "_rows"], cache[name + "_empty"],
+                            cache[name + "_offsets"])
+        
+        fits = cache["fits"]
+        fitted = cache["fitted"]
+        
+        for index, datapoint_meta in enumerate(meta["datapoints"]):
+            datapoint = datacontainer._getCurrentDataPoint(True)
+            
+            for variables, linenumber in datapoint_meta["environment variables"]:
+                datapoint.addEnvironmentVariables(variables, linenumber)
+            
+            for name in ("data", "fixed", "free"):
+                values, empty, offsets = arrays[name]
+                start, end = offsets[index], offsets[index + 1]
+                comments = datapoint_meta["comments"][name]
+                
+                columns = values[start:end].T
+                
+                if name == "data":
+                    datapoint_rows = datapoint._data_rows
+                elif name == "fixed":
+                    datapoint_rows = datapoint._fixed_c_fit
+                else:
+                    datapoint_rows = datapoint._free_c_fit
+                
+                datapoint_rows.appendColumns(
+                        [columns[0].astype(np.int64),
+                         [comments.get(str(i), "") for i in range(end - start)]] + 
+                        list(columns[1:]), ~empty[start:end])
+            
+            if fitted[index]:
+                fit = fits[index]
+                datapoint._raw_pos_fit = (fit[0], fit[1], fit[2:6].copy(), fit[6:10].copy())
+            
+            datapoint.fitting_not_possible = datapoint_meta["fitting not possible"]
+            datapoint.disabled = datapoint_meta["disabled"]
\ No newline at end of file
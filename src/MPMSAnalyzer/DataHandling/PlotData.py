@@ -321,6 +321,81 @@ class PlotData:
         else:
             return False
     
+    def mergePlotData(self, plot_data, append = True):
+        """Add the values of the given plot data to this plot data. Both plot
+        data objects have to come from the same origin with the same axis. The
+        values of the datapoint indices that are in this plot data already are
+        replaced, the other values are appended if append is True.
+        Parameters
+        ----------
+            plot_data : PlotData
+                The plot data with the new values
+            append : boolean, optional
+                Whether to append the values of new datapoint indices
+        Returns
+        -------
+            boolean
+                Whether this plot data has been changed
+        """
+        
+        if (not isinstance(self._indices_list, (list, tuple)) or
+            not isinstance(plot_data.indices_list, (list, tuple))):
+            return False
+        
+        indices = list(self._indices_list)
+        
+        # the lists to change and the lists with the new values, the errors
+        # and the sorting list may not be set
+        lists = []
+        for own_list, new_list in ((self._x, plot_data._x),
+                                   (self._y, plot_data._y),
+                                   (self._x_errors, plot_data._x_errors),
+                                   (self._y_errors, plot_data._y_errors),
+                                   (self._sorting_list, plot_data._sorting_list)):
+            if (my_utilities.is_iterable(own_list) and my_utilities.is_iterable(new_list) and
+                len(own_list) == len(indices) and len(new_list) == len(plot_data.indices_list)):
+                lists.append((list(own_list), new_list))
+            else:
+                lists.append((None, None))
+        
+        if lists[0][0] == None or lists[1][0] == None:
+            return False
+        
+        changed = False
+        for i, index in enumerate(plot_data.indices_list):
+            if index in indices:
+                position = indices.index(index)
+            elif append:
+                position = len(indices)
+                indices.append(index)
+            else:
+                continue
+            
+            for own_list, new_list in lists:
+                if own_list == None:
+                    continue
+                elif position < len(own_list):
+                    own_list[position] = new_list[i]
+                else:
+                    own_list.append(new_list[i])
+            
+            changed = True
+        
+        self._x, self._y = lists[0][0], lists[1][0]
+        
+        if lists[2][0] != None:
+            self._x_errors = lists[2][0]
+        if lists[3][0] != None:
+            self._y_errors = lists[3][0]
+        if lists[4][0] != None:
+            self._sorting_list = lists[4][0]
+        else:
+            self._sorting_list = None
+        
+        self._indices_list = indices
+        
+        return changed
+    
     def getOriginFilePath(self, basename = True):
         """Get the filepath of the origin where this plot data comes from.
         Parameters
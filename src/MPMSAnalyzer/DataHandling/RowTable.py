@@ -0,0 +1,447 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 19:24:37 2026
+
+@author: miile7
+"""
+
+import numpy as np
+
+class RowTable:
+    # the value that is returned for rows that are not valid, this is the same
+    # as the DataPoint.EMPTY_ROW
+    EMPTY_ROW = "empty"
+    
+    # the number of rows to reserve when the first row is added
+    MINIMUM_CAPACITY = 64
+    
+    def __init__(self, column_types):
+        """Create an empty table of rows. The values are saved column wise,
+        each column is a numpy array, the columns are over allocated so
+        appending rows is cheap. Invalid (empty) rows are marked in a mask.
+        
+        The table behaves like the list of row tuples that has been used
+        before: Iterating and indexing returns the rows as tuples of python
+        types (or the RowTable.EMPTY_ROW for empty rows), rows can be appended
+        and set. String columns are interned, the column only contains the
+        index of the string in a list of the unique strings.
+        
+        Parameters
+        ----------
+            column_types : tuple of types
+                The type of each column, this can be int, float or str
+        """
+        
+        # the types of the columns
+        self._column_types = tuple(column_types)
+        # the number of rows that are used
+        self._length = 0
+        # the columns, the length of each column is the capacity, only the
+        # first _length values are used, string columns contain the indices
+        # of the strings in the _strings list
+        self._columns = [np.empty(0, dtype=self._getDtype(t))
+                         for t in self._column_types]
+        # whether the row is valid, empty rows are False
+        self._valid = np.empty(0, dtype=bool)
+        # the unique strings of each string column and the index of each
+        # string in the list, None for columns that are no string columns
+        self._strings = [[] if t == str else None for t in self._column_types]
+        self._string_indices = [{} if t == str else None for t in self._column_types]
+        # whether the columns and the strings are shared with another table,
+        # they are copied before they are modified (copy on write), see 
+        # RowTable.copy()
+        self._shared = False
+    
+    @property
+    def column_types(self):
+        """Get the types of the columns"""
+        return self._column_types
+    
+    def _getDtype(self, column_type):
+        """Get the numpy dtype to save the given column type in
+        
+        Parameters
+        ----------
+            column_type : type
+                The type of the column
+        
+        Returns
+        -------
+            numpy.dtype
+                The dtype of the numpy array
+        """
+        
+        if column_type == int:
+            return np.int64
+        elif column_type == str:
+            return np.int32
+        else:
+            return np.float64
+    
+    def _reserve(self, length):
+        """Make sure that the table can hold length rows without reallocating
+        the columns
+        
+        Parameters
+        ----------
+            length : int
+                The number of rows to reserve
+        """
+        
+        capacity = len(self._valid)
+        
+        if length <= capacity:
+            return
+        
+        capacity = max(length, 2 * capacity, RowTable.MINIMUM_CAPACITY)
+        
+        for i, column in enumerate(self._columns):
+            new_column = np.empty(capacity, dtype=column.dtype)
+            new_column[:self._length] = column[:self._length]
+            self._columns[i] = new_column
+        
+        valid = np.zeros(capacity, dtype=bool)
+        valid[:self._length] = self._valid[:self._length]
+        self._valid = valid
+    
+    def _unshare(self):
+        """Copy the columns and the strings if they are shared with another
+        table, this has to be called before the table is modified"""
+        
+        if not self._shared:
+            return
+        
+        self._columns = [column.copy() for column in self._columns]
+        self._valid = self._valid.copy()
+        self._strings = [None if strings == None else list(strings)
+                         for strings in self._strings]
+        self._string_indices = [None if indices == None else dict(indices)
+                                for indices in self._string_indices]
+        self._shared = False
+    
+    def _internString(self, column, value):
+        """Get the index of the value in the unique strings of the column,
+        the value is added if it does not exist yet
+        
+        Parameters
+        ----------
+            column : int
+                The index of the string column
+            value : String
+                The string
+        
+        Returns
+        -------
+            int
+                The index of the string
+        """
+        
+        indices = self._string_indices[column]
+        value = str(value)
+        
+        if value not in indices:
+            indices[value] = len(self._strings[column])
+            self._strings[column].append(value)
+        
+        return indices[value]
+    
+    def _setRow(self, index, row):
+        """Set the values of the row with the given index
+        
+        Parameters
+        ----------
+            index : int
+                The positive index of the row
+            row : tuple or RowTable.EMPTY_ROW
+                The values of the row
+        """
+        
+        if not isinstance(row, (list, tuple)):
+            self._valid[index] = False
+            
+            for column in self._columns:
+                column[index] = 0
+            return
+        
+        if len(row) != len(self._column_types):
+            raise ValueError(("The row has {} values but the table has {} " +
+                              "columns").format(len(row), len(self._column_types)))
+        
+        for i, (column_type, value) in enumerate(zip(self._column_types, row)):
+            if column_type == str:
+                self._columns[i][index] = self._internString(i, value)
+            else:
+                self._columns[i][index] = value
+        
+        self._valid[index] = True
+    
+    def _getRowIndex(self, index):
+        """Get the positive index of the row
+        
+        Raises
+        ------
+            IndexError
+                If the index is out of range
+        
+        Parameters
+        ----------
+            index : int
+                The index, negative indices are counted from the end
+        
+        Returns
+        -------
+            int
+                The positive index
+        """
+        
+        if index < 0:
+            index += self._length
+        
+        if index < 0 or index >= self._length:
+            raise IndexError("The row index is out of range")
+        
+        return index
+    
+    def __len__(self):
+        """Get the number of rows including the empty rows"""
+        return self._length
+    
+    def __getitem__(self, index):
+        """Get the row with the given index as a tuple of python types or the
+        RowTable.EMPTY_ROW if the row is empty"""
+        
+        index = self._getRowIndex(index)
+        
+        if not self._valid[index]:
+            return RowTable.EMPTY_ROW
+        
+        row = []
+        for i, column_type in enumerate(self._column_types):
+            value = self._columns[i][index].item()
+            
+            if column_type == str:
+                value = self._strings[i][value]
+            
+            row.append(value)
+        
+        return tuple(row)
+    
+    def __setitem__(self, index, row):
+        """Set the row with the given index, the row can be a tuple or the
+        RowTable.EMPTY_ROW"""
+        
+        self._unshare()
+        self._setRow(self._getRowIndex(index), row)
+    
+    def __iter__(self):
+        """Iterate over the rows, the columns are converted at once"""
+        
+        columns = [self.getColumn(i).tolist() for i in range(len(self._columns))]
+        
+        for valid, row in zip(self._valid[:self._length].tolist(), zip(*columns)):
+            if valid:
+                yield row
+            else:
+                yield RowTable.EMPTY_ROW
+    
+    def __deepcopy__(self, memo):
+        """Implements the deepcopy interface, the copy shares the columns
+        until it is modified"""
+        
+        return self.copy()
+    
+    def copy(self):
+        """Get a copy of this table. The copy shares the columns with this
+        table until one of the tables is modified (copy on write), so copying
+        is cheap
+        
+        Returns
+        -------
+            RowTable
+                The copy
+        """
+        
+        table = RowTable.__new__(RowTable)
+        table._column_types = self._column_types
+        table._length = self._length
+        table._columns = list(self._columns)
+        table._valid = self._valid
+        table._strings = self._strings
+        table._string_indices = self._string_indices
+        
+        table._shared = True
+        self._shared = True
+        
+        return table
+    
+    def append(self, row):
+        """Append a row
+        
+        Parameters
+        ----------
+            row : tuple or RowTable.EMPTY_ROW
+                The values of the row
+        """
+        
+        self._unshare()
+        self._reserve(self._length + 1)
+        self._length += 1
+        self._setRow(self._length - 1, row)
+    
+    def extend(self, rows):
+        """Append all the rows
+        
+        Parameters
+        ----------
+            rows : iterable
+                The rows to append
+        """
+        
+        for row in rows:
+            self.append(row)
+    
+    def appendColumns(self, columns, valid = None):
+        """Append multiple rows that are given column wise
+        
+        Parameters
+        ----------
+            columns : list of array_like
+                The values of each column, all of them have to have the same
+                length
+            valid : array_like of boolean, optional
+                Whether the rows are valid, all rows are valid if this is None
+        """
+        
+        if len(columns) != len(self._column_types):
+            raise ValueError(("There are {} columns given but the table has " +
+                              "{} columns").format(len(columns), len(self._column_types)))
+        
+        length = len(columns[0])
+        start = self._length
+        self._unshare()
+        self._reserve(start + length)
+        
+        for i, (column_type, values) in enumerate(zip(self._column_types, columns)):
+            if column_type == str:
+                values = [self._internString(i, value) for value in values]
+            
+            self._columns[i][start:start + length] = values
+        
+        if valid is None:
+            self._valid[start:start + length] = True
+        else:
+            self._valid[start:start + length] = valid
+        
+        self._length += length
+    
+    def getColumn(self, column):
+        """Get the values of the column for all rows, the values of empty rows
+        are undefined. Numeric columns are returned as a view, string columns
+        as an object array of the interned strings
+        
+        Parameters
+        ----------
+            column : int
+                The index of the column
+        
+        Returns
+        -------
+            array
+                The values
+        """
+        
+        values = self._columns[column][:self._length]
+        
+        if self._column_types[column] == str:
+            values = np.array(self._strings[column] + [""], dtype=object)[values]
+        
+        return values
+    
+    def getValidColumn(self, column):
+        """Get the values of the column for the valid rows only. If there are
+        no empty rows numeric columns are returned as a view
+        
+        Parameters
+        ----------
+            column : int
+                The index of the column
+        
+        Returns
+        -------
+            array
+                The values
+        """
+        
+        values = self.getColumn(column)
+        
+        if self.hasEmptyRows():
+            values = values[self.getValidMask()]
+        
+        return values
+    
+    def setValidColumn(self, column, values):
+        """Set the values of the column for the valid rows
+        
+        Parameters
+        ----------
+            column : int
+                The index of the column
+            values : array_like
+                The values, one for each valid row
+        """
+        
+        self._unshare()
+        
+        if self._column_types[column] == str:
+            values = [self._internString(column, value) for value in values]
+        
+        self._columns[column][:self._length][self.getValidMask()] = values
+    
+    def getValidMask(self):
+        """Get whether the rows are valid, empty rows are False
+        
+        Returns
+        -------
+            array of boolean
+                The valid mask
+        """
+        
+        return self._valid[:self._length]
+    
+    def hasEmptyRows(self):
+        """Get whether there are empty rows
+        
+        Returns
+        -------
+            boolean
+                Whether at least one row is empty
+        """
+        
+        return not np.all(self.getValidMask())
+    
+    def select(self, mask):
+        """Get a new table containing the rows where the mask is True
+        
+        Parameters
+        ----------
+            mask : array of boolean
+                Whether to use the row, one value for each row
+        
+        Returns
+        -------
+            RowTable
+                The new table
+        """
+        
+        mask = np.asarray(mask, dtype=bool)
+        
+        table = RowTable(self._column_types)
+        table._length = int(np.count_nonzero(mask))
+        table._columns = [column[:self._length][mask] for column in self._columns]
+        table._valid = self.getValidMask()[mask]
+        table._strings = [None if strings == None else list(strings)
+                          for strings in self._strings]
+        table._string_indices = [None if indices == None else dict(indices)
+                                 for indices in self._string_indices]
+        
+        return table
\ No newline at end of file
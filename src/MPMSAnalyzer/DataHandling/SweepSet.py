@@ -0,0 +1,360 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 23:41:26 2026
+
+@author: miile7
+"""
+
+import numpy as np
+
+import my_utilities
+
+class SweepSet:
+    def __init__(self, rows):
+        """Create the set of the background sweeps to interpolate in. Each row
+        is a tuple of the control value (e.g. the temperature), the x and y
+        data of the sweep and the environment variables like they are created
+        in the calculation.createInterpolationRanges(), the rows have to be
+        sorted by the control value.
+        
+        The control values are saved in an array, the raw positions and the
+        raw voltages are saved in 2-D arrays with one row for each sweep
+        (control value × position), sweeps that are shorter than the longest
+        sweep are padded with NaN. This way the brackets of a value can be
+        found by a binary search and all the positions are interpolated at
+        once.
+        
+        Parameters
+        ----------
+            rows : list of tuples
+                The control value, the x and y data and the environment
+                variables of each sweep, sorted by the control value
+        """
+        
+        rows = list(rows)
+        
+        # the control values, e.g. the temperatures
+        self._controls = np.array([row[0] for row in rows], dtype=float)
+        # the x and y data of each sweep as they are given, this is used for
+        # the positions that cannot be interpolated, see SweepSet.interpolate()
+        self._xydata = [row[1] for row in rows]
+        # the environment variables of each sweep
+        self._environment_variables = [row[2] for row in rows]
+        
+        # the number of positions and voltages of each sweep
+        self._position_lengths = np.array([len(xydata[0]) for xydata in self._xydata],
+                                          dtype=int)
+        self._voltage_lengths = np.array([len(xydata[1]) for xydata in self._xydata],
+                                         dtype=int)
+        
+        width = max(self._position_lengths.max(initial=0),
+                    self._voltage_lengths.max(initial=0))
+        
+        # the positions and the voltages, one row for each sweep
+        self._positions = np.full((len(rows), width), np.nan)
+        self._voltages = np.full((len(rows), width), np.nan)
+        
+        for i, xydata in enumerate(self._xydata):
+            self._positions[i, :self._position_lengths[i]] = my_utilities.force_float_array(xydata[0])
+            self._voltages[i, :self._voltage_lengths[i]] = my_utilities.force_float_array(xydata[1])
+        
+        self._updateSorted()
+    
+    @property
+    def controls(self):
+        """Get the control values of the sweeps"""
+        return self._controls
+    
+    @property
+    def environment_variables(self):
+        """Get the environment variables of the sweeps"""
+        return self._environment_variables
+    
+    def __len__(self):
+        """Get the number of sweeps"""
+        return len(self._controls)
+    
+    def _updateSorted(self):
+        """Save whether the control values are sorted and do not contain NaN,
+        only then the binary search can be used"""
+        
+        self._sorted = bool(np.all(self._controls[:-1] <= self._controls[1:]))
+    
+    def _getXYData(self, index):
+        """Get the x and y data of the sweep with the given index
+        
+        Parameters
+        ----------
+            index : int
+                The index of the sweep
+        
+        Returns
+        -------
+            tuple of lists
+                The x and y data
+        """
+        
+        if self._xydata != None:
+            return self._xydata[index]
+        else:
+            return (self._positions[index, :self._position_lengths[index]].tolist(),
+                    self._voltages[index, :self._voltage_lengths[index]].tolist())
+    
+    def findIndex(self, value):
+        """Get the index of the first sweep whose control value is not smaller
+        than the given value
+        
+        Parameters
+        ----------
+            value : float
+                The control value
+        
+        Returns
+        -------
+            int
+                The index or the number of sweeps if all the control values
+                are smaller
+        """
+        
+        if self._sorted and not np.isnan(value):
+            return int(np.searchsorted(self._controls, value, side="left"))
+        
+        not_smaller = ~(self._controls < value)
+        
+        if np.any(not_smaller):
+            return int(np.argmax(not_smaller))
+        else:
+            return len(self._controls)
+    
+    def findClosestIndices(self, values):
+        """Get the indices of the sweeps whose control values are the closest
+        to the given values, if there are multiple sweeps with the same
+        distance the first one is used
+        
+        Raises
+        ------
+            ValueError
+                If there are no sweeps
+        
+        Parameters
+        ----------
+            values : array_like of float
+                The control values
+        
+        Returns
+        -------
+            array of int
+                The index of the closest sweep for each value
+        """
+        
+        values = np.asarray(values, dtype=float)
+        
+        if len(values) == 0:
+            return np.zeros(0, dtype=int)
+        elif len(self._controls) == 0:
+            raise ValueError("There are no sweeps to find the closest sweep in")
+        
+        if not self._sorted:
+            controls = self._controls.tolist()
+            
+            return np.array([min(range(len(controls)), key=lambda i: abs(controls[i] - value))
+                             for value in values.tolist()], dtype=int)
+        
+        # the closest control value is either the last smaller or the first
+        # bigger one
+        right = np.searchsorted(self._controls, values, side="left")
+        left = np.maximum(right - 1, 0)
+        right = np.minimum(right, len(self._controls) - 1)
+        
+        left_distances = np.abs(self._controls[left] - values)
+        right_distances = np.abs(self._controls[right] - values)
+        
+        indices = np.where(right_distances < left_distances, right, left)
+        distances = np.minimum(left_distances, right_distances)
+        
+        # NaN is not closer to any value, the first one is used
+        indices[np.isnan(values)] = 0
+        
+        # equal control values (or values that have the same distance after
+        # rounding) are next to each other, use the first one
+        while True:
+            previous = np.maximum(indices - 1, 0)
+            step = (indices > 0) & (np.abs(self._controls[previous] - values) == distances)
+            
+            if not np.any(step):
+                break
+            
+            indices[step] -= 1
+        
+        return indices
+    
+    def _getLowerIndex(self, index):
+        """Get the index of the last sweep before the given index that has a
+        different control value than the sweep at the index
+        
+        Parameters
+        ----------
+            index : int
+                The index of the sweep
+        
+        Returns
+        -------
+            int
+                The index, this is -1 if there is no sweep with a different
+                control value before
+        """
+        
+        if self._sorted:
+            return int(np.searchsorted(self._controls, self._controls[index], side="left")) - 1
+        
+        i = index - 1
+        while i >= 0 and i < len(self._controls) and self._controls[i] == self._controls[index]:
+            i -= 1
+        
+        return i
+    
+    def interpolate(self, target, index):
+        """Interpolate linearly between the sweep at the index and the last
+        sweep before with a different control value to get the raw voltages
+        at the target control value. The raw positions are taken from the
+        sweep at the index.
+        
+        The voltages are interpolated for all positions at once. Only the
+        positions that exist in both sweeps are interpolated, the positions
+        after are handled like the interpolation over each position did it
+        before.
+        
+        Parameters
+        ----------
+            target : float
+                The control value to interpolate to
+            index : int
+                The index of the sweep to interpolate with
+        
+        Returns
+        -------
+            array of float, array of float
+                The raw positions and the raw voltages
+        """
+        
+        lower = self._getLowerIndex(index)
+        
+        x1 = self._controls[lower]
+        x2 = self._controls[index]
+        
+        # the number of positions that exist in both sweeps
+        length = min(self._voltage_lengths[lower], self._voltage_lengths[index])
+        vector_length = min(length, self._position_lengths[index])
+        
+        y1 = self._voltages[lower, :vector_length]
+        y2 = self._voltages[index, :vector_length]
+        
+        # the slope and the y intercept
+        m = (y2 - y1) / (x2 - x1)
+        t = y1 - m * x1
+        
+        positions = self._positions[index, :vector_length]
+        voltages = m * target + t
+        
+        count = max(self._position_lengths[lower], self._voltage_lengths[lower],
+                    self._position_lengths[index], self._voltage_lengths[index])
+        
+        # the positions after the vector_length can only be added for the
+        # first two positions or if the sweep at the index has less positions
+        # than voltages, this is the same as the interpolation over each
+        # position did it
+        end = min(count, max(length, 2))
+        
+        if vector_length < end:
+            y1_values = self._getXYData(lower)
+            y2_values = self._getXYData(index)
+            result = []
+            
+            for i in range(vector_length, end):
+                if i < len(y1_values[1]) and i < len(y2_values[1]):
+                    m = (y2_values[1][i] - y1_values[1][i]) / (x2 - x1)
+                    t = y1_values[1][i] - m * x1
+                    y = m * target + t
+                elif i < len(y1_values):
+                    y = y1_values
+                elif i < len(y2_values):
+                    y = y2_values
+                else:
+                    continue
+                
+                if i < len(y2_values[0]):
+                    x = y2_values[0][i]
+                elif i < len(y1_values[1]):
+                    x = y2_values[1][i]
+                else:
+                    x = None
+                
+                if x != None and y != None:
+                    result.append((my_utilities.force_float(x, True),
+                                   my_utilities.force_float(y, True)))
+            
+            if len(result) > 0:
+                x, y = zip(*result)
+                positions = np.concatenate((positions, x))
+                voltages = np.concatenate((voltages, y))
+        
+        return positions, voltages
+    
+    def interpolateSweepSet(self, sweep_set, value, sweep_set_value, target, environment_variables):
+        """Create a new sweep set at the target value of the static variable
+        (e.g. the field) by interpolating linearly between the sweeps of this
+        sweep set and the given sweep_set. Each sweep of this sweep set is
+        interpolated with the sweep with the closest control value in the
+        sweep_set, all sweeps are interpolated at once. The new sweeps have
+        the control values of this sweep set and the raw positions of the
+        given sweep_set.
+        
+        Parameters
+        ----------
+            sweep_set : SweepSet
+                The sweep set to interpolate with
+            value, sweep_set_value : float
+                The static value of this sweep set and of the sweep_set
+            target : float
+                The static value to interpolate to
+            environment_variables : list
+                The environment variables of each new sweep
+        
+        Returns
+        -------
+            SweepSet
+                The interpolated sweep set
+        """
+        
+        indices = sweep_set.findClosestIndices(self._controls)
+        
+        width = min(self._voltages.shape[1], sweep_set._voltages.shape[1])
+        
+        y1 = self._voltages[:, :width]
+        y2 = sweep_set._voltages[indices, :width]
+        
+        # the slope and the y intercept
+        m = (y2 - y1) / (sweep_set_value - value)
+        t = y1 - m * value
+        
+        voltage_lengths = np.minimum(self._voltage_lengths, sweep_set._voltage_lengths[indices])
+        position_lengths = np.minimum(voltage_lengths, sweep_set._position_lengths[indices])
+        
+        voltages = m * target + t
+        positions = sweep_set._positions[indices, :width]
+        
+        # the values after the lengths are not defined
+        voltages[np.arange(width) >= voltage_lengths[:, np.newaxis]] = np.nan
+        positions[np.arange(width) >= position_lengths[:, np.newaxis]] = np.nan
+        
+        interpolated = SweepSet.__new__(SweepSet)
+        interpolated._controls = self._controls.copy()
+        interpolated._xydata = None
+        interpolated._environment_variables = list(environment_variables)
+        interpolated._position_lengths = position_lengths
+        interpolated._voltage_lengths = voltage_lengths
+        interpolated._positions = positions
+        interpolated._voltages = voltages
+        interpolated._updateSorted()
+        
+        return interpolated
\ No newline at end of file
@@ -65,6 +65,10 @@ class ToolWorker(QtCore.QObject):
                 try:
                     self.return_values.append(self._handler[self._step](*self._params[self._step]))
                 except Exception as e:
+                    # the warnings may tell the reason of the error
+                    if len(ws) > 0:
+                        self.warning.emit(ws)
+                    
                     self.error.emit(e)
                     raise e
                 
@@ -14,6 +14,8 @@ import time
 
 import DataHandling.DataContainer
 import DataHandling.DataPoint
+import DataHandling.FitCache
+import DataHandling.SweepSet
 import my_utilities
 import Constants
 
@@ -43,15 +45,35 @@ def dipolfunction(x, A = -1, B = 0, C = 0, D = 0):
             The y value for the given x value with the parameters A, B, C and D
     """
     
-    radius = 8.3654 # Spulenradius
-    space  = 7.960  # Spulenabstand  
     posint = 1.0 * (x - D) #30.8, relative Position bezogen auf das Peakzentrum  
     
-    x1 = singleturn(radius,-space, posint) # der Uebersichtlichkeit halber in separater funktion 'singleturn' ermittelt
-    x2 = singleturn(radius,     0, posint)
-    x3 = singleturn(radius, space, posint)
+    # the three turns are evaluated in the dipolShape(), this works for floats
+    # and for numpy arrays
+    return A * dipolShape(posint) + B * posint + C # fuer Dipol ermittelter, theoretischer Spannungsverlauf   
+
+def dipolJacobian(x, A = -1, B = 0, C = 0, D = 0):
+    """The jacobian of the dipolfunction, this is the derivative of the 
+    dipolfunction by each of the parameters A, B, C and D for each x value
+    
+    Parameters
+    ----------
+        x : array of floats
+            The x axis values
+        A, B, C, D : float or array of floats
+            The parameters of the dipolfunction, arrays have to be 
+            broadcastable to the x values
+    
+    Returns
+    -------
+        array of floats
+            The derivatives, the shape is x.shape + (4,)
+    """
+    
+    posint = np.asarray(x, dtype=float) - D
+    shape, derivative = dipolShape(posint, True)
     
-    return A * ((-x1 + 2*x2 - x3)) + B * posint + C # fuer Dipol ermittelter, theoretischer Spannungsverlauf   
+    return np.stack((shape, posint, np.ones_like(posint), -A * derivative - B), 
+                    axis=-1)
 
 def singleturn(cradius, cspace, z):
     """Singleturn method for the dipolfunction, this is used for creating the
@@ -60,16 +82,364 @@ def singleturn(cradius, cspace, z):
     
     return cradius**2 / pow(cradius**2 + (z-cspace)**2.0, 1.5)
 
-def datapointFit(xdata, ydata, squid_range):
+def hasLinearParameterBounds():
+    """Get whether one of the Constants.FIT_*_BOUND_AMPLITUDE, 
+    Constants.FIT_*_BOUND_DRIFT or Constants.FIT_*_BOUND_Y is finite. The 
+    variable projection solves these parameters linearly, it cannot keep them
+    in their bounds, so the datapointFitCurveFit() has to be used then
+    
+    Returns
+    -------
+        boolean
+            Whether the amplitude, the drift or the offset is bounded
+    """
+    
+    bounds = (Constants.FIT_LOWER_BOUND_AMPLITUDE, Constants.FIT_LOWER_BOUND_DRIFT,
+              Constants.FIT_LOWER_BOUND_Y, Constants.FIT_UPPER_BOUND_AMPLITUDE, 
+              Constants.FIT_UPPER_BOUND_DRIFT, Constants.FIT_UPPER_BOUND_Y)
+    
+    return bool(np.any(np.isfinite(np.asarray(bounds, dtype=float))))
+
+def isVariableProjectionUsed():
+    """Get whether the datapoints are fitted by the variable projection, this
+    is the Constants.FIT_VARIABLE_PROJECTION if the amplitude, the drift and
+    the offset are not bounded (see the hasLinearParameterBounds())
+    
+    Returns
+    -------
+        boolean
+            Whether to use the datapointFitVariableProjection()
+    """
+    
+    return Constants.FIT_VARIABLE_PROJECTION and not hasLinearParameterBounds()
+
+def datapointFit(xdata, ydata, squid_range, starting_values = None):
     """Fit the xdata and ydata to the dipolfunction. This function will be called
     in the DataHandling.DataContainer when fitDataPoints() function is being called.
     
+    If the isVariableProjectionUsed() returns True the fit is done by the
+    datapointFitVariableProjection(), otherwise by the datapointFitCurveFit().
+    The starting_values are used by the datapointFitCurveFit() only, if the
+    fit with the starting_values fails it is repeated with the 
+    Constants.FIT_STARTING_* values.
+    
+    If the Constants.FIT_CACHE is True the results are saved in the 
+    DataHandling.FitCache, the same data is not fitted again then (also not 
+    with other starting_values)
+    
     Parameters
     ----------
         xdata, ydata: list of float
             The x and y data as a list
         squid_range: int
             The squid range for the given datapoint
+        starting_values : list of float, optional
+            The parameters A, B, C and D to start the fit at (for example the
+            results of the previous datapoint), if None the 
+            Constants.FIT_STARTING_* values are used
+    
+    Returns
+    -------
+        float, float, list, list
+            The magnetization in emu, the error of the magnetization in emu,
+            the result array for all the fit parameters, the errorrs for every
+            fit parameter
+    """
+    
+    key = None
+    
+    if Constants.FIT_CACHE:
+        cache = DataHandling.FitCache.getDefaultCache()
+        key = cache.getKey(xdata, ydata, squid_range)
+        
+        if key != None:
+            result = cache.get(key)
+            
+            if result != None:
+                return result
+    
+    result = None
+    
+    if isVariableProjectionUsed():
+        result = datapointFitVariableProjection(xdata, ydata, squid_range)
+    elif starting_values is not None:
+        try:
+            result = datapointFitCurveFit(xdata, ydata, squid_range, starting_values)
+        except RuntimeError:
+            # the fit did not converge, use the default starting values
+            pass
+    
+    if result == None:
+        result = datapointFitCurveFit(xdata, ydata, squid_range)
+    
+    if key != None:
+        cache.put(key, result)
+    
+    return result
+
+def datapointFitBatch(batch, warm_start = False):
+    """Fit the data of multiple datapoints with the datapointFit(). This is 
+    executed in the processes of the DataContainer.fitDataPoints()
+    
+    If warm_start is True each fit starts at the results of the previous 
+    datapoint with the same sweep direction in the batch
+    
+    Parameters
+    ----------
+        batch : list of tuples
+            The xdata, the ydata, the squid range and whether the datapoint is
+            an up sweep of each datapoint
+        warm_start : boolean, optional
+            Whether to start at the results of the previous datapoint
+    
+    Returns
+    -------
+        list
+            The return value of the datapointFit() for each datapoint or the
+            exception if the fit raised one
+    """
+    
+    # the last fit results for the up sweeps (True) and the down sweeps (False)
+    starting_values = {True: None, False: None}
+    
+    # fit the datapoints with the same number of values at once, the results
+    # of the datapoints that could not be fitted this way are None
+    if Constants.FIT_BATCHED:
+        batched_results = datapointFitBatched([item[:3] for item in batch])
+    else:
+        batched_results = [None] * len(batch)
+    
+    results = []
+    for (xdata, ydata, squid_range, up_sweep), result in zip(batch, batched_results):
+        if result != None:
+            results.append(result)
+            
+            if warm_start:
+                starting_values[up_sweep] = result[2]
+            continue
+        
+        try:
+            result = datapointFit(xdata, ydata, squid_range, starting_values[up_sweep])
+            results.append(result)
+            
+            if warm_start:
+                starting_values[up_sweep] = result[2]
+        except Exception as e:
+            results.append(e)
+            starting_values[up_sweep] = None
+    
+    return results
+
+def datapointFitBatched(batch):
+    """Fit the data of multiple datapoints at once. The datapoints with the 
+    same number of values are stacked to 2 dimensional arrays of at most 
+    Constants.FIT_BATCHED_SIZE datapoints and fitted by the 
+    datapointFitStacked(). 
+    
+    The datapoints that cannot be fitted this way (the fit did not converge or
+    there are too few datapoints with the same length) have to be fitted by
+    the datapointFit(), their result is None. If the Constants.FIT_CACHE is 
+    True the results of the DataHandling.FitCache are used and the new results
+    are saved there
+    
+    Parameters
+    ----------
+        batch : list of tuples
+            The xdata, the ydata and the squid range of each datapoint
+    
+    Returns
+    -------
+        list
+            The return value of the datapointFit() for each datapoint or None
+            if the datapoint has to be fitted by the datapointFit()
+    """
+    
+    results = [None] * len(batch)
+    keys = [None] * len(batch)
+    
+    if Constants.FIT_CACHE:
+        cache = DataHandling.FitCache.getDefaultCache()
+        
+        for i, (xdata, ydata, squid_range) in enumerate(batch):
+            keys[i] = cache.getKey(xdata, ydata, squid_range)
+            
+            if keys[i] != None:
+                results[i] = cache.get(keys[i])
+    
+    # the indices of the datapoints for each number of values
+    lengths = {}
+    for i, (xdata, ydata, squid_range) in enumerate(batch):
+        if (results[i] == None and len(xdata) > 4 and len(xdata) == len(ydata) and 
+            np.all(np.isfinite(xdata)) and np.all(np.isfinite(ydata))):
+            lengths.setdefault(len(xdata), []).append(i)
+    
+    size = max(int(Constants.FIT_BATCHED_SIZE), 1)
+    
+    for indices in lengths.values():
+        if len(indices) < 2:
+            continue
+        
+        for start in range(0, len(indices), size):
+            chunk = indices[start:start + size]
+            xdata = np.array([batch[i][0] for i in chunk], dtype=float)
+            ydata = np.array([batch[i][1] for i in chunk], dtype=float)
+            squid_ranges = np.array([batch[i][2] for i in chunk], dtype=float)
+            
+            for i, result in zip(chunk, datapointFitStacked(xdata, ydata, squid_ranges)):
+                results[i] = result
+                
+                if result != None and keys[i] != None:
+                    cache.put(keys[i], result)
+    
+    return results
+
+def datapointFitStacked(xdata, ydata, squid_ranges):
+    """Fit multiple datapoints with the same number of values at once. Each 
+    row of the xdata and the ydata is one datapoint. 
+    
+    The fit starts at the Constants.FIT_STARTING_X like the 
+    datapointFitCurveFit() does, then the Levenberg-Marquardt iterations are
+    done for all datapoints at once. So the fit goes to the same minimum as
+    the curve_fit() without starting values. If the fit does not converge or
+    the peak centre ends at one of its bounds the result of the datapoint is 
+    None. The bounds of the amplitude, the drift and the offset are not used, 
+    if one of them is finite (see the hasLinearParameterBounds()) all results 
+    are None
+    
+    Parameters
+    ----------
+        xdata, ydata : array of floats
+            The x and y data, the shape is (datapoints, n), all values have
+            to be finite
+        squid_ranges : array of floats
+            The squid range of each datapoint
+    
+    Returns
+    -------
+        list
+            The return value of the datapointFit() for each datapoint or None
+            if the fit did not converge
+    """
+    
+    count, length = xdata.shape
+    
+    # the linear parameters cannot be bounded, the datapointFitCurveFit() has
+    # to be used
+    if hasLinearParameterBounds():
+        return [None] * count
+    
+    lower = Constants.FIT_LOWER_BOUND_X
+    upper = Constants.FIT_UPPER_BOUND_X
+    
+    # start at the Constants.FIT_STARTING_X like the datapointFitCurveFit(),
+    # the amplitude, the drift and the offset are solved linearly for this 
+    # centre, otherwise the centre is not defined in the first step if the 
+    # starting amplitude is 0
+    try:
+        start = float(np.clip(Constants.FIT_STARTING_X, lower, upper))
+        coefficients, costs = variableProjectionSolve(xdata, ydata, (start,))
+    except np.linalg.LinAlgError:
+        return [None] * count
+    
+    parameters = np.column_stack((coefficients[:, 0], np.full(count, start)))
+    costs = costs[:, 0]
+    
+    # the Levenberg-Marquardt iterations for the datapoints that have not 
+    # converged yet
+    damping = np.full(count, 1e-3)
+    active = np.ones(count, dtype=bool)
+    converged = np.zeros(count, dtype=bool)
+    
+    for iteration in range(Constants.FIT_BATCHED_MAX_ITERATIONS):
+        a = np.nonzero(active)[0]
+        if len(a) == 0:
+            break
+        
+        p = parameters[a]
+        x = xdata[a]
+        y = ydata[a]
+        
+        residuals = dipolfunction(x, *(p[:, i, np.newaxis] for i in range(4))) - y
+        jacobian = dipolJacobian(x, *(p[:, i, np.newaxis] for i in range(4)))
+        
+        transposed = np.swapaxes(jacobian, 1, 2)
+        gradient = np.matmul(transposed, residuals[:, :, np.newaxis])[:, :, 0]
+        hessian = np.matmul(transposed, jacobian)
+        # the diagonal must not be 0, otherwise the matrix is singular if a 
+        # parameter has no influence (for example the centre if the amplitude
+        # and the drift are 0)
+        diagonal = np.diagonal(hessian, axis1=1, axis2=2)
+        diagonal = np.maximum(diagonal, 1e-12 * np.max(diagonal, axis=1, keepdims=True))
+        
+        try:
+            step = -np.linalg.solve(
+                    hessian + damping[a, np.newaxis, np.newaxis] * 
+                    diagonal[:, :, np.newaxis] * np.eye(4), 
+                    gradient[:, :, np.newaxis])[:, :, 0]
+        except np.linalg.LinAlgError:
+            break
+        
+        # the centre has to stay in its bounds
+        new_parameters = p + step
+        new_parameters[:, 3] = np.clip(new_parameters[:, 3], lower, upper)
+        new_residuals = dipolfunction(x, *(new_parameters[:, i, np.newaxis] for i in range(4))) - y
+        new_costs = np.sum(new_residuals**2, axis=1)
+        
+        accept = np.isfinite(new_costs) & (new_costs <= costs[a])
+        parameters[a[accept]] = new_parameters[accept]
+        costs[a[accept]] = new_costs[accept]
+        damping[a] = np.where(accept, damping[a] / 10, damping[a] * 10)
+        
+        # converged if the step is small compared to the parameters
+        done = np.all(np.abs(step) <= 1e-10 * (np.abs(p) + 1e-10), axis=1)
+        converged[a[done]] = True
+        active[a[done]] = False
+        
+        # the damping is too big, the step cannot decrease the costs anymore
+        active[a[damping[a] > 1e10]] = False
+    
+    # the errors are calculated like in the datapointFitVariableProjection()
+    jacobian = dipolJacobian(xdata, *(parameters[:, i, np.newaxis] for i in range(4)))
+    _, singular_values, vt = np.linalg.svd(jacobian, full_matrices=False)
+    threshold = (np.finfo(float).eps * max(length, 4) * 
+                 singular_values[:, :1])
+    inverse = np.where(singular_values > threshold, 
+                       1 / np.where(singular_values > 0, singular_values, 1)**2, 0)
+    covariance = np.einsum("mkj,mk,mkl->mjl", vt, inverse, vt)
+    covariance *= (costs / (length - 4))[:, np.newaxis, np.newaxis]
+    errors = np.sqrt(np.diagonal(covariance, axis1=1, axis2=2))
+    
+    magnetization_factors = -0.00285897 * 14.7029 * squid_ranges / 1000
+    
+    # the curve_fit() may end at a bound of the centre in another way, the 
+    # datapoint has to be fitted by the datapointFit() then
+    valid = (converged & np.all(np.isfinite(parameters), axis=1) & 
+             (parameters[:, 3] > lower) & (parameters[:, 3] < upper))
+    
+    results = []
+    for i in range(count):
+        if valid[i]:
+            results.append((magnetization_factors[i] * parameters[i, 0],
+                            magnetization_factors[i] * errors[i, 0],
+                            parameters[i].copy(), errors[i].copy()))
+        else:
+            results.append(None)
+    
+    return results
+
+def datapointFitCurveFit(xdata, ydata, squid_range, starting_values = None):
+    """Fit the xdata and ydata to the dipolfunction by fitting all four 
+    parameters with the scipy.optimize.curve_fit()
+    
+    Parameters
+    ----------
+        xdata, ydata: list of float
+            The x and y data as a list
+        squid_range: int
+            The squid range for the given datapoint
+        starting_values : list of float, optional
+            The parameters A, B, C and D to start the fit at, if None the 
+            Constants.FIT_STARTING_* values are used
             
     Returns
     -------
@@ -79,22 +449,38 @@ def datapointFit(xdata, ydata, squid_range):
             fit parameter
     """
     
-#    result, errors = scipy.optimize.curve_fit(dipolfunction, xdata, ydata, p0=[-1.0, 0.0001, 0.0001, 35])
-    result, errors = scipy.optimize.curve_fit(dipolfunction, xdata, ydata, p0=[
+    # the analytic jacobian needs less evaluations of the dipolfunction than
+    # the finite differences
+    if Constants.FIT_ANALYTIC_JACOBIAN:
+        jacobian = dipolJacobian
+    else:
+        jacobian = None
+
+    lower_bounds = (Constants.FIT_LOWER_BOUND_AMPLITUDE,
+                    Constants.FIT_LOWER_BOUND_DRIFT,
+                    Constants.FIT_LOWER_BOUND_Y,
+                    Constants.FIT_LOWER_BOUND_X
+                    )
+    upper_bounds = (Constants.FIT_UPPER_BOUND_AMPLITUDE,
+                    Constants.FIT_UPPER_BOUND_DRIFT,
+                    Constants.FIT_UPPER_BOUND_Y,
+                    Constants.FIT_UPPER_BOUND_X
+                    )
+    
+    if starting_values is None:
+        starting_values = [
             Constants.FIT_STARTING_AMPLITUDE,
             Constants.FIT_STARTING_DRIFT,
             Constants.FIT_STARTING_Y,
-            Constants.FIT_STARTING_X],
-            bounds=((Constants.FIT_LOWER_BOUND_AMPLITUDE,
-                     Constants.FIT_LOWER_BOUND_DRIFT,
-                     Constants.FIT_LOWER_BOUND_Y,
-                     Constants.FIT_LOWER_BOUND_X
-                     ),
-                     (Constants.FIT_UPPER_BOUND_AMPLITUDE,
-                      Constants.FIT_UPPER_BOUND_DRIFT,
-                      Constants.FIT_UPPER_BOUND_Y,
-                      Constants.FIT_UPPER_BOUND_X
-                     )))
+            Constants.FIT_STARTING_X]
+    else:
+        # the starting values have to be in the bounds
+        starting_values = np.clip(np.asarray(starting_values, dtype=float), 
+                                  lower_bounds, upper_bounds)
+
+#    result, errors = scipy.optimize.curve_fit(dipolfunction, xdata, ydata, p0=[-1.0, 0.0001, 0.0001, 35])
+    result, errors = scipy.optimize.curve_fit(dipolfunction, xdata, ydata, jac=jacobian, 
+            p0=starting_values, bounds=(lower_bounds, upper_bounds))
     
 #    print("calculation.datapointFit(): squid_range: ", squid_range)
     
@@ -112,10 +498,328 @@ def datapointFit(xdata, ydata, squid_range):
     # the errors for each fit result
     return (magnetization, magnetization_error, result, errors)
 
-def subtractBackgroundData(xdata, ydata, squid_range, xbackground_data, ybackground_data, background_squid_range, debug_messages=False):
+def datapointFitVariableProjection(xdata, ydata, squid_range):
+    """Fit the xdata and ydata to the dipolfunction by using the variable
+    projection. The amplitude A, the drift B and the offset C are linear 
+    parameters of the dipolfunction, for a fixed peak centre D they are the 
+    solution of a linear least squares problem. So only the peak centre D is
+    searched in the bounds Constants.FIT_LOWER_BOUND_X and 
+    Constants.FIT_UPPER_BOUND_X: first on a grid of 
+    Constants.FIT_VARIABLE_PROJECTION_GRID centres, then with the bounded 1D
+    minimizer around the grid minimum that is reached from the 
+    Constants.FIT_STARTING_X (see the variableProjectionBasin()). So the 
+    minimum the curve_fit() finds is used, even if there is a better fit in 
+    the bounds.
+    
+    The errors are calculated the same way as the scipy.optimize.curve_fit()
+    calculates them so the result is the same as the result of the 
+    datapointFitCurveFit(). If the data cannot be fitted this way (there are 
+    too few or invalid values or one of the bounds of the amplitude, the 
+    drift and the offset is finite, see the hasLinearParameterBounds()) the 
+    datapointFitCurveFit() is used. 
+    
+    If the maximum between two minima is next to the Constants.FIT_STARTING_X
+    its exact position is searched, the curve_fit() goes to the minimum on the
+    same side as the start. Only if the start is closer than the 
+    Constants.FIT_VARIABLE_PROJECTION_RIDGE_DISTANCE to the maximum the 
+    datapointFitCurveFit() is done too, its result is used if the 
+    magnetizations differ by more than the 
+    Constants.FIT_VARIABLE_PROJECTION_TOLERANCE.
+    
+    Parameters
+    ----------
+        xdata, ydata: list of float
+            The x and y data as a list
+        squid_range: int
+            The squid range for the given datapoint
+    
+    Returns
+    -------
+        float, float, list, list
+            The magnetization in emu, the error of the magnetization in emu,
+            the result array for all the fit parameters, the errorrs for every
+            fit parameter
+    """
+    
+    xdata = np.asarray(xdata, dtype=float)
+    ydata = np.asarray(ydata, dtype=float)
+    
+    # the curve_fit() raises the errors for invalid data and keeps the linear
+    # parameters in their bounds
+    if (len(xdata) <= 4 or len(xdata) != len(ydata) or 
+        not np.all(np.isfinite(xdata)) or not np.all(np.isfinite(ydata)) or
+        hasLinearParameterBounds()):
+        return datapointFitCurveFit(xdata, ydata, squid_range)
+    
+    lower = Constants.FIT_LOWER_BOUND_X
+    upper = Constants.FIT_UPPER_BOUND_X
+    
+    try:
+        # find the minimum on the grid the curve_fit() goes to
+        grid = np.linspace(lower, upper, Constants.FIT_VARIABLE_PROJECTION_GRID)
+        coefficients, costs = variableProjectionSolve(xdata, ydata, grid)
+        index, ambiguous = variableProjectionBasin(costs[np.newaxis], grid)
+        index = int(index[0])
+        last = len(grid) - 1
+        start_centre = Constants.FIT_STARTING_X
+        ridge = None
+        
+        # the sum of the squared residuals for one centre like the 
+        # variableProjectionSolve() calculates it, the parts that do not 
+        # depend on the centre are calculated only once
+        centred = xdata - xdata.mean()
+        norm = np.dot(centred, centred)
+        projected_ydata = (ydata - ydata.mean() - 
+                           centred * (np.dot(ydata, centred) / norm))
+        
+        def cost(centre):
+            shape = dipolShape(xdata - centre)
+            shape = shape - shape.mean() - centred * (np.dot(shape, centred) / norm)
+            residuals = (projected_ydata - 
+                         shape * (np.dot(shape, projected_ydata) / np.dot(shape, shape)))
+            return np.dot(residuals, residuals)
+        
+        if ambiguous[0]:
+            # the curve_fit() goes to the minimum on the same side of the 
+            # maximum as the start, find the exact maximum next to the start
+            start = int(np.argmin(np.abs(grid - start_centre)))
+            ridge = float(scipy.optimize.minimize_scalar(
+                    lambda centre: -cost(centre),
+                    bounds=(grid[max(start - 2, 0)], grid[min(start + 2, last)]),
+                    method="bounded", options={"xatol": 1e-10}).x)
+            
+            # go downhill on the side of the start only
+            if start_centre < ridge:
+                index = max(int(np.searchsorted(grid, ridge)) - 1, 0)
+                while index > 0 and costs[index - 1] < costs[index]:
+                    index -= 1
+            else:
+                index = min(int(np.searchsorted(grid, ridge)), last)
+                while index < last and costs[index + 1] < costs[index]:
+                    index += 1
+        
+        # find the exact centre between the neighbours of the grid minimum
+        minimum = scipy.optimize.minimize_scalar(
+                cost, 
+                bounds=(grid[max(index - 1, 0)], grid[min(index + 1, last)]),
+                method="bounded", options={"xatol": 1e-10})
+        centre = float(minimum.x)
+        coefficients, costs = variableProjectionSolve(xdata, ydata, (centre,))
+    except np.linalg.LinAlgError:
+        return datapointFitCurveFit(xdata, ydata, squid_range)
+    
+    amplitude, drift, offset = coefficients[0]
+    result = np.array((amplitude, drift, offset, centre))
+    
+    # the jacobian of the dipolfunction for all four parameters
+    jacobian = dipolJacobian(xdata, *result)
+    
+    # calculate the covariance like the curve_fit() does, the pseudo inverse of
+    # the jacobian times the variance of the residuals
+    _, singular_values, vt = np.linalg.svd(jacobian, full_matrices=False)
+    threshold = np.finfo(float).eps * max(jacobian.shape) * singular_values[0]
+    singular_values = singular_values[singular_values > threshold]
+    vt = vt[:singular_values.size]
+    covariance = np.dot(vt.T / singular_values**2, vt)
+    covariance *= costs[0] / (len(ydata) - len(result))
+    
+    # the errors contains the variances in the diagonal, the standard diviation
+    # is the square root of those errors
+    errors = np.sqrt(np.diag(covariance))
+    
+    # calculate magnetization and error
+    magnetization_factor = -0.00285897 * 14.7029 * squid_range / 1000
+    magnetization = magnetization_factor * result[0]
+    magnetization_error = magnetization_factor * errors[0]
+    
+    # if the start is (almost) at the maximum or the centre is on the other 
+    # side of the maximum the curve_fit() may go to another minimum, use its
+    # result if it is different
+    if ridge != None and (abs(start_centre - ridge) < Constants.FIT_VARIABLE_PROJECTION_RIDGE_DISTANCE or
+                          (start_centre < ridge) != (centre < ridge)):
+        try:
+            curve_fit_result = datapointFitCurveFit(xdata, ydata, squid_range)
+            
+            if (abs(curve_fit_result[0] - magnetization) > 
+                Constants.FIT_VARIABLE_PROJECTION_TOLERANCE * abs(curve_fit_result[0])):
+                return curve_fit_result
+        except RuntimeError:
+            # the curve_fit() did not converge, the result of the variable 
+            # projection is used
+            pass
+    
+    return (magnetization, magnetization_error, result, errors)
+
+def dipolShape(posint, derivative = False):
+    """The shape of the dipolfunction without the amplitude, the drift and the
+    offset, this is dipolfunction(x, 1, 0, 0, D) with posint = x - D. The 
+    distance to each turn and its denominator are calculated only once for the
+    shape and the derivative.
+    
+    Parameters
+    ----------
+        posint : float or array of floats
+            The position relative to the peak centre
+        derivative : boolean, optional
+            Whether to return the derivative by the posint too
+    
+    Returns
+    -------
+        float or array of floats
+            The shape for each position
+        float or array of floats, optional
+            The derivative of the shape for each position, this is only 
+            returned if the derivative is True
+    """
+    
+    radius = 8.3654 # Spulenradius
+    space  = 7.960  # Spulenabstand
+    
+    shape = 0
+    shape_derivative = 0
+    for cspace, factor in ((-space, -1), (0, 2), (space, -1)):
+        z = posint - cspace
+        denominator = pow(radius**2 + z**2.0, 1.5)
+        
+        # this is the singleturn(radius, cspace, posint)
+        shape = shape + factor * (radius**2 / denominator)
+        
+        if derivative:
+            shape_derivative = (shape_derivative - factor * 3 * radius**2 * z / 
+                                (denominator * (radius**2 + z**2.0)))
+    
+    if derivative:
+        return shape, shape_derivative
+    else:
+        return shape
+
+def variableProjectionSolve(xdata, ydata, centres):
+    """Fit the linear parameters A, B and C of the dipolfunction for each of 
+    the given peak centres D by solving the linear least squares problem. The
+    xdata and ydata can be 2 dimensional to solve multiple datapoints (one 
+    in each row) at once
+    
+    Parameters
+    ----------
+        xdata, ydata : array of floats
+            The x and y data, the shape is (n,) or (datapoints, n)
+        centres : array of floats
+            The peak centres D to fit the linear parameters for
+    
+    Returns
+    -------
+        array of floats, array of floats
+            The linear parameters A, B and C for each centre (the shape is 
+            (len(centres), 3) or (datapoints, len(centres), 3)) and the sum of 
+            the squared residuals for each centre
+    """
+    
+    xdata = np.asarray(xdata, dtype=float)[..., np.newaxis, :]
+    ydata = np.asarray(ydata, dtype=float)[..., np.newaxis, :]
+    centres = np.asarray(centres, dtype=float)[:, np.newaxis]
+    shape = dipolShape(xdata - centres)
+    
+    # the drift B * (x - D) and the offset C span the same space as x and 1 
+    # for every centre, so this space is projected out of the shape and the 
+    # ydata, then only the amplitude A is left, this is a lot faster than 
+    # solving the normal equations for each centre
+    mean = np.mean(xdata, axis=-1, keepdims=True)
+    centred = xdata - mean
+    norm = np.sum(centred**2, axis=-1, keepdims=True)
+    
+    if np.any(norm == 0):
+        raise np.linalg.LinAlgError("The x values are all the same")
+    
+    def project(values):
+        return (values - np.mean(values, axis=-1, keepdims=True) - 
+                centred * np.sum(values * centred, axis=-1, keepdims=True) / norm)
+    
+    projected_shape = project(shape)
+    projected_ydata = project(ydata)
+    shape_norm = np.sum(projected_shape**2, axis=-1)
+    
+    if np.any(shape_norm == 0):
+        raise np.linalg.LinAlgError("The shape is linear in the x values")
+    
+    amplitude = np.sum(projected_shape * projected_ydata, axis=-1) / shape_norm
+    residuals = projected_ydata - amplitude[..., np.newaxis] * projected_shape
+    
+    # the drift and the offset are the linear fit of the rest
+    rest = ydata - amplitude[..., np.newaxis] * shape
+    drift = np.sum(rest * centred, axis=-1) / norm[..., 0]
+    offset = np.mean(rest, axis=-1) + drift * (centres[:, 0] - mean[..., 0])
+    
+    return (np.stack((amplitude, drift, offset), axis=-1), 
+            np.sum(residuals**2, axis=-1))
+
+def variableProjectionBasin(costs, grid):
+    """Find the minimum of the costs on the grid of peak centres that is 
+    reached by going downhill from the grid centre next to the 
+    Constants.FIT_STARTING_X. This is the minimum the curve_fit() finds when
+    it starts at the Constants.FIT_STARTING_* values. 
+    
+    The dipolfunction is similar to the inverted dipolfunction moved by the 
+    coil distance, so there can be more than one minimum in the bounds. If 
+    the maximum between two minima is next to the start the curve_fit() may
+    go to the other minimum, the centre is not unique then.
+    
+    Parameters
+    ----------
+        costs : array of floats
+            The sum of the squared residuals for each grid centre, the shape 
+            is (datapoints, len(grid))
+        grid : array of floats
+            The peak centres
+    
+    Returns
+    -------
+        array of ints, array of booleans
+            The index of the minimum in the grid for each datapoint and whether
+            there is a maximum at most one grid centre away from the start
+    """
+    
+    rows = np.arange(costs.shape[0])
+    last = len(grid) - 1
+    start = int(np.argmin(np.abs(grid - Constants.FIT_STARTING_X)))
+    index = np.full(costs.shape[0], start)
+    
+    # go to the smaller neighbour until there is none, this needs at most 
+    # the number of grid centres steps
+    for step in range(len(grid)):
+        current = costs[rows, index]
+        left = costs[rows, np.maximum(index - 1, 0)]
+        right = costs[rows, np.minimum(index + 1, last)]
+        
+        new_index = np.where((index > 0) & (left < current), index - 1,
+                             np.where((index < last) & (right < current), index + 1, index))
+        
+        if np.all(new_index == index):
+            break
+        
+        index = new_index
+    
+    # the local maxima on the grid, they separate two minima
+    maxima = np.zeros(costs.shape, dtype=bool)
+    maxima[:, 1:-1] = (costs[:, 1:-1] >= costs[:, :-2]) & (costs[:, 1:-1] >= costs[:, 2:])
+    
+    return index, np.any(maxima[:, max(start - 1, 0):start + 2], axis=1)
+
+def subtractBackgroundData(xdata, ydata, squid_range, xbackground_data, ybackground_data, background_squid_range, debug_messages=False, mode=None):
     """Subtract the ybackground_data from the ydata. The xdata and ydata are
     the data of the original datapoint, the xbackground_data and ybackground_data
-    are the background data for this datapoint
+    are the background data for this datapoint.
+    
+    The mode tells which background value is subtracted from each value. The
+    "index" mode uses the background value in the same row, this is only
+    correct if the sample and the background are measured at the same 
+    positions. The "linear" and the "cubic" mode interpolate the background
+    at the positions of the sample, see resampleBackgroundData(), this way the
+    background can have other positions and another length.
+    
+    Raises
+    ------
+        ValueError
+            If the mode is not known
     
     Parameters
     ----------
@@ -127,68 +831,69 @@ def subtractBackgroundData(xdata, ydata, squid_range, xbackground_data, ybackgro
             The x and y data of the background as a list
         background_squid_range : float
             The squid range of the backgroun data
+        mode : String, optional
+            The index 1 of one of the Constants.BACKGROUND_SUBTRACTION_MODES,
+            if not given the Constants.BACKGROUND_SUBTRACTION_MODE is used
             
     Returns
     -------
-        list of float, list of float
+        numpy.ndarray of float, numpy.ndarray of float
             The x and y data for the datapoint with subtracted background
-        list of tuples
-            A list which tells how the subtraction has been done
+        numpy.ndarray
+            A structured array which tells how the subtraction has been done,
+            the tolist() returns the tuples of each row
         tuple of strings
             The names of the axis
     """
     
     # This holds all the values that are used for the remove. This means that
-    # the remove_values list should contain a tuple where index 0 is the x 
-    # value, index 1 is the original y value including the background, 
-    # index 2 is the background y value and index 3 is the result y value
+    # each row of the remove_values array contains the x value at index 0, 
+    # index 1 is the original y value including the background, index 2 is
+    # the background y value and index 3 is the result y value
     #   remove_values[i][0] : x value
     #   remove_values[i][1] : y value including the background (the original data)
     #   remove_values[i][2] : y value of the background
     #   remove_values[i][3] : y value of the result (after the subtraction)
-    remove_values = []
+    remove_values_dtype = [("index", np.int64), ("original", float),
+                           ("background", float), ("result", float)]
     
-    # pepare return x and y data
-    rx = []
-    ry = []
     squid_range = my_utilities.force_float(squid_range)
     background_squid_range = my_utilities.force_float(background_squid_range)
     
-    if debug_messages:
-        l = 70
-        bys = []
+    # parse the real data x and y to floats, only the pairs are used
+    length = min(len(xdata), len(ydata))
+    rx = my_utilities.force_float_array(xdata)[:length]
+    y = my_utilities.force_float_array(ydata)[:length] * squid_range
+    
+    if mode == None:
+        mode = Constants.BACKGROUND_SUBTRACTION_MODE
+    
+    if mode == "index":
+        # pad the background with zeros or truncate it to the length of the 
+        # data, background values that cannot be parsed are zero too
+        background = np.zeros(length, dtype=float)
+        background_length = min(length, len(ybackground_data))
+        background[:background_length] = my_utilities.force_float_array(
+                ybackground_data[:background_length], True)
+    elif mode in ("linear", "cubic"):
+        background = resampleBackgroundData(rx, xbackground_data, ybackground_data, mode)
+    else:
+        raise ValueError("The background subtraction mode '{}' is not known".format(mode))
     
-    counter = 0
-    for x, y in zip(xdata, ydata):
-        # parse the real data x and y to a float
-        x = my_utilities.force_float(x)
-        y = my_utilities.force_float(y) * squid_range
-        
-        # append the x value to the return x values
-        rx.append(x)
-        
-        if counter >= 0 and counter < len(ybackground_data):
-            by = ybackground_data[counter]
-        else:
-            by = 0
-        
-        try:
-            by = my_utilities.force_float(by) * background_squid_range
-        except (ValueError, TypeError):
-            by = 0
-            
-        if debug_messages:
-            bys.append(by)
-        
-        # subtract the background from the real original y and save it to the return value
-        result_y = y - by
-        ry.append(result_y)
-        counter += 1
-        
-        # add the values for the removing
-        remove_values.append((counter, y, by, result_y))
+    by = background * background_squid_range
+    
+    # subtract the background from the real original y
+    ry = y - by
+    
+    # add the values for the removing
+    remove_values = np.empty(length, dtype=remove_values_dtype)
+    remove_values["index"] = np.arange(1, length + 1)
+    remove_values["original"] = y
+    remove_values["background"] = by
+    remove_values["result"] = ry
     
     if debug_messages:
+        l = 70
         print("Calculating new y data by using <original data> - <background data> = <result data>")
         cols = 3
         
@@ -198,7 +903,7 @@ def subtractBackgroundData(xdata, ydata, squid_range, xbackground_data, ybackgro
         
         for index, y_original in enumerate(ydata):
             y_original = round(y_original, 5)
-            y_background = round(bys[index], 5)
+            y_background = round(by[index], 5)
             y_result = round(ry[index], 5)
             print(("{: ^" + str(round(l/cols - 1)) + "}").format(y_original) + "|" + 
                   ("{: ^" + str(round(l/cols - 1)) + "}").format(y_background) + "|" + 
@@ -212,6 +917,115 @@ def subtractBackgroundData(xdata, ydata, squid_range, xbackground_data, ybackgro
     
     return rx, ry, remove_values, ("index", "raw voltage [V]")
 
+def resampleBackgroundData(xdata, xbackground_data, ybackground_data, mode = "linear"):
+    """Interpolate the background voltages at the given positions of the 
+    sample, all the positions are interpolated at once. The background 
+    voltages at the same position are averaged. Outside of the positions of
+    the background the first or the last background voltage is used, at
+    positions that are not defined the background is zero.
+    
+    The cubic interpolation uses the cubic hermite spline with the slopes of
+    the three point differences (like the numpy.gradient()) at the background
+    positions, this is local and much faster than solving for the cubic spline
+    of the whole sweep.
+    
+    Parameters
+    ----------
+        xdata : array_like of float
+            The positions of the sample
+        xbackground_data, ybackground_data : array_like
+            The positions and the voltages of the background
+        mode : String, optional
+            Use "linear" for the linear interpolation, use "cubic" for the 
+            cubic spline interpolation
+    
+    Returns
+    -------
+        numpy.ndarray of float
+            The background voltages at the positions
+    """
+    
+    xdata = np.asarray(xdata, dtype=float)
+    background = np.zeros(len(xdata), dtype=float)
+    
+    # only the pairs of the background are used, values that cannot be parsed
+    # are zero
+    length = min(len(xbackground_data), len(ybackground_data))
+    xbackground = my_utilities.force_float_array(xbackground_data[:length], True)
+    ybackground = my_utilities.force_float_array(ybackground_data[:length], True)
+    
+    valid = np.isfinite(xbackground) & np.isfinite(ybackground)
+    
+    if not valid.all():
+        xbackground = xbackground[valid]
+        ybackground = ybackground[valid]
+    
+    if len(xbackground) == 0:
+        return background
+    
+    steps = xbackground[1:] - xbackground[:-1]
+    
+    # the positions of a sweep are increasing or decreasing already
+    if (steps > 0).all():
+        positions = xbackground
+        voltages = ybackground
+    elif (steps < 0).all():
+        positions = xbackground[::-1]
+        voltages = ybackground[::-1]
+    else:
+        # the interpolation needs increasing positions
+        order = np.argsort(xbackground, kind="stable")
+        positions = xbackground[order]
+        voltages = ybackground[order]
+        
+        # the voltages that are measured at the same position are averaged
+        starts = np.flatnonzero(np.concatenate(([True], positions[1:] != positions[:-1])))
+        
+        if len(starts) < len(positions):
+            voltages = np.add.reduceat(voltages, starts) / np.diff(np.append(starts, len(positions)))
+            positions = positions[starts]
+    
+    defined = np.isfinite(xdata)
+    
+    if defined.all():
+        x = xdata
+    else:
+        x = xdata[defined]
+    
+    if mode == "cubic" and len(positions) > 1:
+        x = np.minimum(np.maximum(x, positions[0]), positions[-1])
+        
+        # the slopes at the positions, the weighted mean of the slopes of the
+        # neighbouring intervals, at the ends the slope of the interval
+        widths = positions[1:] - positions[:-1]
+        secants = (voltages[1:] - voltages[:-1]) / widths
+        slopes = np.empty(len(positions), dtype=float)
+        slopes[0] = secants[0]
+        slopes[-1] = secants[-1]
+        slopes[1:-1] = ((widths[1:] * secants[:-1] + widths[:-1] * secants[1:]) / 
+                        (widths[:-1] + widths[1:]))
+        
+        # the coefficients of the cubic polynomial of each interval
+        c2 = (3 * secants - 2 * slopes[:-1] - slopes[1:]) / widths
+        c3 = (slopes[:-1] + slopes[1:] - 2 * secants) / (widths * widths)
+        
+        # the index of the interval of each position and the distance to the
+        # start of the interval
+        i = np.minimum(np.searchsorted(positions, x, side="right") - 1, len(positions) - 2)
+        dx = x - positions[i]
+        
+        values = voltages[i] + dx * (slopes[i] + dx * (c2[i] + dx * c3[i]))
+    else:
+        # the first or the last voltage is used outside of the positions
+        values = np.interp(x, positions, voltages)
+    
+    if len(values) == len(background):
+        return values
+    
+    background[defined] = values
+    
+    return background
+
 def extendBackgroundData(original_data, background_data, mode, index_list, original_datacontainer, background_datacontainer):
     """Extend the background data. This function will be called if the data
     (with the background) has not the same length as the background data. This
@@ -326,6 +1140,60 @@ def extendBackgroundData(original_data, background_data, mode, index_list, origi
     # return the result
     return result
 
+def extendBackgroundDataContainer(datacontainer, background_datacontainer, extend_mode = None, index_list = None):
+    """Get the background of each datapoint of the datacontainer to subtract it
+    directly. If the background_datacontainer has as many datapoints as the 
+    datacontainer it is used as it is, otherwise the raw data of the 
+    background is extended (or cut) by the extendBackgroundData()
+    
+    Parameters
+    ----------
+        datacontainer : DataContainer
+            The datacontainer which contains the background
+        background_datacontainer : DataContainer
+            The background datacontainer
+        extend_mode : String, optional
+            The index 1 of one of the Constants.BACKGROUND_INCREASE_MODES, if
+            not given the first mode is used
+        index_list : list of ints, optional
+            The indices of the background datapoints to use for extending, if
+            not given all the datapoints are used
+    
+    Returns
+    -------
+        DataContainer or list of tuples of lists
+            The background datacontainer or the extended background data 
+            with the same length as the datacontainer
+    """
+    
+    if len(datacontainer.datapoints) == len(background_datacontainer.datapoints):
+        return background_datacontainer
+    
+    # get the extend type
+    extend_keys = [i[1] for i in Constants.BACKGROUND_INCREASE_MODES]
+    
+    if extend_mode == None or extend_mode not in extend_keys:
+        extend_mode = extend_keys[0]
+    
+    # prepare the plain
+    data = []
+    for datapoint in datacontainer.datapoints:
+        data.append(datapoint.getPlotData(
+                DataHandling.DataPoint.DataPoint.RAW_POSITION,
+                DataHandling.DataPoint.DataPoint.RAW_VOLTAGE,
+                True))
+    
+    # prepare the background data
+    background = []
+    for datapoint in background_datacontainer.datapoints:
+        background.append(datapoint.getPlotData(
+                DataHandling.DataPoint.DataPoint.RAW_POSITION,
+                DataHandling.DataPoint.DataPoint.RAW_VOLTAGE,
+                True))
+    
+    return extendBackgroundData(data, background, extend_mode, index_list, 
+                                datacontainer, background_datacontainer)
+
 def createBackgroundDataContainer(datacontainer, background_datacontainer, measurement_type, background_filepath, controller):
     """Create a new background DataContainer which is the exact background 
     measurement for the given datacontainer. The values of the given background_datacontainer
@@ -354,8 +1222,10 @@ def createBackgroundDataContainer(datacontainer, background_datacontainer, measu
             datacontainer
     """
     
-    # clone the background datacontainer
-    new_background = copy.deepcopy(background_datacontainer)
+    # clone the background datacontainer, the datapoints are replaced so they
+    # are not copied
+    new_background = copy.deepcopy(background_datacontainer, 
+                                   {id(background_datacontainer.datapoints): []})
     new_background.filepath = background_filepath
     new_background.datapoints = []
     
@@ -383,8 +1253,9 @@ def createBackgroundDataContainer(datacontainer, background_datacontainer, measu
     
     # get the list to interpolate the values in, the index 0 contains the measurement
     # type value to interpolate as x (e.g. temperature), the index 1 contains
-    # the x and y data for each datapoint, index 2 contains the environment variables
-    interpolation_ranges = createInterpolationRanges(background_datacontainer, measurement_type, controller)
+    # the x and y data for each datapoint, index 2 contains the environment variables,
+    # they are saved in the background datacontainer for the next datacontainers
+    interpolation_ranges = background_datacontainer.getInterpolationRanges(measurement_type, controller)
     
 #    print("BackgroundCreation_old.createBackgroundDataContainer(): len(interpolation_ranges):", len(interpolation_ranges), "\nkeys:")
 #    for key in interpolation_ranges:
@@ -411,16 +1282,9 @@ def createBackgroundDataContainer(datacontainer, background_datacontainer, measu
                     static_unit,
                     static_type)
             
-            # create a map, this is for fast access, the indices are the same but this
-            # contains the measurement type value only (e.g. temperature)
-            interpolation_map_up = [i[0] for i in interpolation_values_up]
-            interpolation_map_down = [i[0] for i in interpolation_values_down]
-            
             if datapoint.isUpSweep():
-                interpolation_map = interpolation_map_up
                 interpolation_values = interpolation_values_up
             else:
-                interpolation_map = interpolation_map_down
                 interpolation_values = interpolation_values_down
             # create new datapoint
             background_datapoint = DataHandling.DataPoint.DataPoint(new_background, dp_index)
@@ -435,32 +1299,32 @@ def createBackgroundDataContainer(datacontainer, background_datacontainer, measu
             if isinstance(val, (list, tuple)):
                 # index 0 holds the value, index 1 holds the standard diviation
                 val = my_utilities.force_float(val[0])
-                # get the index in the map, i is the index of the first value that
-                # is **bigger** than the val
-                i = 0
-                while i < len(interpolation_map) and interpolation_map[i] < val:
-                    i += 1
+                # get the index of the sweep, i is the index of the first value 
+                # that is **bigger** than the val
+                i = interpolation_values.findIndex(val)
                 
                 if i == 0:
                     # if this is the first element extrapolate
                     result = extrapolate(True, val, i, interpolation_values)
-                elif i == len(interpolation_map):
+                elif i == len(interpolation_values):
                     # if this is the last element extrapolate
                     result = extrapolate(False, val, i, interpolation_values)
-                    i = len(interpolation_map) - 1
+                    i = len(interpolation_values) - 1
                 else:
                     # just any element, interpolate between this and the next point
                     result = interpolate(val, i, interpolation_values)
                     
                 # add the environment variables, they are used for DataContainer 
                 # plotting so they are very important
-                if (i >= 0 and i < len(interpolation_map) and
-                    isinstance(interpolation_values[i], (list, tuple)) and 
-                    len(interpolation_values[i]) >= 3 and
-                    isinstance(interpolation_values[i][2], (list, tuple))):
+                if (i >= 0 and i < len(interpolation_values) and
+                    isinstance(interpolation_values.environment_variables[i], (list, tuple))):
                     # go through each dict
-                    for j, environment_variables in enumerate(interpolation_values[i][2]):
+                    for j, environment_variables in enumerate(interpolation_values.environment_variables[i]):
                         if isinstance(environment_variables, dict):
+                            # do not modify the environment variables of the
+                            # background datapoint
+                            environment_variables = dict(environment_variables)
+                            
                             # the measurement type e.g. the temperature is saved in
                             # the environment variable so this has to be changed to
                             # the value which was interpolated. This is very important,
@@ -476,21 +1340,21 @@ def createBackgroundDataContainer(datacontainer, background_datacontainer, measu
                 
                 # "fake" timestamp
                 timestamp = time.time()
-                # processed voltage is not saved
-                processed_voltage = 0
                 
-                # add the data row in the same order that it is in the raw file
-                for raw_position, raw_voltage in result:
-                    background_datapoint.addDataRow(
-                            raw_position, 
-                            raw_voltage, 
-                            processed_voltage, 
-                            linenumber, 
-                            timestamp,
-                            "")
-                    
-                    # increase the linenumber
-                    linenumber += 1
+                # add the data rows in the same order that they are in the raw 
+                # file, the processed voltage is not saved
+                raw_positions, raw_voltages = result
+                count = len(raw_positions)
+                background_datapoint.addDataRows(
+                        raw_positions, 
+                        raw_voltages, 
+                        np.zeros(count), 
+                        np.arange(linenumber, linenumber + count), 
+                        np.full(count, timestamp),
+                        [""] * count)
+                
+                # increase the linenumber
+                linenumber += count
             else:
                 warnings.warn(("The {} (control variable) is not defined in datapoint " + 
                               "#{} (average environment variable returned {}). This " + 
@@ -558,8 +1422,8 @@ def getInterpolationValues(interpolation_ranges, static_value, static_unit, stat
             
     Returns
     -------
-        list, list
-            The interpolation list for the up and for the down sweep
+        SweepSet, SweepSet
+            The interpolation sweeps for the up and for the down sweep
     """
     
     # the map for the static values, this holds all static variable values (e.g.
@@ -622,68 +1486,40 @@ def getInterpolationValues(interpolation_ranges, static_value, static_unit, stat
                 if not isinstance(static_unit, str):
                     static_unit = ""
                 
-                # go through the previous values
-                for sweep_type, prev_interpolation_values in enumerate(interpolation_ranges[prev_closest_static]):
-                    # The map for the next interpolation values, this contains a
-                    # list of the measurement variables (e.g. the temperature) in
-                    # the next static range (e.g. the next higher field).
-                    next_interpolation_values_map = [i[0] for i in interpolation_ranges[next_closest_static][sweep_type]]
-                    
-#                    print("BackgroundCreation_old.getInterpolationValues(): " + 
-#                          "\nprev_interpolation_values: ", prev_interpolation_values,
-#                          "\nnext_interpolation_values_map: ", next_interpolation_values_map,
-#                          "\ninterpolation_ranges[next_closest_static][sweep_type]: ", interpolation_ranges[next_closest_static][sweep_type])
+                # go through the previous sweep sets, index 0 is up sweep, index 1
+                # is down sweep
+                for sweep_type, prev_sweep_set in enumerate(interpolation_ranges[prev_closest_static]):
+                    # the sweep set of the next static range (e.g. the next 
+                    # higher field)
+                    next_sweep_set = interpolation_ranges[next_closest_static][sweep_type]
                     
-                    # go through the interpolation values of the previous point
-                    for prev_measurement_value, prev_xydata, prev_environment_variables in prev_interpolation_values:
-                        # get the closest measurement value of the next point
-                        closest_measurmement_value = min(next_interpolation_values_map, 
-                                                         key=lambda x: abs(x - prev_measurement_value))
-                        # the corresponding index
-                        closest_measurement_value_index = next_interpolation_values_map.index(closest_measurmement_value)
+                    # replace the environment variable to let the program
+                    # know that those values have a different static type,
+                    # the environment variables of the background must not be
+                    # modified
+                    environment_variables = []
+                    for prev_environment_variables in prev_sweep_set.environment_variables:
+                        replaced_environment_variables = []
                         
-                        # the interpolation values for the next point, this is a 
-                        # list where index 0 contains the measurement varaible
-                        # e.g. the temperature, the index 1 contains the 
-                        # x and y data to interpolate, the index 2 contains
-                        # the environment variables
-                        next_interpolation_values = interpolation_ranges[next_closest_static][sweep_type][closest_measurement_value_index]
-                        
-                        # split for better looks
-                        next_measurement_value = next_interpolation_values[0]
-                        next_xydata = next_interpolation_values[1]
-                        next_environment_variables = next_interpolation_values[2]
-                        
-                        # create a fake interpoltion tuple, this contains only
-                        # two points, between those two points there will be 
-                        # interpolated.
-                        # Both points are at one specific value of the measurement
-                        # type (e.g. the temperature), the first point is lower
-                        # in the static vairable (e.g. the field), the second
-                        # is higher. The x and y data will now be interpolated
-                        # between those two points to get new x/y data for the
-                        # new static value range
-                        static_interpolation_values = (
-                                (prev_measurement_value, prev_xydata, prev_environment_variables),
-                                (next_measurement_value, next_xydata, next_environment_variables)
-                                )
-                        
-                        # interpolate
-                        result = interpolate(static_value, 1, static_interpolation_values)
-                        
-                        # replace the environment variable to let the program
-                        # knwo that those values have a different static type
-                        for key in replace_keys:
-                            for env_vars in prev_environment_variables:
+                        for env_vars in prev_environment_variables:
+                            env_vars = dict(env_vars)
+                            
+                            for key in replace_keys:
                                 if key in env_vars:
-                                    print(key)
-                                    prev_environment_variables[key] = str(static_value) + static_unit
-                        
-                        # create the interpolation value row
-                        row = (prev_measurement_value, result, prev_environment_variables)
+                                    env_vars[key] = str(static_value) + static_unit
+                            
+                            replaced_environment_variables.append(env_vars)
                         
-                        # add the row to the new static value range
-                        interpolation_ranges[static_value][sweep_type].append(row)
+                        environment_variables.append(replaced_environment_variables)
+                    
+                    # Each sweep of the previous static range is interpolated
+                    # with the sweep of the next static range that has the 
+                    # closest measurement value (e.g. the temperature). The 
+                    # voltages are interpolated in the static variable (e.g.
+                    # the field) to get the sweeps for the new static value
+                    interpolation_ranges[static_value][sweep_type] = prev_sweep_set.interpolateSweepSet(
+                            next_sweep_set, prev_closest_static, next_closest_static,
+                            static_value, environment_variables)
                 
                 # re-set the closest staic value, the closest is now the value 
                 # itself
@@ -704,6 +1540,205 @@ def getInterpolationValues(interpolation_ranges, static_value, static_unit, stat
     # return the interpolation data
     return interpolation_ranges[closest_static][0], interpolation_ranges[closest_static][1]
 
+def clusterThreshold(values, threshold):
+    """Group the values that differ less than the threshold. The values are
+    sorted, a new group starts where the difference to the previous sorted
+    value is not smaller than the threshold. The groups are numbered in the
+    order of their first element in the values, the first element of each 
+    group is its representative
+    
+    Parameters
+    ----------
+        values : array_like of float
+            The values to group
+        threshold : float
+            The threshold
+    
+    Returns
+    -------
+        array of int
+            The index of the group of each value
+        array of float
+            The representative value of each group
+    """
+    
+    values = np.asarray(values, dtype=float)
+    
+    if len(values) == 0:
+        return np.zeros(0, dtype=int), np.zeros(0)
+    
+    order = np.argsort(values, kind="stable")
+    sorted_values = values[order]
+    
+    # a new group starts where the difference to the previous value is not
+    # smaller than the threshold, NaN is never the same as another value
+    starts = np.concatenate(([True], ~(np.diff(sorted_values) < threshold)))
+    starts |= np.isnan(sorted_values)
+    sorted_labels = np.cumsum(starts) - 1
+    
+    # the index of the first element of each group in the values
+    first_indices = np.minimum.reduceat(order, np.flatnonzero(starts))
+    
+    # number the groups in the order of their first elements
+    numbers = np.empty(len(first_indices), dtype=int)
+    numbers[np.argsort(first_indices)] = np.arange(len(first_indices))
+    
+    labels = np.empty(len(values), dtype=int)
+    labels[order] = numbers[sorted_labels]
+    
+    return labels, values[np.sort(first_indices)]
+
+def removeBackgroundDataPoints(datacontainer, background_data, mode = None):
+    """Subtract the background of each datapoint of the datacontainer and fit
+    the datapoints again. The datacontainer is modified, the background_data
+    has to contain the background datapoint for each datapoint at the same 
+    index. The errors do not stop the subtraction, they are collected and
+    returned.
+    
+    Parameters
+    ----------
+        datacontainer : DataContainer
+            The datacontainer to subtract the background from
+        background_data : DataContainer or list
+            The background datacontainer or the list of the background data
+        mode : String, optional
+            The background subtraction mode, see the subtractBackgroundData()
+    
+    Returns
+    -------
+        list of Strings
+            The errors
+    """
+    
+    if isinstance(background_data, DataHandling.DataContainer.DataContainer):
+        background_data = background_data.datapoints
+    
+    # store the errors
+    errors = []
+    
+    with warnings.catch_warnings(record=True) as ws:
+        # go through all the datapoints of the original data
+        for index, datapoint in enumerate(datacontainer.datapoints):
+            # perform the background removing
+            try:
+                datapoint.index = index
+                datapoint.removeBackgroundData(background_data[index], mode=mode)
+            except Exception as e:
+                errors.append("Datapoint #{} raised Error: ".format(index) + str(e))
+            
+            # fit the datapoint again
+            try:
+                datapoint.execFit()
+            except Exception as e:
+                errors.append("Datapoint #{} raised Error: ".format(index) + str(e))
+            
+            for w in ws:
+                w.index = index
+    
+    return errors
+
+# the background datacontainers of the batch background subtraction in the 
+# current process, they are sent to each process once when the process is 
+# started, so the interpolation ranges of a background are created once in each
+# process
+_batch_backgrounds = []
+
+def initBackgroundSubtractionBatch(background_datacontainers):
+    """Set the background datacontainers for the subtractBackgroundBatchItem()
+    calls in the current process, this is the initializer of the processes of 
+    the batch background subtraction
+    
+    Parameters
+    ----------
+        background_datacontainers : list of DataContainer
+            The background datacontainers
+    """
+    
+    global _batch_backgrounds
+    
+    _batch_backgrounds = list(background_datacontainers)
+
+def subtractBackgroundBatchItem(datacontainer, background_index, measurement_type, mode = None, interpolate = False):
+    """Subtract the background datacontainer at the background_index of the 
+    initBackgroundSubtractionBatch() from a copy of the datacontainer and fit
+    the datapoints again. The background is subtracted like in the 
+    Controller.subtractBackgroundData() (it is extended if it has less 
+    datapoints, see the extendBackgroundDataContainer()), if interpolate is 
+    True a new background is created for the datacontainer by interpolating 
+    the background datacontainer instead. This is done for each sample of the
+    batch background subtraction, it can be executed in another process
+    
+    Raises
+    ------
+        ValueError
+            If the background could not be created for each datapoint
+    
+    Parameters
+    ----------
+        datacontainer : DataContainer
+            The sample datacontainer which contains the background
+        background_index : int
+            The index of the background datacontainer to use
+        measurement_type : String
+            The type of the measurement, use DataContainer.TEMPERATURE for a 
+            M(T) measurement, use DataContainer.FIELD for a M(H) measurement
+        mode : String, optional
+            The background subtraction mode, see the subtractBackgroundData()
+        interpolate : boolean, optional
+            Whether to interpolate the background for the datacontainer
+    
+    Returns
+    -------
+        DataContainer, DataContainer, list of Strings
+            The datacontainer with the subtracted background, the created 
+            background (None if the background is not interpolated) and the 
+            errors and warnings
+    """
+    
+    background_datacontainer = _batch_backgrounds[background_index]
+    
+    if interpolate:
+        with warnings.catch_warnings(record=True) as ws:
+            warnings.simplefilter("always")
+            
+            background = createBackgroundDataContainer(
+                    datacontainer, 
+                    background_datacontainer, 
+                    measurement_type,
+                    "<temporary created background>",
+                    None)
+        
+        errors = [str(w.message) for w in ws]
+        
+        if len(background.datapoints) != len(datacontainer.datapoints):
+            raise ValueError(("The background could be created for {} of {} " + 
+                              "datapoints only").format(len(background.datapoints),
+                                                        len(datacontainer.datapoints)))
+        
+        background_data = background
+    else:
+        background = None
+        errors = []
+        
+        try:
+            background_data = extendBackgroundDataContainer(datacontainer, 
+                                                            background_datacontainer)
+        except Exception as e:
+            errors.append(type(e).__name__ + ": " + str(e))
+            
+            # there is no background for the datapoints
+            background_data = []
+    
+    # create a copy of the original datacontainer, the original data and the
+    # background data are set by the calling process, they are not sent back
+    new_datacontainer = copy.deepcopy(datacontainer)
+    new_datacontainer.addAttribute("Background removed")
+    new_datacontainer.removed_background = True
+    
+    errors += removeBackgroundDataPoints(new_datacontainer, background_data, mode)
+    
+    return new_datacontainer, background, errors
+
 def createInterpolationRanges(background_datacontainer, measurement_type, controller):
     """Returns a sorted list for the given background_datacontainer and measurement_type.
     
@@ -718,7 +1753,8 @@ def createInterpolationRanges(background_datacontainer, measurement_type, contro
     The interpolation values is a list which holds the interpolation x value of
     the measurement_type (e.g. the temperature) in the first index, the second
     will hold a list with the x and y data to interpolate (only interpolate the
-    y data). The thrid index is the environment variables of this point.
+    y data). The thrid index is the environment variables of this point. The
+    sorted interpolation values are saved in a SweepSet.
     
     If the measurement_type is the temperature the return value could look like t
     this:
@@ -752,8 +1788,8 @@ def createInterpolationRanges(background_datacontainer, measurement_type, contro
             
     Returns
     -------
-        list
-            The sorted list in the form mentioned above
+        dict
+            The SweepSets of the sorted lists in the form mentioned above
     """
     
     # the result list
@@ -770,45 +1806,42 @@ def createInterpolationRanges(background_datacontainer, measurement_type, contro
         static_name = Constants.ENVIRONMENT_VARIABLE_NAMES[static_variable]
     
     # get all the static values, this is plotted over the timestamp because there
-    # always is a timestamp
+    # always is a timestamp, the indices of the datapoints are saved too
     static_data = []
-    for datapoint in background_datacontainer.datapoints:
+    static_indices = []
+    for dp_index, datapoint in enumerate(background_datacontainer.datapoints):
         value = datapoint.getEnvironmentVariableAvg(static_variable)
 #        print("BackgroundCreation_old.createInterpolationRanges(): value:", value)
         if isinstance(value, (list, tuple)):
             static_data.append(my_utilities.force_float(value[0]))
+            static_indices.append(dp_index)
     
     # calculate the threshold
     threshold = abs(min(static_data) / Constants.STATIC_VALUE_THRESHOLD)
     
-    # get the ranges of the static variable
-    ranges, full_list = controller.uniqueListThreshold(static_data, threshold)
+    # get the ranges of the static variable, the labels contain the index of
+    # the range of each value
+    # there is no controller in the processes of the 
+    # subtractBackgroundBatchItem()
+    if controller != None:
+        labels, ranges = controller.uniqueListThreshold(static_data, threshold)
+    else:
+        labels, ranges = clusterThreshold(static_data, threshold)
+    
+    # the real value of the range that each datapoint has
+    range_values = dict(zip(static_indices, ranges[labels].tolist()))
     
     # go through each datapoint
     for dp_index, datapoint in enumerate(background_datacontainer.datapoints):
-        # the range selector
-        value = datapoint.getEnvironmentVariableAvg(static_variable)
-        if isinstance(value, (list, tuple)):
-            range_selector = my_utilities.force_float(value[0])
-        else:
-            range_selector = None
-            
-        range_value = None
-        
-        # find the real value that this datapoint has
-        for range_val in full_list:
-            if range_selector in full_list[range_val]:
-                range_value = range_val
-                break
-        
-        if range_value == None:
-            # this is not possible to happen, the full list contains ALL values!
-            warnings.warn(("The {} = {} defined in the datapoint #{} of the " + 
+        if dp_index not in range_values:
+            # the static variable is not defined in this datapoint
+            warnings.warn(("The {} defined in the datapoint #{} of the " + 
                           "background data is not listed in the range list. This " + 
-                          "is a severe error which has no solution.").format(
-                                  static_name, range_selector, dp_index))
+                          "datapoint is skipped.").format(static_name, dp_index))
             continue
         
+        range_value = range_values[dp_index]
+        
         # prepare the result
         if not range_value in result:
             result[range_value] = [[], []]
@@ -842,13 +1875,17 @@ def createInterpolationRanges(background_datacontainer, measurement_type, contro
         # sort by the measurement type variable
         result[key][0].sort(key=operator.itemgetter(0))
         result[key][1].sort(key=operator.itemgetter(0))
+        
+        # save the sorted sweeps in arrays for the interpolation
+        result[key] = [DataHandling.SweepSet.SweepSet(result[key][0]),
+                       DataHandling.SweepSet.SweepSet(result[key][1])]
     
     return result
 
 def interpolate(target_x, index, interpolation_values):
     """Interpolate to find the target_x between the index and the index-1 values 
-    in the interpolation_values list. The interpolation_values list has to have
-    the format returned by the createInterpolationRanges() function!
+    in the interpolation_values. The interpolation_values have to be created by
+    the createInterpolationRanges() function!
     
     Parameters
     ----------
@@ -857,68 +1894,19 @@ def interpolate(target_x, index, interpolation_values):
         index : int
             The first index where the corresponding value is bigger than the value
             to interpolate to
-        interpolation_values : list
+        interpolation_values : SweepSet
             The datapoint values to interpolate in
             
     Returns
     -------
-        list
-            The list of the x and y (raw) values for the given target_x
+        array of float, array of float
+            The x and y (raw) values for the given target_x
     """
     
-    # the x2/y2 coordinate, y2 is a list because y is one whole datapoint with
-    # x and y values. The y values will be interpolated, the x values do not change,
+    # the y values are the whole datapoints with x and y values, the y values
+    # are interpolated for all the x values at once, the x values do not change,
     # they are just kept for creating a valid datapoint again
-    x2 = interpolation_values[index][0]
-    y2_values = interpolation_values[index][1]
-    
-    # the x1/y1 coordinate
-    i = index - 1
-    while i >= 0 and i < len(interpolation_values) and interpolation_values[i][0] == x2:
-        i -= 1
-    x1 = interpolation_values[i][0]
-    y1_values = interpolation_values[i][1]
-    
-    
-    # the max count
-    count = max(len(y1_values[0]), len(y1_values[1]), len(y2_values[0]), len(y2_values[1]))
-    # the result
-    result = []
-    
-    # go through each of the ~200 raw position/raw voltage points
-    for i in range(0, count):
-        if i < len(y1_values[1]) and i < len(y2_values[1]):
-            # the slope and the y intercept
-            m = (y2_values[1][i] - y1_values[1][i]) / (x2 - x1)
-            t = y1_values[1][i] - m * x1
-            
-            # the resulting y value for the target_y
-            y = m * target_x + t
-        elif i < len(y1_values):
-            y = y1_values
-        elif i < len(y2_values):
-            y = y2_values
-        else:
-            continue
-        
-        # get the x value, normally this should be the y2 value because this is 
-        # interpolating with the slope of the target point and the point before
-        # but if it is not possible use the point before. There are ~200 points
-        # on a distance of ~4cm, it does not matter if there is a shift of one
-        # point or not
-        if i < len(y2_values[0]):
-            x = y2_values[0][i]
-        elif i < len(y1_values[1]):
-            x = y2_values[1][i]
-        else:
-            x = None
-        
-        # add the result
-        if x != None and y != None:
-            result.append((x, y))
-    
-    # the result
-    return result
+    return interpolation_values.interpolate(target_x, index)
 
 def extrapolate(extrapolate_beginning, target_x, index, interpolation_values):
     """Extrapolating the values, this is only used for the beginning and the end
@@ -935,13 +1923,13 @@ def extrapolate(extrapolate_beginning, target_x, index, interpolation_values):
         index : int
             The first index where the corresponding value is bigger than the value
             to interpolate to
-        interpolation_values : list
+        interpolation_values : SweepSet
             The datapoint values to interpolate in
             
     Returns
     -------
-        list
-            The list of the y values for the given target_x
+        array of float, array of float
+            The x and y (raw) values for the given target_x
     """
     
     if extrapolate_beginning:
@@ -0,0 +1,457 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 09:12:41 2026
+
+@author: miile7
+"""
+
+import numpy as np
+import warnings
+import mmap
+import gzip
+import lzma
+import bz2
+import os
+
+import Constants
+
+# the columns of the data rows and the fit rows that are parsed
+DATA_ROW_COLUMNS = (Constants.RAW_FILE_OFFSET_TIMESTAMP,
+                    Constants.RAW_FILE_OFFSET_RAW_POSITION,
+                    Constants.RAW_FILE_OFFSET_RAW_VOLTAGE,
+                    Constants.RAW_FILE_OFFSET_PROCESSED_VOLTAGE)
+FIT_ROW_COLUMNS = (Constants.RAW_FILE_OFFSET_TIMESTAMP,
+                   Constants.RAW_FILE_OFFSET_RAW_POSITION,
+                   Constants.RAW_FILE_OFFSET_FIXED_C_FIT,
+                   Constants.RAW_FILE_OFFSET_FREE_C_FIT)
+# the modules to read and write the compressed files, the keys are the file
+# extensions
+COMPRESSION_MODULES = {".gz": gzip, ".xz": lzma, ".bz2": bz2}
+
+def parseDataBlock(block, first_linenumber):
+    """Parse the data rows of (a part of) one datapoint at once. The block are
+    the raw bytes of the lines of the raw file between two environment
+    variable lines (the lines starting with ";"), this means the data rows and
+    the fit rows of one datapoint. The lines are split and all the numeric
+    values are converted by numpy at once.
+    
+    This is the fast path only, it works if all lines are well formed (empty
+    comment, 5 chunks for the data rows, 7 chunks for the fit rows and every
+    used value is a valid float). If this is not the case None is returned
+    and the lines have to be parsed line by line by the DataContainer, this
+    guarantees that the result is always exactly the same.
+    
+    Parameters
+    ----------
+        block : bytes
+            The lines of the datapoint, each line ends with a newline except
+            the last line of the file
+        first_linenumber : int
+            The linenumber of the first line in the raw file
+    
+    Returns
+    -------
+        tuple or None
+            None if the block cannot be parsed at once, otherwise a tuple with
+            the data columns at index 0, the fit columns at index 1 and whether
+            the last line was a fit line at index 2. The data columns are a
+            tuple of arrays in the order linenumber, timestamp, raw position,
+            raw voltage and processed voltage, the fit columns are a tuple of
+            arrays in the order linenumber, timestamp, raw position, fixed c
+            fit and free c fit
+    """
+    
+    if block.endswith(b"\n"):
+        block = block[:-1]
+    
+    if len(block) == 0:
+        return None
+    
+    chars = np.frombuffer(block, dtype=np.uint8)
+    newlines = np.flatnonzero(chars == ord("\n"))
+    
+    # the comments are not parsed, they have to be empty so each line has to
+    # start with a comma
+    if chars[0] != ord(",") or not np.all(chars[newlines + 1] == ord(",")):
+        return None
+    
+    # the number of commas in each line, the data rows have 5 chunks, the fit
+    # rows have 7 chunks
+    line_starts = np.concatenate(([0], newlines + 1))
+    commas = np.add.reduceat(chars == ord(","), line_starts, dtype=np.intp)
+    data_mask = commas == Constants.RAW_FILE_OFFSET_PROCESSED_VOLTAGE
+    fit_mask = commas == Constants.RAW_FILE_OFFSET_FREE_C_FIT
+    
+    if not np.all(data_mask | fit_mask):
+        return None
+    
+    # split all lines at once, the index of the first chunk of each line is
+    # known by the number of commas
+    chunks = np.array(block.replace(b"\n", b",").split(b","))
+    chunk_starts = np.concatenate(([0], np.cumsum(commas + 1)[:-1]))
+    
+    try:
+        data = chunks[chunk_starts[data_mask, np.newaxis] + DATA_ROW_COLUMNS].astype(float)
+        fit = chunks[chunk_starts[fit_mask, np.newaxis] + FIT_ROW_COLUMNS].astype(float)
+    except ValueError:
+        # at least one of the values is not a number
+        return None
+    
+    linenumbers = np.arange(first_linenumber, first_linenumber + len(commas))
+    
+    return ((linenumbers[data_mask],) + tuple(data.T),
+            (linenumbers[fit_mask],) + tuple(fit.T),
+            bool(fit_mask[-1]))
+
+def parseDataRow(dp, line, linenumber, mode):
+    """Parse one (stripped) data row or fit row of the raw file and add it 
+    to the given datapoint. This is the line by line parsing, rows that 
+    cannot be interpreted add an empty row and create a warning
+    
+    Parameters
+    ----------
+        dp : DataPoint
+            The datapoint to add the row to
+        line : String
+            The line without leading and trailing whitespace
+        linenumber : int
+            The number of the line in the file
+        mode : int
+            The current mode, 2 = data, 3 = fit data
+    
+    Returns
+    -------
+        int
+            The mode for the next line
+    """
+    
+    # reached some actual data, the format is:
+    # data[0]: comment
+    # data[1]: timestamp
+    # data[2]: raw position in [mm]
+    # data[3]: raw voltage in [V]
+    # data[4]: processed voltage in [V]
+    # data[5]: fixed c fit in [V]
+    # data[6]: free c fit in [v]
+    data = line.split(",")
+    
+    if len(data) > 0:
+        # reached some data
+        if len(data) >= 7 and data[5] != "" and data[6] != "":
+            # the current line is a fit line (last
+            # two rows are defined)
+            dp.addFixedFit(data[Constants.RAW_FILE_OFFSET_RAW_POSITION], 
+                           data[Constants.RAW_FILE_OFFSET_FIXED_C_FIT], 
+                           linenumber, 
+                           data[Constants.RAW_FILE_OFFSET_TIMESTAMP], 
+                           data[Constants.RAW_FILE_OFFSET_COMMENT])
+            dp.addFreeFit(data[Constants.RAW_FILE_OFFSET_RAW_POSITION], 
+                          data[Constants.RAW_FILE_OFFSET_FREE_C_FIT], 
+                          linenumber, 
+                          data[Constants.RAW_FILE_OFFSET_TIMESTAMP], 
+                          data[Constants.RAW_FILE_OFFSET_COMMENT])
+            
+            # save current mode, currently reading
+            # the fit, after the fit the next data
+            # point is starting
+            mode = 3
+        elif (len(data) >= Constants.RAW_FILE_OFFSET_RAW_VOLTAGE + 1 and 
+              data[Constants.RAW_FILE_OFFSET_RAW_VOLTAGE] != ""):
+            # the current line contains at least the
+            # raw voltage
+            processed_voltage = None
+            
+            if len(data) >= Constants.RAW_FILE_OFFSET_PROCESSED_VOLTAGE + 1:
+                processed_voltage = data[Constants.RAW_FILE_OFFSET_PROCESSED_VOLTAGE]
+            
+            dp.addDataRow(data[Constants.RAW_FILE_OFFSET_RAW_POSITION], 
+                          data[Constants.RAW_FILE_OFFSET_RAW_VOLTAGE], 
+                          processed_voltage,
+                          linenumber,
+                          data[Constants.RAW_FILE_OFFSET_TIMESTAMP], 
+                          data[Constants.RAW_FILE_OFFSET_COMMENT])
+            
+            mode = 2
+        else:
+            # data objects length is too short
+            warnings.warn(("Data of line {} has length of {} " + 
+                        "chunks which could not be " + 
+                        "interpreted, this dataset will be " + 
+                        "skipped").format(linenumber, 
+                                             str(len(data))))
+            dp.addEmptyDataRow()
+    
+    else:
+        # data object is empty
+        warnings.warn("Data could not be parsed (is empty)" + 
+                      " in line {}, this dataset will be " + 
+                      "ignored".format(linenumber))
+        dp.addEmptyDataRow()
+    
+    return mode
+
+def isDataBlock(block):
+    """Check if all lines of the block are data rows or fit rows. This is the
+    case if each line starts with a comma, so there is no environment variable
+    line, no section and no empty line in the block
+    
+    Parameters
+    ----------
+        block : bytes
+            The lines, each line ends with a newline except the last line of
+            the file
+    
+    Returns
+    -------
+        boolean
+            Whether all lines start with a comma
+    """
+    
+    if block.endswith(b"\n"):
+        block = block[:-1]
+    
+    if len(block) == 0:
+        return False
+    
+    chars = np.frombuffer(block, dtype=np.uint8)
+    newlines = np.flatnonzero(chars == ord("\n"))
+    
+    return bool(chars[0] == ord(",") and np.all(chars[newlines + 1] == ord(",")))
+
+def loadDataBlock(dp, block, first_linenumber, mode, encoding):
+    """Add all the rows of the block to the given datapoint. The block must
+    only contain data rows and fit rows (check with isDataBlock()). If the 
+    block is well formed it is parsed at once by parseDataBlock(), otherwise
+    each line is parsed by parseDataRow()
+    
+    Parameters
+    ----------
+        dp : DataPoint
+            The datapoint to add the rows to
+        block : bytes
+            The lines as they are in the file
+        first_linenumber : int
+            The number of the first line in the file
+        mode : int
+            The current mode, 2 = data, 3 = fit data
+        encoding : String
+            The encoding of the file
+    
+    Returns
+    -------
+        int
+            The mode for the next line
+    """
+    
+    result = parseDataBlock(block, first_linenumber)
+    
+    if result == None:
+        # parse the lines one by one, this also creates the warnings
+        lines = block.split(b"\n")
+        if block.endswith(b"\n"):
+            lines.pop()
+        
+        for i, line in enumerate(lines):
+            mode = parseDataRow(dp, line.decode(encoding).strip(), 
+                                first_linenumber + i, mode)
+        
+        return mode
+    
+    data, fit, last_line_is_fit = result
+    
+    linenumbers, timestamps, raw_positions, raw_voltages, processed_voltages = data
+    dp.addDataRows(raw_positions, raw_voltages, processed_voltages, linenumbers, 
+                   timestamps, [""] * len(linenumbers))
+    
+    linenumbers, timestamps, raw_positions, fixed_fit, free_fit = fit
+    dp.addFitRows(raw_positions, fixed_fit, free_fit, linenumbers, timestamps, 
+                  [""] * len(linenumbers))
+    
+    if last_line_is_fit:
+        return 3
+    else:
+        return 2
+
+def getFileState(filepath):
+    """Get the size and the modification time of the file, this is used to
+    detect if a file has changed
+    
+    Parameters
+    ----------
+        filepath : String
+            The path of the file
+    
+    Returns
+    -------
+        tuple
+            The size in bytes and the modification time in ns
+    """
+    
+    stat = os.stat(filepath)
+    return (stat.st_size, stat.st_mtime_ns)
+
+def readBlocks(filepath, blocks, file_state = None):
+    """Read the given parts of the file. The file is mapped to the memory so
+    only the requested parts are read from the disk
+    
+    Raises
+    ------
+        IOError
+            If the file cannot be read or if the file has changed
+    
+    Parameters
+    ----------
+        filepath : String
+            The path of the file
+        blocks : list of tuples
+            The byte offset at index 0 and the length in bytes at index 1 for
+            each part to read
+        file_state : tuple, optional
+            The return value of getFileState() when the offsets have been 
+            created, if the file state is different now the file has changed
+            and an IOError is raised
+    
+    Returns
+    -------
+        list of bytes
+            The contents of each part
+    """
+    
+    if file_state != None and getFileState(filepath) != tuple(file_state):
+        raise IOError(("The file {} has changed since it has been opened, " + 
+                       "the data cannot be loaded").format(filepath))
+    
+    file = open(filepath, "rb")
+    
+    try:
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        try:
+            return [data[block[0]:block[0] + block[1]] for block in blocks]
+        finally:
+            data.close()
+    finally:
+        file.close()
+
+def getCompressionExtension(filepath):
+    """Get the extension of the compression of the file, the compression is
+    detected by the file extension only
+    
+    Parameters
+    ----------
+        filepath : String
+            The path of the file
+    
+    Returns
+    -------
+        String or None
+            The extension (one of the keys of the COMPRESSION_MODULES) or None
+            if the file is not compressed
+    """
+    
+    extension = os.path.splitext(filepath)[1].lower()
+    
+    if extension in COMPRESSION_MODULES:
+        return extension
+    else:
+        return None
+
+def isCompressed(filepath):
+    """Get whether the file is compressed
+    
+    Parameters
+    ----------
+        filepath : String
+            The path of the file
+    
+    Returns
+    -------
+        boolean
+            Whether the file has one of the extensions of the 
+            COMPRESSION_MODULES
+    """
+    
+    return getCompressionExtension(filepath) != None
+
+def removeCompressionExtension(filepath):
+    """Remove the extension of the compression from the filepath
+    
+    Parameters
+    ----------
+        filepath : String
+            The path of the file
+    
+    Returns
+    -------
+        String
+            The path without the compression extension
+    """
+    
+    if isCompressed(filepath):
+        return os.path.splitext(filepath)[0]
+    else:
+        return filepath
+
+def openFile(filepath, mode = "r", encoding = None):
+    """Open the file like open() does. If the file has the extension of a 
+    compression (.gz, .xz or .bz2) the file is decompressed while reading
+    and compressed while writing, the file is streamed so it is never 
+    completely in the memory
+    
+    Raises
+    ------
+        IOError
+            If the file cannot be opened
+    
+    Parameters
+    ----------
+        filepath : String
+            The path of the file
+        mode : String, optional
+            The mode like the open() mode
+        encoding : String, optional
+            The encoding in text mode, if not given the preferred encoding is
+            used like open() does
+    
+    Returns
+    -------
+        file
+            The file object
+    """
+    
+    extension = getCompressionExtension(filepath)
+    
+    if extension == None:
+        return open(filepath, mode, encoding=encoding)
+    
+    # the compression modules open the files in binary mode by default
+    if "b" not in mode and "t" not in mode:
+        mode += "t"
+    
+    return COMPRESSION_MODULES[extension].open(filepath, mode, encoding=encoding)
+
+def openDecompressed(file, filepath):
+    """Decompress the given file while reading if the filepath has the 
+    extension of a compression. The returned file object does not close the
+    given file
+    
+    Parameters
+    ----------
+        file : file
+            The file opened in binary mode
+        filepath : String
+            The path of the file
+    
+    Returns
+    -------
+        file
+            The file object that returns the decompressed bytes or the given
+            file if the file is not compressed
+    """
+    
+    extension = getCompressionExtension(filepath)
+    
+    if extension == None:
+        return file
+    else:
+        return COMPRESSION_MODULES[extension].open(file, "rb")
\ No newline at end of file
@@ -9,9 +9,11 @@ from PyQt5 import QtCore, QtGui, QtWidgets
 import matplotlib.colors
 import matplotlib.artist
 import matplotlib.backend_bases
+import numpy as np
 
 import View.PlotCanvas
 import View.MainWindow
+import DataHandling.DataContainer
 import DataHandling.DataPoint
 import my_utilities
 import Constants
@@ -257,6 +259,7 @@ class DataPointViewer(QtWidgets.QDialog):
         
         # fixes the indices
         self.fixIndices()
+        self.fitDataPoints()
         
         # go through the grid
         counter = 0
@@ -289,6 +292,10 @@ class DataPointViewer(QtWidgets.QDialog):
                 background_remove_data = datapoint.background_remove_data
                 background_remove_labels = datapoint.background_remove_labels
                 
+                # the calculation.py saves the data as a structured array
+                if isinstance(background_remove_data, np.ndarray):
+                    background_remove_data = background_remove_data.tolist()
+                
                 # check whether there is data that has been removed
                 if isinstance(background_remove_data, (list, tuple)):
                     # prepare all the data lists
@@ -887,6 +894,7 @@ class DataPointViewer(QtWidgets.QDialog):
         
         # fixes the indices
         self.fixIndices()
+        self.fitDataPoints()
         
         # the data of each datapoint
         col = 1
@@ -1269,6 +1277,22 @@ class DataPointViewer(QtWidgets.QDialog):
         # highlight points
         self.showPointsInDataContainerPlot()
     
+    def fitDataPoints(self):
+        """Fit the shown datapoints at once if they are fitted lazily and if
+        they are not fitted yet"""
+        
+        if not self._datacontainer.lazy_fitting:
+            return
+        
+        try:
+            self._datacontainer.fitDataPointsForAxes(
+                    (DataHandling.DataContainer.DataContainer.FREE_FIT, ), 
+                    self._indices)
+        except Exception:
+            # the datapoints that could not be fitted are shown without the 
+            # fit
+            pass
+    
     def fixIndices(self, indices_list = None):
         """Fix the internal indices and/or save new indices. This will force the
         internal indices to be correct so the number of indices is equal to the 
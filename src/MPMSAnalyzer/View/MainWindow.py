@@ -208,6 +208,13 @@ class MainWindow(QtWidgets.QMainWindow):
         open_menu.addAction(openQuickMT)
         open_menu.addAction(openQuickMH)
         
+        # follow the files that are still written by the MPMS
+        followAct = QtWidgets.QAction('Follow files', self)
+        followAct.setCheckable(True)
+        followAct.setStatusTip('Read the data that is appended to the opened files while measuring')
+        followAct.setToolTip(followAct.statusTip())
+        followAct.toggled.connect(self.actionFollowFiles)
+        
         # open settings
         openSettingsAct = QtWidgets.QAction('Settings', self)
         openSettingsAct.setShortcut('Ctrl+Alt+Shift+P')
@@ -221,6 +228,7 @@ class MainWindow(QtWidgets.QMainWindow):
         exitAct.triggered.connect(self.actionQuit)
         
         # add the items to the file menu
+        file_menu.addAction(followAct)
         file_menu.addSeparator()
         file_menu.addAction(openSettingsAct)
         file_menu.addSeparator()
@@ -425,7 +433,8 @@ class MainWindow(QtWidgets.QMainWindow):
             
         dialog = QtWidgets.QFileDialog(parent)
         dialog.setWindowTitle(title)
-        dialog.setNameFilter("MPMS raw files (*.rw.dat);;MPMS files (*.dat);;All files (*.*)")
+        dialog.setNameFilter("MPMS raw files (*.rw.dat *.rw.dat.gz *.rw.dat.xz *.rw.dat.bz2);;" + 
+                             "MPMS files (*.dat *.dat.gz *.dat.xz *.dat.bz2);;All files (*.*)")
         result = dialog.exec()
         
         if result:
@@ -521,7 +530,9 @@ class MainWindow(QtWidgets.QMainWindow):
             # show a file open dialog to select the dat file
             dialog = QtWidgets.QFileDialog(parent)
             dialog.setWindowTitle("Select *.dat file for {}".format(os.path.basename(file)))
-            dialog.setNameFilter("MPMS files (*.dat);;MPMS raw files (*.rw.dat);;All files (*.*)")
+            dialog.setNameFilter("MPMS files (*.dat *.dat.gz *.dat.xz *.dat.bz2);;" + 
+                                 "MPMS raw files (*.rw.dat *.rw.dat.gz *.rw.dat.xz *.rw.dat.bz2);;" + 
+                                 "All files (*.*)")
             result = dialog.exec()
             
             # check if the result is valid, if it is return the dat file, if not
@@ -774,7 +785,8 @@ class MainWindow(QtWidgets.QMainWindow):
                 The amout of data that should be loaded (this is the maximum that
                 the progress bar can reach)
             mode : String
-                The mode, use "loading" for loading, use "fitting" for fitting
+                The mode, use "loading" for loading, use "fitting" for fitting, use
+                "subtracting" for the background subtraction
             file : String
                 The filename of the currently loaded/fitted file
         """
@@ -790,7 +802,8 @@ class MainWindow(QtWidgets.QMainWindow):
             count : int
                 The amout of data that already has been processed
             mode : String
-                The mode, use "loading" for loading, use "fitting" for fitting
+                The mode, use "loading" for loading, use "fitting" for fitting, use
+                "subtracting" for the background subtraction
             file : String
                 The filename of the currently loaded/fitted file
         """
@@ -804,7 +817,8 @@ class MainWindow(QtWidgets.QMainWindow):
             success : boolean
                 Whether the opening was successfully or not
             mode : String
-                The mode, use "loading" for loading, use "fitting" for fitting
+                The mode, use "loading" for loading, use "fitting" for fitting, use
+                "subtracting" for the background subtraction
             file : String
                 The filename of the currently loaded/fitted file
         """
@@ -827,7 +841,8 @@ class MainWindow(QtWidgets.QMainWindow):
             value : int
                 The amout of data that already has been processed
             mode : String
-                The mode, use "loading" for loading, use "fitting" for fitting
+                The mode, use "loading" for loading, use "fitting" for fitting, use
+                "subtracting" for the background subtraction
             file : String
                 The filename of the currently loaded/fitted file
         """
@@ -837,6 +852,8 @@ class MainWindow(QtWidgets.QMainWindow):
                 m = "Loading"
                 if mode == "fitting":
                     m = "Fitting"
+                elif mode == "subtracting":
+                    m = "Subtracting background of"
                     
                 self._progress.setLabelText('{m} file {f}'.format(m=m, f=os.path.basename(file)))
                 self._progress.setValue(value)
@@ -879,10 +896,14 @@ class MainWindow(QtWidgets.QMainWindow):
         elif (isinstance(open_data, (list, tuple)) and 
               len(open_data) >= 2):
             if open_data[0] == "quick":
-                self.plotNewWindow(datacontainer.getPlotData(
-                        open_data[1], 
-                        DataHandling.DataContainer.DataContainer.MAGNETIZATION
-                        ))
+                axes = (open_data[1], 
+                        DataHandling.DataContainer.DataContainer.MAGNETIZATION)
+                
+                # fit the datapoints in the background if they are fitted 
+                # lazily, plot when they are fitted
+                self.controller.fitDataContainer(
+                        datacontainer, axes, 
+                        lambda: self.plotNewWindow(datacontainer.getPlotData(*axes)))
             elif open_data[0] == "normal":
                 self.actionGraphs(datacontainer, open_data[1])
     
@@ -908,6 +929,17 @@ class MainWindow(QtWidgets.QMainWindow):
             
         self.showOpenDialog()
     
+    def actionFollowFiles(self, checked):
+        """Perform the action for the follow files menu item
+        
+        Parameters
+        ----------
+            checked : boolean
+                Whether the files should be followed
+        """
+        
+        self._controller.setFollowFiles(checked)
+    
     def actionOpenSettings(self):
         """Perform the action for the Settings Menu Item"""
         View.PreferencesDialog.PreferencesDialog.getPreferences(self)
@@ -80,6 +80,9 @@ class PlotCanvas(FigureCanvas):
         self.plot_menu_factory = View.PlotMenuFactory.PlotMenuFactory(fig.canvas, self)
         self._context_menu = self.plot_menu_factory.context_menu
         
+        # the datacontainers whose appended data is added to the plots
+        self._appended_origins = []
+        
         # clear plot and init all the drawing variables
         self.clear()
         
@@ -431,6 +434,13 @@ class PlotCanvas(FigureCanvas):
         if isinstance(plotdata, DataHandling.PlotData.PlotData):
             self._plot_data.append(plotdata)
             self._plotData(-1)
+            
+            if (isinstance(plotdata.origin, DataHandling.DataContainer.DataContainer) and
+                plotdata.origin not in self._appended_origins):
+                # add the data of followed files to the plot when it is appended
+                plotdata.origin.dataAppended.connect(self.actionDataAppended)
+                self._appended_origins.append(plotdata.origin)
+            
             return len(self._plot_data) - 1
         elif isinstance(plotdata, list) or isinstance(plotdata, tuple):
             r = []
@@ -894,7 +904,8 @@ class PlotCanvas(FigureCanvas):
                 The index of the line to update, default: 0
         """
         
-        if my_utilities.is_numeric(plot_data_index) and my_utilities.is_numeric(line_index):
+        # the index 0 is not numeric for the my_utilities.is_numeric()
+        if isinstance(plot_data_index, int) and isinstance(line_index, int):
             try:
                 line = self._plots[plot_data_index][line_index]
             except IndexError:
@@ -976,6 +987,38 @@ class PlotCanvas(FigureCanvas):
                 else:
                     self.datapointClicked.emit(self._plot_data[plot_data_index], index, plot_data_index)
     
+    def actionDataAppended(self, datacontainer, indices):
+        """The action method if data has been appended to a followed 
+        datacontainer, the new points are added to the plot lines of the 
+        datacontainer without plotting again
+        
+        Parameters
+        ----------
+            datacontainer : DataContainer
+                The datacontainer that has new datapoints
+            indices : list of ints
+                The indices of the new (or completed) datapoints
+        """
+        
+        changed = False
+        
+        for plot_data_index, plot_data in enumerate(self._plot_data):
+            if (plot_data.origin is not datacontainer or plot_data.x_axis == None or 
+                plot_data.y_axis == None):
+                continue
+            
+            appended_data = datacontainer.getPlotData(plot_data.x_axis, plot_data.y_axis, 
+                                                      indices, False)
+            
+            # if the datacontainer has formats only the datapoints of the 
+            # formats are plotted, new datapoints are not in a format
+            if plot_data.mergePlotData(appended_data, datacontainer.getPlotFormatCount() == 0):
+                self.updateLineData(plot_data.x, plot_data.y, plot_data_index)
+                changed = True
+        
+        if changed:
+            self.commitUpdate()
+    
     def getFigure(self):
         """Get the figure of the plot canvas
         
@@ -991,6 +1034,15 @@ class PlotCanvas(FigureCanvas):
     def clear(self):
         """Clear the PlotCanvas. This removes all graphs and all settings"""
         
+        # do not add appended data anymore
+        for origin in self._appended_origins:
+            try:
+                origin.dataAppended.disconnect(self.actionDataAppended)
+            except (TypeError, RuntimeError):
+                pass
+        
+        self._appended_origins = []
+        
         # create the plot_data
         self._plot_data = []
         
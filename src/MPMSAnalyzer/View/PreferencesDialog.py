@@ -6,6 +6,7 @@ Created on Mon Oct 23 10:09:51 2017
 """
 
 from PyQt5 import QtCore, QtWidgets
+import os
 
 import Constants
 
@@ -31,6 +32,43 @@ class PreferencesDialog(QtWidgets.QDialog):
 #        languages.activated.connect(self._setPreferences)
         layout.addRow(QtWidgets.QLabel("Language"), languages)
         
+        # the number of processes to fit the datapoints in
+        self._fit_processes = QtWidgets.QSpinBox()
+        self._fit_processes.setRange(0, max(os.cpu_count(), 1))
+        self._fit_processes.setSpecialValueText("One per CPU")
+        self._fit_processes.setToolTip("The number of processes to fit the " + 
+                                       "datapoints of big files in")
+        try:
+            self._fit_processes.setValue(int(self._preferences.value(
+                    Constants.FIT_PROCESSES_PREFERENCE, Constants.FIT_PROCESSES)))
+        except (TypeError, ValueError):
+            self._fit_processes.setValue(Constants.FIT_PROCESSES)
+        layout.addRow(QtWidgets.QLabel("Fitting processes"), self._fit_processes)
+        
+        # whether to fit the datapoints when they are requested only
+        self._lazy_fitting = QtWidgets.QCheckBox("Fit the data points when they are used")
+        self._lazy_fitting.setToolTip("Open the files without fitting, the " + 
+                                      "data points are fitted when the " + 
+                                      "magnetization is plotted or exported")
+        self._lazy_fitting.setChecked(self._preferences.value(
+                Constants.FIT_LAZY_PREFERENCE, Constants.FIT_LAZY, type=bool))
+        layout.addRow(QtWidgets.QLabel("Lazy fitting"), self._lazy_fitting)
+        
+        # how the background voltages are matched to the sample voltages
+        self._subtraction_mode = QtWidgets.QComboBox()
+        self._subtraction_mode.setToolTip("Use the interpolation if the sample " + 
+                                          "and the background are not measured " + 
+                                          "at the same positions")
+        for text, mode in Constants.BACKGROUND_SUBTRACTION_MODES:
+            self._subtraction_mode.addItem(text, mode)
+        index = self._subtraction_mode.findData(self._preferences.value(
+                Constants.BACKGROUND_SUBTRACTION_MODE_PREFERENCE, 
+                Constants.BACKGROUND_SUBTRACTION_MODE))
+        if index < 0:
+            index = self._subtraction_mode.findData(Constants.BACKGROUND_SUBTRACTION_MODE)
+        self._subtraction_mode.setCurrentIndex(index)
+        layout.addRow(QtWidgets.QLabel("Background subtraction"), self._subtraction_mode)
+        
         constants_hint = QtWidgets.QLabel("Most of the preferences can be set " + 
                                           "in the Constants.py.")
         layout.addRow(constants_hint)
@@ -56,6 +94,18 @@ class PreferencesDialog(QtWidgets.QDialog):
         
         self.setLayout(dialog_layout)
     
+    def accept(self):
+        """Save the preferences and close the dialog"""
+        
+        self._preferences.setValue(Constants.FIT_PROCESSES_PREFERENCE, 
+                                   self._fit_processes.value())
+        self._preferences.setValue(Constants.FIT_LAZY_PREFERENCE, 
+                                   self._lazy_fitting.isChecked())
+        self._preferences.setValue(Constants.BACKGROUND_SUBTRACTION_MODE_PREFERENCE,
+                                   self._subtraction_mode.currentData())
+        
+        super(PreferencesDialog, self).accept()
+    
     @property
     def preferences(self):
         return self._preferences
@@ -5,11 +5,19 @@ Created on Wed Feb 14 14:22:28 2018
 @author: miile7
 """
 
+from PyQt5 import QtCore
+
 import my_utilities
 import View.ToolWizard.Tool
 import DataHandling.DataContainer
 
 class BackgroundSubtractionTool(View.ToolWizard.Tool.Tool):
+    # the signals of the batch mode, they are emitted in the calculation thread
+    # and received in the main thread
+    batchStart = QtCore.pyqtSignal(int, str, str)
+    batchProgress = QtCore.pyqtSignal(int, str, str)
+    batchSubtracted = QtCore.pyqtSignal('PyQt_PyObject')
+    
     def __init__(self):
         """Initialize the tool"""
         
@@ -20,13 +28,24 @@ class BackgroundSubtractionTool(View.ToolWizard.Tool.Tool):
                 calculating_text="Subtracting Background...",
                 icon=my_utilities.image("icon_difference.svg"),
                 needs_background_datacontainer=True,
-                needs_measurement_type=True
+                needs_measurement_type=True,
+                supports_batch=True,
+                batch_option="Interpolate the background for each further sample"
                 )
+        
+        self._batch_datacontainers = []
+        self._batch_count = 0
     
     def initializeTool(self):
         """Initialize the tool"""
         
         self.addCalculation(self.subtractBackground)
+        
+        # show the progress of each sample and add the results of the 
+        # additional samples to the file list as soon as they are finished
+        self.batchStart.connect(self.wizard.view.updateProgressStart)
+        self.batchProgress.connect(self.wizard.view.updateProgress)
+        self.batchSubtracted.connect(self.wizard.controller.addDataContainer)
     
     @property
     def preview(self):
@@ -42,7 +61,66 @@ class BackgroundSubtractionTool(View.ToolWizard.Tool.Tool):
     def subtractBackground(self):
         """Subtract the background for the wizards datacontainers. This is the 
         calculation callback"""
+        
+        wizard = self.wizard
+        
+        # the additional samples of the batch mode, the wizards sample is 
+        # subtracted the same way as without the batch mode
+        self._batch_datacontainers = [datacontainer for datacontainer in wizard.batch_datacontainers
+                                      if datacontainer is not wizard.sample_datacontainer]
+        
+        if len(self._batch_datacontainers) > 0:
+            self._batch_count = 0
+            self.batchStart.emit(len(self._batch_datacontainers) + 1, "subtracting", 
+                                 str(wizard.result_datacontainer.filepath))
+        
         self.wizard.result_datacontainer = self.wizard.controller.subtractBackgroundData(
                 self.wizard.result_datacontainer,
                 self.wizard.background_datacontainer
-                )
\ No newline at end of file
+                )
+        
+        if len(self._batch_datacontainers) > 0:
+            self._batch_count += 1
+            self.batchProgress.emit(self._batch_count, "subtracting", 
+                                    str(wizard.sample_datacontainer.filepath))
+            
+            self.subtractBackgroundBatch()
+    
+    def subtractBackgroundBatch(self):
+        """Subtract the background for all the additional samples of the batch 
+        mode in a pool of processes, the results are added to the file list. 
+        The background is subtracted the same way as for the wizards sample, 
+        if the batch option is checked the background is interpolated for 
+        each sample before
+        """
+        
+        wizard = self.wizard
+        
+        wizard.controller.subtractBackgroundDataBatch(
+                self._batch_datacontainers,
+                wizard.background_datacontainer,
+                wizard.measurement_variable,
+                self._batchFinished,
+                interpolate=wizard.batch_options.get(self.batch_option, False)
+                )
+    
+    def _batchFinished(self, index, datacontainer):
+        """The callback when the background of an additional sample of the 
+        batch mode has been subtracted
+        
+        Parameters
+        ----------
+            index : int
+                The index of the additional sample
+            datacontainer : DataContainer
+                The datacontainer with the subtracted background or None if the
+                background could not be subtracted
+        """
+        
+        self._batch_count += 1
+        
+        if datacontainer != None:
+            self.batchSubtracted.emit(datacontainer)
+        
+        self.batchProgress.emit(self._batch_count, "subtracting", 
+                                str(self._batch_datacontainers[index].filepath))
\ No newline at end of file
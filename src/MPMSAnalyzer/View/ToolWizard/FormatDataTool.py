@@ -6,6 +6,7 @@ Created on Tue Feb 20 11:01:48 2018
 """
 
 from PyQt5 import QtWidgets, QtGui, QtCore
+import numpy as np
 
 import DataHandling.DataContainer
 import View.ToolWizard.Tool
@@ -163,16 +164,18 @@ class ToolFormatPage(QtWidgets.QWizardPage):
             
             # get running variable
             if wizard.measurement_variable == DataHandling.DataContainer.DataContainer.TEMPERATURE:
-                groups, ranges = self._controller.uniqueListThreshold(
-                        temp_field_plot.x, 
-                        abs(min(temp_field_plot.x) /  Constants.STATIC_VALUE_THRESHOLD))
+                values = temp_field_plot.x
+                labels, ranges = self._controller.uniqueListThreshold(
+                        values, 
+                        abs(min(values) /  Constants.STATIC_VALUE_THRESHOLD))
                 
                 divide_label = temp_field_plot.x_label
                 divide_key = DataHandling.DataContainer.DataContainer.FIELD
             else:
-                groups, ranges = self._controller.uniqueListThreshold(
-                        temp_field_plot.y, 
-                        abs(min(temp_field_plot.y) /  Constants.STATIC_VALUE_THRESHOLD))
+                values = temp_field_plot.y
+                labels, ranges = self._controller.uniqueListThreshold(
+                        values, 
+                        abs(min(values) /  Constants.STATIC_VALUE_THRESHOLD))
                 
                 divide_label = temp_field_plot.y_label
                 divide_key = DataHandling.DataContainer.DataContainer.TEMPERATURE
@@ -181,12 +184,23 @@ class ToolFormatPage(QtWidgets.QWizardPage):
             remaining = set(range(0, len(self._datacontainer.datapoints)))
             
             # create the segments and add them to the segments list
-            if isinstance(ranges, dict):
+            if len(ranges) > 0:
+                values = np.asarray(values, dtype=float)
+                
+                # sort the values by their range once, the values of each 
+                # range start at the sum of the sizes of the previous ranges
+                order = np.argsort(labels, kind="stable")
+                sorted_values = values[order]
+                starts = np.concatenate(([0], np.cumsum(np.bincount(labels, minlength=len(ranges)))[:-1]))
+                minima = np.minimum.reduceat(sorted_values, starts)
+                maxima = np.maximum.reduceat(sorted_values, starts)
+                
                 # go through all ranges
-                for i in ranges:
-                    # create the segments value/the cause why this is in this segment
-                    mi = min(ranges[i])
-                    ma = max(ranges[i])
+                for i in range(len(ranges)):
+                    # create the segments value/the cause why this is in this 
+                    # segment, the labels tell which values are in the range
+                    mi = float(minima[i])
+                    ma = float(maxima[i])
                     name = divide_label
                     segment_value = my_utilities.mean_std((mi, ma))
                     segment_value = str(round(segment_value[0], 3)) + "\u00B1" + str(round(segment_value[1], 3))
@@ -33,6 +33,8 @@ class Tool(QtCore.QObject):
                 ("calculating_text", "Working..."),
                 ("needs_background_datacontainer", False),
                 ("needs_measurement_type", False),
+                ("supports_batch", False),
+                ("batch_option", ""),
                 ("preview", None),
                 ("save_suffix", None)
             )
@@ -119,6 +119,10 @@ class ToolAxisPage(QtWidgets.QWizardPage):
         x_axis = self._x_axis.currentData()
         y_axis = self._y_axis.currentData()
         
-        plot_data = wizard.result_datacontainer.getPlotData(x_axis, y_axis)
-        
-        wizard.result_canvas.addPlotData(plot_data)
\ No newline at end of file
+        # fit the datapoints in the background if they are fitted lazily, 
+        # plot when they are fitted
+        wizard.controller.fitDataContainer(
+                wizard.result_datacontainer, (x_axis, y_axis), 
+                lambda: wizard.result_canvas.addPlotData(
+                        wizard.result_datacontainer.getPlotData(x_axis, y_axis)), 
+                None, wizard)
\ No newline at end of file
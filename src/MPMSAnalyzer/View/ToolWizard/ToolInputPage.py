@@ -26,6 +26,11 @@ class ToolInputPage(QtWidgets.QWizardPage):
         
         self._background_label = None
         self._background_name = None
+        
+        self._show_batch_datacontainers = False
+        self._batch_label = None
+        self._batch_list = None
+        self._batch_options = []
         self._temp_loaded_datapoints = set()
         
     @property
@@ -38,6 +43,16 @@ class ToolInputPage(QtWidgets.QWizardPage):
         
         self._initializeBackground()
     
+    @property
+    def show_batch_datacontainers(self):
+        return self._show_batch_datacontainers
+    
+    @show_batch_datacontainers.setter
+    def show_batch_datacontainers(self, show_batch_datacontainers):
+        self._show_batch_datacontainers = show_batch_datacontainers
+        
+        self._initializeBatch()
+    
     def initializePage(self):
         """Initialize the QWizardPage"""
         
@@ -103,7 +118,43 @@ class ToolInputPage(QtWidgets.QWizardPage):
         
         layout.addItem(radio_buttons_layout, 2, 1, 1, 2)
         
+        # the additional samples for the batch mode, all the opened files can
+        # be selected
+        self._batch_label = QtWidgets.QLabel("Further sample measurements")
+        self._batch_label.setToolTip("The selected measurements are processed in " + 
+                                     "the same way as the sample measurement, the " + 
+                                     "results are added to the file list")
+        layout.addWidget(self._batch_label, 3, 0, QtCore.Qt.AlignTop)
+        
+        self._batch_list = QtWidgets.QListWidget()
+        self._batch_list.itemChanged.connect(self.actionBatchDataContainersChanged)
+        
+        for datacontainer in wizard.controller.getDataContainerList():
+            item = QtWidgets.QListWidgetItem(datacontainer.createName())
+            item.setData(QtCore.Qt.UserRole, datacontainer)
+            item.setFlags(item.flags() | QtCore.Qt.ItemIsUserCheckable)
+            
+            if datacontainer in wizard.batch_datacontainers:
+                item.setCheckState(QtCore.Qt.Checked)
+            else:
+                item.setCheckState(QtCore.Qt.Unchecked)
+            
+            self._batch_list.addItem(item)
+        
+        layout.addWidget(self._batch_list, 3, 1)
+        
+        # the options of the tools how the additional samples are processed
+        self._batch_options = []
+        for i, (text, checked) in enumerate(wizard.batch_options.items()):
+            checkbox = QtWidgets.QCheckBox(text)
+            checkbox.setChecked(checked)
+            checkbox.toggled.connect(self.actionBatchOptionChanged)
+            
+            layout.addWidget(checkbox, 4 + i, 1)
+            self._batch_options.append((text, checkbox))
+        
         self._initializeBackground()
+        self._initializeBatch()
         
         # set the layout
         self.setLayout(layout)
@@ -135,6 +186,27 @@ class ToolInputPage(QtWidgets.QWizardPage):
             self._background_label.setVisible(has_background)
             self._background_name.setVisible(has_background)
     
+    def _initializeBatch(self, has_batch = None):
+        """Initialize the batch mode, this will show the list of the additional
+        samples if the tool supports the batch mode
+        
+        Parameters
+        ----------
+            has_batch : boolean
+                Whether the input page should show the additional samples or not
+        """
+        
+        if has_batch == None:
+            has_batch = self._show_batch_datacontainers
+        
+        # hide/show the list of the additional samples
+        if self._batch_label != None and self._batch_list != None:
+            self._batch_label.setVisible(has_batch)
+            self._batch_list.setVisible(has_batch)
+        
+        for text, checkbox in self._batch_options:
+            checkbox.setVisible(has_batch)
+    
     def isComplete(self):
         """Check whether the page is complete
         
@@ -214,6 +286,9 @@ class ToolInputPage(QtWidgets.QWizardPage):
         if isinstance(self._background_name.selected_datacontainer, DataHandling.DataContainer.DataContainer):
             self._background_name.selected_datacontainer.measurement_variable = wizard.measurement_variable
             
+        for batch_datacontainer in wizard.batch_datacontainers:
+            batch_datacontainer.measurement_variable = wizard.measurement_variable
+        
         if isinstance(datacontainer, DataHandling.DataContainer.DataContainer):
             datacontainer.measurement_variable = wizard.measurement_variable
          
@@ -255,6 +330,24 @@ class ToolInputPage(QtWidgets.QWizardPage):
             
         self.completeChanged.emit()
     
+    def actionBatchDataContainersChanged(self):
+        """Action method when an additional sample has been (un-)checked"""
+        
+        wizard = self.wizard()
+        
+        wizard.batch_datacontainers = self.getBatchDataContainers()
+        
+        self.updateMeasurementVariable()
+    
+    def actionBatchOptionChanged(self):
+        """Action method when an option of the batch mode has been 
+        (un-)checked"""
+        
+        wizard = self.wizard()
+        
+        for text, checkbox in self._batch_options:
+            wizard.batch_options[text] = checkbox.isChecked()
+    
     def getDataContainer(self):
         """Get the datacontainer
         
@@ -266,6 +359,27 @@ class ToolInputPage(QtWidgets.QWizardPage):
         
         return self._file_name.selected_datacontainer
     
+    def getBatchDataContainers(self):
+        """Get the additional sample datacontainers of the batch mode
+        
+        Returns
+        -------
+            list of DataContainer
+                The checked datacontainers
+        """
+        
+        if self._batch_list == None:
+            return []
+        
+        datacontainers = []
+        for i in range(self._batch_list.count()):
+            item = self._batch_list.item(i)
+            
+            if item.checkState() == QtCore.Qt.Checked:
+                datacontainers.append(item.data(QtCore.Qt.UserRole))
+        
+        return datacontainers
+    
     def getBackgroundDataContainer(self):
         """Get the background datacontainer
         
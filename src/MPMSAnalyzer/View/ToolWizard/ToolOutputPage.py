@@ -396,12 +396,20 @@ class ToolOutputPage(QtWidgets.QWizardPage):
         if isinstance(sender, QtCore.QObject):
             fileending = sender.property("fileending")
             
+            # the files are compressed if they have the extension of a 
+            # compression
             if fileending == "csv":
-                file_filter = "CSV files (*.csv);;" + file_filter
+                file_filter = ("CSV files (*.csv);;" + 
+                               "Compressed CSV files (*.csv.gz *.csv.xz *.csv.bz2);;" + 
+                               file_filter)
             elif fileending == "rw.dat":
-                file_filter = "Raw mpms files (*.rw.dat);;" + file_filter
+                file_filter = ("Raw mpms files (*.rw.dat);;" + 
+                               "Compressed raw mpms files (*.rw.dat.gz *.rw.dat.xz *.rw.dat.bz2);;" + 
+                               file_filter)
             elif fileending == "dat":
-                file_filter = "Mpms files (*.dat);;" + file_filter
+                file_filter = ("Mpms files (*.dat);;" + 
+                               "Compressed mpms files (*.dat.gz *.dat.xz *.dat.bz2);;" + 
+                               file_filter)
         
         path = os.path.dirname(wizard.getDefaultSavePath())
         
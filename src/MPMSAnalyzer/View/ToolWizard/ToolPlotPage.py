@@ -49,9 +49,16 @@ class ToolPlotPage(QtWidgets.QWizardPage):
             wizard.result_canvas = View.PlotCanvas.PlotCanvas()
         
         if len(wizard.result_canvas.getPlotDataList()) == 0:
-            wizard.result_canvas.addPlotData(wizard.result_datacontainer.getPlotData(
-                    wizard.measurement_variable,
-                    DataHandling.DataContainer.DataContainer.MAGNETIZATION))
+            axes = (wizard.measurement_variable,
+                    DataHandling.DataContainer.DataContainer.MAGNETIZATION)
+            
+            # fit the datapoints in the background if they are fitted lazily,
+            # plot when they are fitted
+            wizard.controller.fitDataContainer(
+                    wizard.result_datacontainer, axes,
+                    lambda: wizard.result_canvas.addPlotData(
+                            wizard.result_datacontainer.getPlotData(*axes)),
+                    None, wizard)
         
         # the menu factory for creating the edits
         self._menu_factory = View.PlotMenuFactory.PlotMenuFactory(wizard.result_canvas, self)
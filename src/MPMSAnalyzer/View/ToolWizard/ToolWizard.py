@@ -65,12 +65,19 @@ class ToolWizard(QtWidgets.QWizard):
         
         self.show_background_datacontainer = False
         self.show_measurement_type = False
+        self.show_batch_datacontainers = False
+        # the options of the tools for the batch mode, the key is the text of
+        # the checkbox, the value is whether the option is checked
+        self.batch_options = {}
         
         self.standalone = not self.view.isVisible()
         
         self.sample_datacontainer = None
         self.background_datacontainer = None
         self.result_datacontainer = None
+        # the additional sample datacontainers for the tools that support 
+        # the batch mode
+        self.batch_datacontainers = []
         
         self._measurement_variable = None
         
@@ -98,6 +105,7 @@ class ToolWizard(QtWidgets.QWizard):
                 self.addTool(tool)
                 
         input_page.show_background_datacontainer = self.show_background_datacontainer
+        input_page.show_batch_datacontainers = self.show_batch_datacontainers
         
         # tools can add a page, add this page as the last page
         self._output_index = self.addPage(View.ToolWizard.ToolOutputPage.ToolOutputPage())
@@ -262,6 +270,12 @@ class ToolWizard(QtWidgets.QWizard):
             if tool.needs_measurement_type == True:
                 self.show_measurement_type = True
             
+            if tool.supports_batch == True:
+                self.show_batch_datacontainers = True
+                
+                if isinstance(tool.batch_option, str) and len(tool.batch_option) > 0:
+                    self.batch_options[tool.batch_option] = False
+            
             i = len(self._tools)
             
             self._tools.append(tool)
@@ -0,0 +1,1010 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 11:02:18 2026
+
+@author: miile7
+
+Benchmarks for the performance critical parts of the MPMSAnalyzer. Run this
+file from the MPMSAnalyzer directory, pass the names of the benchmarks to run
+as arguments (all benchmarks run if no argument is given):
+    
+    python benchmark.py [parsing] [lazy] [cache] [rows] [fit] [jacobian] [parallel] [warm] [batched] [fitcache] [subtraction] [interpolation] [clustering] [backgroundcache] [backgroundbatch] [resampling] [--sweeps=<number of sweeps>]
+"""
+
+print("Importing packages...")
+from PyQt5 import QtWidgets
+import tracemalloc
+import tempfile
+import warnings
+import time
+import sys
+import os
+
+import numpy as np
+
+import DataHandling.DataContainer
+import DataHandling.DataPoint
+import DataHandling.calculation
+import DataHandling.ParseCache
+import DataHandling.FitCache
+import DataHandling.SweepSet
+import my_utilities
+import Controller
+import Constants
+
+# the example files shipped with the program
+EXAMPLE_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            "..", "..", "example_data")
+EXAMPLE_FILES = (
+    "M20171121_Pd_one_torlon_M(T)_at_10000_Oe",
+    "M20171121_Pd_one_torlon_M(T)_at_10000_Oe_background"
+)
+
+def createSyntheticRawFile(filepath, sweeps, rows = 200):
+    """Create a raw file which looks like a M(T) measurement of the MPMS with
+    the given number of sweeps (the number of datapoints in the DataContainer).
+    Each sweep contains the data rows and the fit rows
+    
+    Parameters
+    ----------
+        filepath : String
+            The path to save the file to
+        sweeps : int
+            The number of sweeps (up and down sweeps) to create
+        rows : int, optional
+            The number of data rows of each sweep
+    """
+    
+    random = np.random.RandomState(0)
+    positions = np.linspace(24.9, 54.9, rows)
+    timestamp = 3720425238.51308
+    
+    file = open(filepath, "w")
+    file.write("[Header]\n")
+    file.write("; DC Raw Data File (default extension .raw)\n")
+    file.write("TITLE,Synthetic benchmark data\n")
+    file.write("INFO,Synthetic,SAMPLE_MATERIAL\n")
+    file.write("[Data]\n")
+    file.write("Comment,Time Stamp (sec),Raw Position (mm),Raw Voltage (V)," +
+               "Processed Voltage (V),Fixed C Fitted (V),Free C Fitted (V)\n")
+    
+    for i in range(sweeps):
+        temperature = 300 - 290 * (i // 2) / max(sweeps // 2, 1)
+        
+        file.write(("; low temp = {t} K;high temp = {t} K;avg. temp = {t} K;" +
+                    "low field = 10000 Oe;high field = 10000 Oe;" +
+                    "drift = -0.0003 V/s;slope = -4.6E-5 V/mm;squid range = 1000;" +
+                    "given center = 39.88 mm;calculated center = 39.86 mm;" +
+                    "amp fixed = 2.49 V;amp free =2.49 V\n").format(t=temperature))
+        
+        if i % 2 == 1:
+            sweep_positions = positions[::-1]
+        else:
+            sweep_positions = positions
+        
+        voltages = DataHandling.calculation.dipolfunction(
+            sweep_positions, 2.5, 0.0001, -0.3, 39.9)
+        voltages = voltages + random.normal(0, 0.001, rows)
+        
+        for position, voltage in zip(sweep_positions, voltages):
+            timestamp += 0.02
+            file.write(",{},{},{},{}\n".format(timestamp, position, voltage,
+                                                voltage + 0.3))
+        
+        for position, voltage in zip(sweep_positions, voltages):
+            timestamp += 0.02
+            file.write(",{},{},,,{},{}\n".format(timestamp, position, voltage,
+                                                 voltage))
+    
+    file.close()
+
+def measure(function, *args, repeat = 3):
+    """Execute the function repeat times and return the fastest time
+    
+    Returns
+    -------
+        float
+            The time in seconds
+    """
+    
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        times.append(time.perf_counter() - start)
+    
+    return min(times)
+
+def benchmarkParsing(files):
+    """Compare the line by line parsing with the bulk parsing of the raw files
+    
+    Parameters
+    ----------
+        files : list of tuples
+            The name to display and the path of the raw file
+    """
+    
+    print("Parsing raw files (line by line vs. bulk parsing)")
+    
+    def parse(filepath, bulk_parsing):
+        datacontainer = DataHandling.DataContainer.DataContainer(filepath)
+        datacontainer.readFileData(None, bulk_parsing, False, False)
+    
+    for name, filepath in files:
+        legacy = measure(parse, filepath, False)
+        bulk = measure(parse, filepath, True)
+        
+        print("  {:<40} {:>5.1f} MB  line by line: {:>7.3f}s  bulk: {:>7.3f}s  speedup: {:>5.1f}x".format(
+            name, os.path.getsize(filepath) / 1024**2, legacy, bulk, legacy / bulk))
+
+def benchmarkLazyLoading(files):
+    """Compare opening the raw files with loading all rows with opening them
+    with the lazy loading of the rows
+    
+    Parameters
+    ----------
+        files : list of tuples
+            The name to display and the path of the raw file
+    """
+    
+    print("Opening raw files (all rows vs. lazy loading)")
+    
+    def parse(filepath, lazy_loading):
+        datacontainer = DataHandling.DataContainer.DataContainer(filepath)
+        datacontainer.readFileData(None, True, lazy_loading, False)
+        return datacontainer
+    
+    def memory(filepath, lazy_loading):
+        tracemalloc.start()
+        datacontainer = parse(filepath, lazy_loading)
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        
+        del datacontainer
+        return size / 1024**2
+    
+    for name, filepath in files:
+        loaded = measure(parse, filepath, False)
+        lazy = measure(parse, filepath, True)
+        
+        print("  {:<40} all rows: {:>7.3f}s {:>7.1f} MB  lazy: {:>7.3f}s {:>7.1f} MB  speedup: {:>5.1f}x".format(
+            name, loaded, memory(filepath, False), lazy, memory(filepath, True), 
+            loaded / lazy))
+
+def benchmarkParseCache(files):
+    """Compare parsing and fitting the raw files with loading them from the
+    parse cache
+    
+    Parameters
+    ----------
+        files : list of tuples
+            The name to display and the path of the raw file
+    """
+    
+    print("Opening and fitting raw files (parsing vs. parse cache)")
+    
+    directory = tempfile.mkdtemp()
+    cache = DataHandling.ParseCache.ParseCache(directory)
+    
+    def open_file(filepath, use_cache):
+        datacontainer = DataHandling.DataContainer.DataContainer(filepath)
+        
+        if not use_cache or not cache.load(datacontainer):
+            datacontainer.readFileData(None, None, None, False)
+            datacontainer.fitDataPoints()
+        
+        return datacontainer
+    
+    for name, filepath in files:
+        parsed = measure(open_file, filepath, False, repeat=1)
+        cache.save(open_file(filepath, False))
+        cached = measure(open_file, filepath, True)
+        
+        print("  {:<40} parsing and fitting: {:>7.3f}s  cache: {:>7.3f}s  speedup: {:>6.1f}x".format(
+            name, parsed, cached, parsed / cached))
+    
+    cache.clear()
+    os.rmdir(directory)
+
+def benchmarkRowStorage(files):
+    """Compare the memory and the time to get the plot data of the rows 
+    saved as a list of tuples (as before) with the columns of the row tables
+    
+    Parameters
+    ----------
+        files : list of tuples
+            The name to display and the path of the raw file
+    """
+    
+    print("Row storage (list of tuples vs. columns)")
+    
+    DataPoint = DataHandling.DataPoint.DataPoint
+    
+    def memory(create):
+        tracemalloc.start()
+        rows = create()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        
+        del rows
+        return size / 1024**2
+    
+    def get_rows(datapoints):
+        # the rows as they have been saved before
+        return [list(datapoint._data_rows) for datapoint in datapoints]
+    
+    def get_tables(datapoints):
+        return [datapoint._data_rows.copy() for datapoint in datapoints]
+    
+    def plot_rows(rows):
+        for datapoint_rows in rows:
+            valid = [row for row in datapoint_rows if isinstance(row, tuple)]
+            x = [float(row[3]) for row in valid]
+            y = [float(row[4]) for row in valid]
+    
+    def plot_tables(datapoints):
+        for datapoint in datapoints:
+            datapoint.getPlotData(DataPoint.RAW_POSITION, DataPoint.RAW_VOLTAGE, True)
+    
+    for name, filepath in files:
+        datacontainer = DataHandling.DataContainer.DataContainer(filepath)
+        datacontainer.readFileData(None, True, False, False)
+        datapoints = datacontainer.datapoints
+        
+        rows = get_rows(datapoints)
+        tuples = measure(plot_rows, rows)
+        columns = measure(plot_tables, datapoints)
+        
+        print("  {:<40} tuples: {:>7.3f}s {:>7.1f} MB  columns: {:>7.3f}s {:>7.1f} MB  speedup: {:>5.1f}x".format(
+            name, tuples, memory(lambda: get_rows(datapoints)), columns, 
+            memory(lambda: get_tables(datapoints)), tuples / columns))
+
+def benchmarkFitting(files):
+    """Compare the time to fit the datapoints with the curve_fit() and with the
+    variable projection, the difference of the magnetizations is shown too. If
+    the fits found different minimums they are counted seperately
+    
+    Parameters
+    ----------
+        files : list of tuples
+            The name to display and the path of the raw file
+    """
+    
+    print("Fitting datapoints (curve_fit vs. variable projection)")
+    
+    DataPoint = DataHandling.DataPoint.DataPoint
+    
+    def fit(function, data):
+        return [function(xdata, ydata, 1) for xdata, ydata in data]
+    
+    for name, filepath in files:
+        datacontainer = DataHandling.DataContainer.DataContainer(filepath)
+        datacontainer.readFileData(None, True, False, False)
+        
+        # the data as the DataPoint.execFit() passes it
+        data = []
+        for datapoint in datacontainer.datapoints:
+            xdata, ydata = datapoint.getColumnData(DataPoint.RAW_POSITION, DataPoint.RAW_VOLTAGE)
+            order = np.lexsort((ydata, xdata))
+            data.append((xdata[order], ydata[order]))
+        
+        curve_fit = measure(fit, DataHandling.calculation.datapointFitCurveFit, data, repeat=1)
+        projection = measure(fit, DataHandling.calculation.datapointFitVariableProjection, data, repeat=1)
+        
+        # the fits are different if the variable projection goes to another
+        # minimum than the curve_fit(), count them and check if the residuals
+        # are smaller
+        different = 0
+        better = 0
+        difference = 0
+        for (xdata, ydata), a, b in zip(data, 
+                                        fit(DataHandling.calculation.datapointFitCurveFit, data),
+                                        fit(DataHandling.calculation.datapointFitVariableProjection, data)):
+            relative = abs(a[0] - b[0]) / abs(a[0])
+            
+            if relative > 1e-5:
+                different += 1
+                
+                residuals_a = ydata - DataHandling.calculation.dipolfunction(xdata, *a[2])
+                residuals_b = ydata - DataHandling.calculation.dipolfunction(xdata, *b[2])
+                if np.sum(residuals_b**2) < np.sum(residuals_a**2):
+                    better += 1
+            else:
+                difference = max(difference, relative)
+        
+        count = max(len(data), 1)
+        print(("  {:<40} curve_fit: {:>7.3f}s {:>6.2f}ms/point  projection: {:>7.3f}s " +
+               "{:>6.2f}ms/point  speedup: {:>5.1f}x  max. rel. difference: {:.1e}  " + 
+               "other minimum: {} ({} better)").format(
+            name, curve_fit, 1000 * curve_fit / count, projection, 
+            1000 * projection / count, curve_fit / projection, difference,
+            different, better))
+
+def benchmarkJacobian(files):
+    """Compare fitting the datapoints with the curve_fit() using finite 
+    differences with the curve_fit() using the analytic jacobian, the number
+    of evaluations of the dipolfunction and the jacobian is counted too
+    
+    Parameters
+    ----------
+        files : list of tuples
+            The name to display and the path of the raw file
+    """
+    
+    print("Fitting datapoints with curve_fit (finite differences vs. analytic jacobian)")
+    
+    calculation = DataHandling.calculation
+    dipolfunction = calculation.dipolfunction
+    dipolJacobian = calculation.dipolJacobian
+    evaluations = [0]
+    
+    def counted(function):
+        def wrapper(*args):
+            evaluations[0] += 1
+            return function(*args)
+        return wrapper
+    
+    def fit(datacontainer, analytic_jacobian):
+        Constants.FIT_ANALYTIC_JACOBIAN = analytic_jacobian
+        datacontainer.fitDataPoints()
+    
+    def count(datacontainer, analytic_jacobian):
+        evaluations[0] = 0
+        calculation.dipolfunction = counted(dipolfunction)
+        calculation.dipolJacobian = counted(dipolJacobian)
+        
+        try:
+            fit(datacontainer, analytic_jacobian)
+        finally:
+            calculation.dipolfunction = dipolfunction
+            calculation.dipolJacobian = dipolJacobian
+        
+        return evaluations[0] / max(len(datacontainer.datapoints), 1)
+    
+    variable_projection = Constants.FIT_VARIABLE_PROJECTION
+    analytic_jacobian = Constants.FIT_ANALYTIC_JACOBIAN
+    Constants.FIT_VARIABLE_PROJECTION = False
+    
+    try:
+        for name, filepath in files:
+            datacontainer = DataHandling.DataContainer.DataContainer(filepath)
+            datacontainer.readFileData(None, True, False, False)
+            count_points = max(len(datacontainer.datapoints), 1)
+            
+            finite = measure(fit, datacontainer, False, repeat=1)
+            finite_evaluations = count(datacontainer, False)
+            analytic = measure(fit, datacontainer, True, repeat=1)
+            analytic_evaluations = count(datacontainer, True)
+            
+            print(("  {:<40} finite differences: {:>7.3f}s {:>6.2f}ms/point {:>5.1f} evaluations/point  " + 
+                   "jacobian: {:>7.3f}s {:>6.2f}ms/point {:>5.1f} evaluations/point  speedup: {:>5.1f}x").format(
+                name, finite, 1000 * finite / count_points, finite_evaluations,
+                analytic, 1000 * analytic / count_points, analytic_evaluations,
+                finite / analytic))
+    finally:
+        Constants.FIT_VARIABLE_PROJECTION = variable_projection
+        Constants.FIT_ANALYTIC_JACOBIAN = analytic_jacobian
+
+def benchmarkParallelFitting(files):
+    """Compare fitting the datapoints in the current process with fitting them
+    in one process per cpu
+    
+    Parameters
+    ----------
+        files : list of tuples
+            The name to display and the path of the raw file
+    """
+    
+    print("Fitting datapoints (one process vs. {} processes)".format(os.cpu_count()))
+    
+    def fit(datacontainer, processes):
+        datacontainer.fitDataPoints(processes)
+    
+    minimum = Constants.FIT_PARALLEL_MINIMUM_DATAPOINTS
+    Constants.FIT_PARALLEL_MINIMUM_DATAPOINTS = 0
+    
+    try:
+        for name, filepath in files:
+            datacontainer = DataHandling.DataContainer.DataContainer(filepath)
+            datacontainer.readFileData(None, True, False, False)
+            
+            sequential = measure(fit, datacontainer, 1, repeat=1)
+            parallel = measure(fit, datacontainer, 0, repeat=1)
+            
+            print("  {:<40} one process: {:>7.3f}s  parallel: {:>7.3f}s  speedup: {:>5.1f}x".format(
+                name, sequential, parallel, sequential / parallel))
+    finally:
+        Constants.FIT_PARALLEL_MINIMUM_DATAPOINTS = minimum
+
+def benchmarkWarmStart(files):
+    """Compare fitting the datapoints with the curve_fit() starting at the 
+    constant starting values with starting at the results of the previous
+    datapoint with the same sweep direction
+    
+    Parameters
+    ----------
+        files : list of tuples
+            The name to display and the path of the raw file
+    """
+    
+    print("Fitting datapoints with curve_fit (constant starting values vs. warm start)")
+    
+    calculation = DataHandling.calculation
+    dipolfunction = calculation.dipolfunction
+    evaluations = [0]
+    
+    def counted(*args):
+        evaluations[0] += 1
+        return dipolfunction(*args)
+    
+    def fit(datacontainer, warm_start):
+        Constants.FIT_WARM_START = warm_start
+        datacontainer.fitDataPoints(1)
+    
+    def count(datacontainer, warm_start):
+        evaluations[0] = 0
+        calculation.dipolfunction = counted
+        
+        try:
+            fit(datacontainer, warm_start)
+        finally:
+            calculation.dipolfunction = dipolfunction
+        
+        return evaluations[0] / max(len(datacontainer.datapoints), 1)
+    
+    def magnetizations(datacontainer):
+        return np.array([datapoint.getFitResults()[0] for datapoint in datacontainer.datapoints])
+    
+    variable_projection = Constants.FIT_VARIABLE_PROJECTION
+    warm_start = Constants.FIT_WARM_START
+    Constants.FIT_VARIABLE_PROJECTION = False
+    
+    try:
+        for name, filepath in files:
+            datacontainer = DataHandling.DataContainer.DataContainer(filepath)
+            datacontainer.readFileData(None, True, False, False)
+            
+            cold = measure(fit, datacontainer, False, repeat=1)
+            cold_evaluations = count(datacontainer, False)
+            cold_magnetizations = magnetizations(datacontainer)
+            warm = measure(fit, datacontainer, True, repeat=1)
+            warm_evaluations = count(datacontainer, True)
+            difference = np.max(np.abs(magnetizations(datacontainer) - cold_magnetizations) / 
+                                np.abs(cold_magnetizations))
+            
+            print(("  {:<40} constant: {:>7.3f}s {:>5.1f} evaluations/point  " + 
+                   "warm start: {:>7.3f}s {:>5.1f} evaluations/point  speedup: {:>5.1f}x  " + 
+                   "max. rel. difference: {:.1e}").format(
+                name, cold, cold_evaluations, warm, warm_evaluations, cold / warm,
+                difference))
+    finally:
+        Constants.FIT_VARIABLE_PROJECTION = variable_projection
+        Constants.FIT_WARM_START = warm_start
+
+def benchmarkBatchedFitting(files):
+    """Compare fitting the datapoints one by one (by the curve_fit() or the 
+    variable projection, see the Constants.FIT_VARIABLE_PROJECTION) with 
+    fitting the datapoints with the same number of values at once
+    
+    Parameters
+    ----------
+        files : list of tuples
+            The name to display and the path of the raw file
+    """
+    
+    print("Fitting datapoints (one by one vs. batched)")
+    
+    def fit(datacontainer, batched):
+        Constants.FIT_BATCHED = batched
+        datacontainer.fitDataPoints(1)
+    
+    def magnetizations(datacontainer):
+        return np.array([datapoint.getFitResults()[0] for datapoint in datacontainer.datapoints])
+    
+    batched = Constants.FIT_BATCHED
+    
+    try:
+        for name, filepath in files:
+            datacontainer = DataHandling.DataContainer.DataContainer(filepath)
+            datacontainer.readFileData(None, True, False, False)
+            
+            single = measure(fit, datacontainer, False, repeat=1)
+            single_magnetizations = magnetizations(datacontainer)
+            stacked = measure(fit, datacontainer, True, repeat=1)
+            difference = np.max(np.abs(magnetizations(datacontainer) - single_magnetizations) / 
+                                np.abs(single_magnetizations))
+            
+            # the number of datapoints fitted at once, the others are fitted one
+            # by one
+            results = DataHandling.calculation.datapointFitBatched(
+                    [datapoint.getFitData() for datapoint in datacontainer.datapoints])
+            count = sum(1 for result in results if result != None)
+            
+            print(("  {:<40} one by one: {:>7.3f}s  batched: {:>7.3f}s  speedup: {:>5.1f}x  " + 
+                   "max. rel. difference: {:.1e}  stacked: {}/{}").format(
+                name, single, stacked, single / stacked, difference, count, len(results)))
+    finally:
+        Constants.FIT_BATCHED = batched
+
+def benchmarkFitCache(files):
+    """Compare fitting the datapoints with refitting them when the results 
+    are in the fit cache
+    
+    Parameters
+    ----------
+        files : list of tuples
+            The name to display and the path of the raw file
+    """
+    
+    print("Fitting datapoints (empty vs. filled fit cache)")
+    
+    def fit(datacontainer):
+        for datapoint in datacontainer.datapoints:
+            datapoint.execFit()
+    
+    use_cache = Constants.FIT_CACHE
+    Constants.FIT_CACHE = True
+    
+    try:
+        for name, filepath in files:
+            datacontainer = DataHandling.DataContainer.DataContainer(filepath)
+            datacontainer.readFileData(None, True, False, False)
+            
+            DataHandling.FitCache.getDefaultCache().clear()
+            empty = measure(fit, datacontainer, repeat=1)
+            filled = measure(fit, datacontainer, repeat=1)
+            
+            print("  {:<40} empty: {:>7.3f}s  filled: {:>7.3f}s  speedup: {:>5.1f}x".format(
+                name, empty, filled, empty / filled))
+    finally:
+        Constants.FIT_CACHE = use_cache
+
+def benchmarkSubtraction(files):
+    """Compare the background subtraction looping over the rows (as before)
+    with the subtraction on the arrays, each datapoint is used as the 
+    background of the previous datapoint
+    
+    Parameters
+    ----------
+        files : list of tuples
+            The name to display and the path of the raw file
+    """
+    
+    print("Background subtraction (loop vs. arrays)")
+    
+    DataPoint = DataHandling.DataPoint.DataPoint
+    
+    def subtract_loop(pairs):
+        for table, background in pairs:
+            # the rows as they have been saved before
+            rows = list(table)
+            xdata = []
+            ydata = []
+            indices_map = {}
+            
+            for i, row in enumerate(rows):
+                if row != DataPoint.EMPTY_ROW:
+                    xdata.append(row[3])
+                    ydata.append(row[4])
+                    indices_map[i] = len(xdata) - 1
+            
+            rx = []
+            ry = []
+            remove_values = []
+            for counter, (x, y) in enumerate(zip(xdata, ydata)):
+                x = my_utilities.force_float(x)
+                y = my_utilities.force_float(y)
+                rx.append(x)
+                
+                if counter < len(background):
+                    by = my_utilities.force_float(background[counter])
+                else:
+                    by = 0
+                
+                ry.append(y - by)
+                remove_values.append((counter + 1, y, by, y - by))
+            
+            for index, row in enumerate(rows):
+                if row != DataPoint.EMPTY_ROW:
+                    row = list(row)
+                    row[3] = rx[indices_map[index]]
+                    row[4] = ry[indices_map[index]]
+                    rows[index] = tuple(row)
+    
+    def subtract_arrays(pairs):
+        for table, background in pairs:
+            table = table.copy()
+            rx, ry, remove_values, labels = DataHandling.calculation.subtractBackgroundData(
+                    table.getValidColumn(3), table.getValidColumn(4), 1, None, 
+                    background, 1)
+            
+            table.setValidColumn(3, rx)
+            table.setValidColumn(4, ry)
+    
+    for name, filepath in files:
+        datacontainer = DataHandling.DataContainer.DataContainer(filepath)
+        datacontainer.readFileData(None, True, False, False)
+        datapoints = datacontainer.datapoints
+        
+        pairs = []
+        for i, datapoint in enumerate(datapoints):
+            background = datapoints[(i + 1) % len(datapoints)]
+            pairs.append((datapoint._data_rows, background.getPlotData(
+                    DataPoint.RAW_POSITION, DataPoint.RAW_VOLTAGE, True)[1]))
+        
+        loop = measure(subtract_loop, pairs)
+        arrays = measure(subtract_arrays, pairs)
+        
+        print("  {:<40} loop: {:>7.3f}s  arrays: {:>7.3f}s  speedup: {:>5.1f}x".format(
+            name, loop, arrays, loop / arrays))
+
+def benchmarkResampling(files):
+    """Compare the background subtraction looping over the rows and using the
+    background value in the same row (as before) with interpolating the 
+    background at the positions of the sample linearly and with the cubic 
+    hermite spline, each datapoint is used as the background of the previous
+    datapoint
+    
+    Parameters
+    ----------
+        files : list of tuples
+            The name to display and the path of the raw file
+    """
+    
+    print("Background subtraction (index loop vs. linear vs. cubic resampling)")
+    
+    DataPoint = DataHandling.DataPoint.DataPoint
+    
+    def subtract_loop(pairs):
+        for xdata, ydata, xbackground, ybackground in pairs:
+            rx = []
+            ry = []
+            remove_values = []
+            for counter, (x, y) in enumerate(zip(xdata, ydata)):
+                x = my_utilities.force_float(x)
+                y = my_utilities.force_float(y)
+                rx.append(x)
+                
+                if counter < len(ybackground):
+                    by = my_utilities.force_float(ybackground[counter])
+                else:
+                    by = 0
+                
+                ry.append(y - by)
+                remove_values.append((counter + 1, y, by, y - by))
+    
+    def subtract_resampled(pairs, mode):
+        for xdata, ydata, xbackground, ybackground in pairs:
+            DataHandling.calculation.subtractBackgroundData(
+                    xdata, ydata, 1, xbackground, ybackground, 1, mode=mode)
+    
+    for name, filepath in files:
+        datacontainer = DataHandling.DataContainer.DataContainer(filepath)
+        datacontainer.readFileData(None, True, False, False)
+        datapoints = datacontainer.datapoints
+        
+        pairs = []
+        for i, datapoint in enumerate(datapoints):
+            background = datapoints[(i + 1) % len(datapoints)]
+            pairs.append(datapoint.getPlotData(DataPoint.RAW_POSITION, DataPoint.RAW_VOLTAGE, True) + 
+                         background.getPlotData(DataPoint.RAW_POSITION, DataPoint.RAW_VOLTAGE, True))
+        
+        loop = measure(subtract_loop, pairs)
+        linear = measure(subtract_resampled, pairs, "linear")
+        cubic = measure(subtract_resampled, pairs, "cubic")
+        
+        print("  {:<40} index loop: {:>7.3f}s  linear: {:>7.3f}s  cubic: {:>7.3f}s".format(
+            name, loop, linear, cubic))
+
+def benchmarkInterpolation(files):
+    """Compare interpolating the background by scanning the sweeps and 
+    looping over the positions (as before) with the binary search and the
+    interpolation of all positions at once, each datapoint is interpolated
+    between the datapoints of the same file
+    
+    Parameters
+    ----------
+        files : list of tuples
+            The name to display and the path of the raw file
+    """
+    
+    print("Background interpolation (loops vs. sweep set)")
+    
+    DataPoint = DataHandling.DataPoint.DataPoint
+    DataContainer = DataHandling.DataContainer.DataContainer
+    
+    def interpolate_loop(rows, targets):
+        controls = [row[0] for row in rows]
+        
+        for target in targets:
+            # the first index with a bigger control value
+            index = 0
+            while index < len(controls) and controls[index] < target:
+                index += 1
+            
+            index = min(max(index, 1), len(controls) - 1)
+            
+            x2 = rows[index][0]
+            y2_values = rows[index][1]
+            
+            i = index - 1
+            while i >= 0 and rows[i][0] == x2:
+                i -= 1
+            x1 = rows[i][0]
+            y1_values = rows[i][1]
+            
+            result = []
+            for i in range(min(len(y1_values[1]), len(y2_values[1]))):
+                m = (y2_values[1][i] - y1_values[1][i]) / (x2 - x1)
+                t = y1_values[1][i] - m * x1
+                result.append((y2_values[0][i], m * target + t))
+    
+    def interpolate_sweep_set(rows, targets):
+        sweep_set = DataHandling.SweepSet.SweepSet(rows)
+        
+        for target in targets:
+            index = sweep_set.findIndex(target)
+            index = min(max(index, 1), len(sweep_set) - 1)
+            
+            sweep_set.interpolate(target, index)
+    
+    for name, filepath in files:
+        datacontainer = DataHandling.DataContainer.DataContainer(filepath)
+        datacontainer.readFileData(None, True, False, False)
+        
+        rows = []
+        for datapoint in datacontainer.datapoints:
+            temperature = datapoint.getEnvironmentVariableAvg(DataContainer.TEMPERATURE)
+            
+            if isinstance(temperature, (list, tuple)):
+                rows.append((temperature[0], datapoint.getPlotData(
+                        DataPoint.RAW_POSITION, DataPoint.RAW_VOLTAGE, True),
+                        datapoint.getEnvironmentVariables()))
+        
+        rows.sort(key=lambda row: row[0])
+        controls = np.array([row[0] for row in rows])
+        # interpolate between each two sweeps
+        targets = ((controls[:-1] + controls[1:]) / 2).tolist()
+        
+        loop = measure(interpolate_loop, rows, targets)
+        sweep_set = measure(interpolate_sweep_set, rows, targets)
+        
+        print("  {:<40} loops: {:>7.3f}s  sweep set: {:>7.3f}s  speedup: {:>5.1f}x".format(
+            name, loop, sweep_set, loop / sweep_set))
+
+def benchmarkBackgroundCache(files):
+    """Compare creating the interpolated backgrounds of multiple samples with
+    preparing the background for each sample (as before) with preparing it
+    once, each file is used as the background of itself
+    
+    Parameters
+    ----------
+        files : list of tuples
+            The name to display and the path of the raw file
+    """
+    
+    print("Interpolated backgrounds for 10 samples (preparing each time vs. once)")
+    
+    app = QtWidgets.QApplication.instance()
+    if app == None:
+        app = QtWidgets.QApplication(sys.argv)
+    
+    controller = Controller.Controller(False)
+    DataContainer = DataHandling.DataContainer.DataContainer
+    
+    def create(datacontainer, background, prepare_each_time):
+        for i in range(10):
+            # the background is prepared for the first sample in both cases
+            if prepare_each_time or i == 0:
+                background._interpolation_ranges = {}
+            
+            DataHandling.calculation.createBackgroundDataContainer(
+                    datacontainer, background, DataContainer.TEMPERATURE, 
+                    "<temporary created background>", controller)
+    
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        
+        for name, filepath in files:
+            datacontainer = DataHandling.DataContainer.DataContainer(filepath)
+            datacontainer.readFileData(None, True, False, False)
+            
+            each_time = measure(create, datacontainer, datacontainer, True, repeat=1)
+            once = measure(create, datacontainer, datacontainer, False, repeat=1)
+            
+            print("  {:<40} each time: {:>7.3f}s  once: {:>7.3f}s  speedup: {:>5.1f}x".format(
+                name, each_time, once, each_time / once))
+
+def benchmarkBackgroundBatch(files):
+    """Compare creating the background, subtracting it and fitting again for 
+    each sample one after the other (as the wizard did before) with the batch
+    subtraction in one process per cpu, each file is a sample and the 
+    background of itself
+    
+    Parameters
+    ----------
+        files : list of tuples
+            The name to display and the path of the raw file
+    """
+    
+    print("Background subtraction of {} samples (one after the other vs. {} processes)".format(
+        len(files), os.cpu_count()))
+    
+    app = QtWidgets.QApplication.instance()
+    if app == None:
+        app = QtWidgets.QApplication(sys.argv)
+    
+    controller = Controller.Controller(False)
+    DataContainer = DataHandling.DataContainer.DataContainer
+    
+    def subtract_each(datacontainers):
+        for datacontainer in datacontainers:
+            background = controller.createNewBackground(
+                    datacontainer, datacontainer, DataContainer.TEMPERATURE)
+            controller.subtractBackgroundData(datacontainer, background)
+    
+    def subtract_batch(datacontainers):
+        controller.subtractBackgroundDataBatch(
+                datacontainers, datacontainers, DataContainer.TEMPERATURE, None, 0)
+    
+    minimum = Constants.BACKGROUND_BATCH_PARALLEL_MINIMUM_DATAPOINTS
+    Constants.BACKGROUND_BATCH_PARALLEL_MINIMUM_DATAPOINTS = 0
+    
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            
+            datacontainers = []
+            for name, filepath in files:
+                datacontainer = DataHandling.DataContainer.DataContainer(filepath)
+                datacontainer.readFileData(None, True, False, False)
+                datacontainers.append(datacontainer)
+            
+            each = measure(subtract_each, datacontainers, repeat=1)
+            batch = measure(subtract_batch, datacontainers, repeat=1)
+            
+            print("  {:<40} one after the other: {:>7.3f}s  batch: {:>7.3f}s  speedup: {:>5.1f}x".format(
+                "{} samples".format(len(datacontainers)), each, batch, each / batch))
+    finally:
+        Constants.BACKGROUND_BATCH_PARALLEL_MINIMUM_DATAPOINTS = minimum
+
+def benchmarkClustering(sweeps):
+    """Compare grouping the static values by comparing each value with the
+    groups found so far and scanning the groups for each datapoint (as 
+    before) with the sorted grouping that returns the labels, the values are
+    the fields of a M(H) measurement with many different fields
+    
+    Parameters
+    ----------
+        sweeps : int
+            The number of values
+    """
+    
+    print("Grouping static values (comparing vs. sorting)")
+    
+    def group_loop(values, threshold):
+        uniques = []
+        full_list = {}
+        
+        for x in values:
+            found = False
+            
+            for u in uniques:
+                if u - threshold < x and u + threshold > x:
+                    found = True
+                    full_list[u].append(x)
+                    break
+            
+            if not found:
+                full_list[x] = [x]
+                uniques.append(x)
+        
+        # find the group of each value
+        for x in values:
+            for range_value in full_list:
+                if x in full_list[range_value]:
+                    break
+    
+    def group_sorted(values, threshold):
+        labels, ranges = DataHandling.calculation.clusterThreshold(values, threshold)
+        range_values = ranges[labels].tolist()
+    
+    # a hysteresis loop, each field is measured twice
+    fields = np.linspace(10, 70000, sweeps // 2)
+    values = np.concatenate((fields, fields[::-1]))
+    values = (values + np.random.normal(0, 0.001, len(values))).tolist()
+    threshold = abs(min(values) / Constants.STATIC_VALUE_THRESHOLD)
+    
+    comparing = measure(group_loop, values, threshold, repeat=1)
+    sorting = measure(group_sorted, values, threshold)
+    
+    print("  {:<40} comparing: {:>7.3f}s  sorting: {:>7.3f}s  speedup: {:>5.1f}x".format(
+        "{} values".format(len(values)), comparing, sorting, comparing / sorting))
+
+def run(benchmarks, sweeps):
+    """Run the benchmarks with the given names
+    
+    Parameters
+    ----------
+        benchmarks : list of String
+            The names of the benchmarks to run
+        sweeps : int
+            The number of sweeps in the synthetic raw file
+    """
+    
+    directory = tempfile.mkdtemp()
+    synthetic = os.path.join(directory, "synthetic.rw.dat")
+    
+    print("Creating synthetic raw file with {} sweeps...".format(sweeps))
+    createSyntheticRawFile(synthetic, sweeps)
+    
+    files = [(name, os.path.join(EXAMPLE_DATA, name + ".rw.dat")) for name in EXAMPLE_FILES]
+    files.append(("synthetic ({} sweeps)".format(sweeps), synthetic))
+    
+    # the fitting benchmarks fit the same data multiple times, the fit cache
+    # is used in its own benchmark only
+    Constants.FIT_CACHE = False
+    
+    if "parsing" in benchmarks:
+        benchmarkParsing(files)
+    
+    if "lazy" in benchmarks:
+        benchmarkLazyLoading(files)
+    
+    if "cache" in benchmarks:
+        benchmarkParseCache(files)
+    
+    if "rows" in benchmarks:
+        benchmarkRowStorage(files)
+    
+    if "fit" in benchmarks:
+        benchmarkFitting(files)
+    
+    if "jacobian" in benchmarks:
+        benchmarkJacobian(files)
+    
+    if "parallel" in benchmarks:
+        benchmarkParallelFitting(files)
+    
+    if "warm" in benchmarks:
+        benchmarkWarmStart(files)
+    
+    if "batched" in benchmarks:
+        benchmarkBatchedFitting(files)
+    
+    if "fitcache" in benchmarks:
+        benchmarkFitCache(files)
+    
+    if "subtraction" in benchmarks:
+        benchmarkSubtraction(files)
+    
+    if "interpolation" in benchmarks:
+        benchmarkInterpolation(files)
+    
+    if "clustering" in benchmarks:
+        benchmarkClustering(sweeps)
+    
+    if "backgroundcache" in benchmarks:
+        benchmarkBackgroundCache(files)
+    
+    if "backgroundbatch" in benchmarks:
+        benchmarkBackgroundBatch(files)
+    
+    if "resampling" in benchmarks:
+        benchmarkResampling(files)
+    
+    os.remove(synthetic)
+    os.rmdir(directory)
+
+if __name__ == "__main__":
+    names = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    sweeps = 2000
+    
+    for arg in sys.argv[1:]:
+        if arg.startswith("--sweeps="):
+            sweeps = int(arg[len("--sweeps="):])
+    
+    if len(names) == 0:
+        names = ["parsing", "lazy", "cache", "rows", "fit", "jacobian", "parallel", "warm", "batched", "fitcache", "subtraction", "interpolation", "clustering", "backgroundcache", "backgroundbatch", "resampling"]
+    
+    run(names, sweeps)
\ No newline at end of file
@@ -198,6 +198,39 @@ def force_float(element, surpress_error = False):
                     raise
     
 
+def force_float_array(elements, surpress_error = False):
+    """Return a float array of the elements. Each element is converted like
+    the force_float() converts it, numeric arrays are converted at once
+    
+    Raises
+    ------
+        ValueError
+            If one of the elements cannot be parsed to a float
+    
+    Parameters
+    ----------
+        elements : array_like
+            The elements to convert to floats
+        surpress_error : boolean, optional
+            If this is true elements that cannot be parsed will be 0
+    
+    Returns
+    -------
+        numpy.ndarray of float
+            The elements parsed to floats
+    """
+    
+    try:
+        array = np.asarray(elements)
+    except ValueError:
+        array = None
+    
+    if array is not None and array.dtype.kind in "biuf":
+        return array.astype(float)
+    else:
+        return np.array([force_float(element, surpress_error) for element in elements],
+                        dtype=float)
+
 def mean_std(array, errors = None):
     """Get the mean value of the array with the given standard diviation. If the
     errors is an array with the same length like the array parameter this will